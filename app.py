@@ -3,38 +3,60 @@ Unified FPL app for Fly.io + Upstash Redis
 Combines your existing scraper with SSE server
 """
 
-import os, time, requests, signal, subprocess, hashlib, json, uuid, threading
-from datetime import datetime, timezone, timedelta
-from pathlib import Path
+import os, time, requests, signal, hashlib, json, threading
+from datetime import datetime
 from flask import Flask, Response, request
 from flask_cors import CORS
-import concurrent.futures
+import fpl_client
+import fpl_scrape_rosters
+from fpl_bootstrap import get_snapshot
+from fpl_cache import caches
+from roster_delta import deltas, merge_patches
+from sse_hub import BroadcastHub
+from csv_mirror import mirror
+from season_store import season
+from warm_state import warm_state, SNAPSHOT_INTERVAL
+from standings import cube
+from gw_archive import archive
+from http_cache import http_cache
+from entry_store import entries
+import scrape_schedule
+from scrape_schedule import ScrapePlan
 
 # Add at top of file with other globals
-chips_cache = {"data": None, "timestamp": 0}
-chips_cache_lock = threading.Lock()
 CHIPS_CACHE_DURATION = 3600  # 1 hour in seconds
 
 # ====== REDIS CONNECTION (Upstash) ======
-try:
-    import redis
-    redis_client = redis.Redis(
-        host=os.getenv('REDIS_HOST', 'localhost'),
-        port=int(os.getenv('REDIS_PORT', 6379)),
-        password=os.getenv('REDIS_PASSWORD'),
-        decode_responses=True,
-        ssl=True,
-        ssl_cert_reqs=None,
-        socket_connect_timeout=5,
-        socket_timeout=5,
-        retry_on_timeout=True
-    )
-    redis_client.ping()
+# Connected in the background (see connect_redis) so a slow Upstash never holds
+# up the port bind; until then pushes go straight to this process's SSE clients.
+redis_client = None
+REDIS_ENABLED = False
+
+def connect_redis() -> bool:
+    """Connect and ping Upstash; on success hand the connection to the SSE hub"""
+    global redis_client, REDIS_ENABLED
+    try:
+        import redis  # deferred: ~0.1s of import time the server does not need to bind
+        client = redis.Redis(
+            host=os.getenv('REDIS_HOST', 'localhost'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            password=os.getenv('REDIS_PASSWORD'),
+            decode_responses=True,
+            ssl=True,
+            ssl_cert_reqs=None,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            retry_on_timeout=True
+        )
+        client.ping()
+    except Exception as e:
+        print(f"[redis] Connection failed: {e}. Push notifications disabled.", flush=True)
+        return False
+    redis_client = client
     REDIS_ENABLED = True
     print("[redis] Connected to Upstash successfully", flush=True)
-except Exception as e:
-    REDIS_ENABLED = False
-    print(f"[redis] Connection failed: {e}. Push notifications disabled.", flush=True)
+    sse_hub.attach(redis_client)
+    return True
 
 # ====== CONFIG ======
 UPLOAD_ENDPOINT = os.getenv("BASE_UPLOAD_ENDPOINT", "https://swikle.com/api/upload-csv")
@@ -48,17 +70,32 @@ def _int_env(name, default):
         return default
 
 GAMEDAY_INTERVAL = _int_env("GAMEDAY_INTERVAL_SECONDS", 30)
-NON_GAMEDAY_INTERVAL = _int_env("NON_GAMEDAY_INTERVAL_SECONDS", 600)
+NON_GAMEDAY_INTERVAL = _int_env("NON_GAMEDAY_INTERVAL_SECONDS", 600)  # fallback when the fixture schedule is unavailable
+IDLE_INTERVAL = _int_env("IDLE_MAX_INTERVAL_SECONDS", 3600)  # longest sleep with no match in play
+EVENTS_MAX_AGE = _int_env("EVENTS_MAX_AGE_SECONDS", 6 * 3600)  # bootstrap age acceptable for event deadlines
 STATIC_INTERVAL = _int_env("INTERVAL_SECONDS", 0)
 ACTIVE = os.getenv("ACTIVE", "1")
 MAX_GAMEWEEK = _int_env("MAX_GAMEWEEK", 38)
+SCRAPE_WORKERS = _int_env("SCRAPE_WORKERS", 8)
+SCRAPE_RATE = _int_env("SCRAPE_RATE_PER_SECOND", 10)
 CHANNEL_NAME = 'fpl_updates'
 
+# League managers scraped every cycle and shown on the dashboard
+LEAGUE_ENTRY_IDS = [
+    394273, 373574, 650881, 6197529, 1094601, 6256408, 62221, 701623,
+    3405299, 5438502, 5423005, 4807443, 581156, 4912819, 876871, 4070923,
+    5898648, 872442, 468791, 8592148
+]
+
 # ====== STATE ======
 file_hashes = {}
 scraper_running = True
 current_manifest = {"gameweeks": {}, "version": None, "timestamp": None, "updated": None}
 manifest_lock = threading.Lock()
+# Set once the boot-time manifest load has finished (successfully or not); the
+# scraper waits for it so it never builds a manifest from an empty one
+manifest_ready = threading.Event()
+startup = {'began': time.time(), 'phases': {}, 'ready': False}
 
 # ====== FLASK SSE SERVER ======
 app = Flask(__name__)
@@ -69,7 +106,7 @@ CORS(app, origins=[
     "http://localhost:5173",
     "https://*.vercel.app",
     os.getenv("FRONTEND_URL", "*")
-], resources={r"/*": {"origins": "*"}})
+], resources={r"/*": {"origins": "*"}}, expose_headers=["X-Data-Version"])
 
 # ====== UTILITIES ======
 def log(msg: str):
@@ -81,6 +118,10 @@ def bust():
 def get_file_hash(data: bytes) -> str:
     return hashlib.md5(data).hexdigest()
 
+def record_phase(name: str, started: float):
+    """Record how long a startup phase took (reported on /health)"""
+    startup['phases'][name] = round(time.time() - started, 3)
+
 # ====== MANIFEST MANAGEMENT ======
 def update_manifest_in_memory(manifest_data):
     """Update the in-memory manifest (thread-safe)"""
@@ -95,10 +136,15 @@ def load_manifest_from_blob():
     try:
         manifest_url = f"{PUBLIC_BASE}fpl-league-manifest.json?v={bust()}"
         log(f"[manifest] Loading from blob: {manifest_url}")
-        response = requests.get(manifest_url, timeout=10)
+        response = fpl_client.get(manifest_url, timeout=10)
         if response.ok:
             manifest_data = response.json()
             with manifest_lock:
+                # The warm-state snapshot may already hold a newer one (e.g. the last blob upload failed)
+                if (manifest_data.get('timestamp') or 0) < (current_manifest.get('timestamp') or 0):
+                    log(f"[manifest] Blob version {manifest_data.get('version')} is older than "
+                        f"{current_manifest.get('version')}, keeping the restored manifest")
+                    return True
                 current_manifest = manifest_data
             log(f"[manifest] Loaded from blob: {len(manifest_data.get('gameweeks', {}))} gameweeks")
             return True
@@ -109,88 +155,57 @@ def load_manifest_from_blob():
         log(f"[manifest] Error loading from blob: {e}")
         return False
 
-# Load manifest from blob on import
-load_manifest_from_blob()
-
 # ====== PUSH NOTIFICATION ======
 def publish_update(event_type: str, data: dict):
-    """Publish update event to Redis for SSE clients"""
-    if not REDIS_ENABLED:
-        return
-    
+    """Publish update event to Redis for SSE clients (straight to this process's clients without Redis)"""
     try:
         message = {
             'type': event_type,
             'timestamp': int(time.time()),
             'data': data
         }
+        if not REDIS_ENABLED:
+            sse_hub.publish(message)
+            return
         redis_client.publish(CHANNEL_NAME, json.dumps(message))
         log(f"[push] Published {event_type} event")
     except Exception as e:
         log(f"[push] Failed to publish: {e}")
 
 # ====== SSE ROUTES ======
-def event_stream():
-    """Generator that yields SSE formatted messages with reconnection handling"""
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        pubsub = None
-        try:
-            pubsub = redis_client.pubsub()
-            pubsub.subscribe(CHANNEL_NAME)
-            
-            # Send initial connection message
-            yield f"data: {json.dumps({'type': 'connected', 'timestamp': int(time.time())})}\n\n"
-            
-            last_heartbeat = time.time()
-            last_message = time.time()
-            
-            for message in pubsub.listen():
-                current_time = time.time()
-                last_message = current_time
-                
-                # Send heartbeat every 30 seconds
-                if current_time - last_heartbeat > 30:
-                    yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': int(current_time)})}\n\n"
-                    last_heartbeat = current_time
-                
-                # Check for stale connection (no messages for 5 minutes)
-                if current_time - last_message > 300:
-                    log("[SSE] Connection appears stale, reconnecting...")
-                    raise ConnectionError("Stale connection detected")
-                
-                # Process actual messages
-                if message['type'] == 'message':
-                    try:
-                        yield f"data: {message['data']}\n\n"
-                    except:
-                        continue
-                        
-        except Exception as e:
-            log(f"[SSE] Stream error: {e}, retrying... ({retry_count + 1}/{max_retries})")
-            retry_count += 1
-            if retry_count < max_retries:
-                time.sleep(2 ** retry_count)
-            else:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Connection lost'})}\n\n"
-                break
-        finally:
-            if pubsub:
-                try:
-                    pubsub.close()
-                except:
-                    pass
+def coalesce_updates(messages):
+    """
+    Collapse a burst of pushed updates: consecutive patches for a gameweek merge
+    into one, anything else for the same gameweek keeps only the latest.
+    """
+    merged = {}
+    for i, msg in enumerate(messages):
+        gw = (msg.get('data') or {}).get('gameweek')
+        if gw is None or msg.get('type') not in ('gameweek_patch', 'gameweek_updated'):
+            merged[('msg', i)] = msg
+            continue
+        key = ('gw', gw)
+        prev = merged.get(key)
+        if (prev and prev['type'] == 'gameweek_patch' and msg['type'] == 'gameweek_patch'
+                and prev['data']['patch']['to'] == msg['data']['patch']['from']):
+            patch = merge_patches(prev['data']['patch'], msg['data']['patch'])
+            msg = {**msg, 'data': {**msg['data'], 'patch': patch}}
+        elif prev and msg['type'] == 'gameweek_patch':
+            # Can't chain onto what we already hold: tell clients to refetch
+            msg = {**msg, 'type': 'gameweek_updated', 'data': {k: v for k, v in msg['data'].items() if k != 'patch'}}
+        merged.pop(key, None)
+        merged[key] = msg
+    return list(merged.values())
+
+# One Redis subscription per process, fanned out to every SSE client
+# (Redis is attached once connect_redis() succeeds)
+sse_hub = BroadcastHub(None, CHANNEL_NAME, coalesce=coalesce_updates)
 
 @app.route('/sse/fpl-updates')
 def sse_endpoint():
     """SSE endpoint that clients connect to"""
-    if not REDIS_ENABLED:
-        return {'error': 'Redis not available'}, 503
-    
     return Response(
-        event_stream(),
+        sse_hub.stream(),
         mimetype='text/event-stream',
         headers={
             'Cache-Control': 'no-cache, no-transform',
@@ -202,27 +217,102 @@ def sse_endpoint():
 
 @app.route('/health')
 def health():
-    """Health check endpoint"""
+    """Health check endpoint; reports 'starting' (still 200) until boot-time warm-up completes"""
     redis_status = 'unknown'
     try:
         if REDIS_ENABLED:
             redis_client.ping()
             redis_status = 'connected'
+        elif 'redis' not in startup['phases']:
+            redis_status = 'connecting'
         else:
             redis_status = 'disabled'
     except:
         redis_status = 'error'
     
+    if redis_status not in ['connected', 'disabled', 'connecting']:
+        overall = 'degraded'
+    elif not startup['ready']:
+        overall = 'starting'
+    else:
+        overall = 'healthy'
+    
     status = {
-        'status': 'healthy' if redis_status in ['connected', 'disabled'] else 'degraded',
+        'status': overall,
         'redis': redis_status,
         'scraper': 'running' if scraper_running else 'stopped',
+        'schedule': last_scrape_plan._asdict() if last_scrape_plan else None,
+        'sse': sse_hub.stats(),
+        'startup': {
+            'ready': startup['ready'],
+            'uptime': round(time.time() - startup['began'], 1),
+            'phases': dict(startup['phases']),
+        },
         'timestamp': int(time.time())
     }
     
-    code = 200 if status['status'] == 'healthy' else 503
+    code = 503 if overall == 'degraded' else 200
     return status, code
 
+@app.route('/api/admin/cache')
+def cache_stats():
+    """Memory budget plus hit/miss/eviction counters for every cache namespace"""
+    return caches.stats(), 200
+
+@app.route('/api/admin/cache/<name>', methods=['GET', 'DELETE'])
+def cache_namespace(name):
+    """Inspect (GET) or flush (DELETE) one cache namespace"""
+    ns = caches.get(name)
+    if ns is None:
+        return {'error': f'Unknown cache namespace: {name}', 'namespaces': caches.names()}, 404
+    
+    if request.method == 'DELETE':
+        flushed = ns.clear()
+        log(f"[cache] Flushed {flushed} entries from '{name}'")
+        return {'namespace': name, 'flushed': flushed}, 200
+    
+    return {'namespace': name, 'stats': ns.stats(), 'keys': [str(k) for k in ns.keys()]}, 200
+
+@app.route('/api/admin/mirror')
+def mirror_stats():
+    """Local CSV mirror: files on disk, memory tier and Blob/bundled fallbacks"""
+    return mirror.stats(), 200
+
+@app.route('/api/admin/season')
+def season_stats():
+    """Columnar season store: ingested gameweeks, rows and mapped bytes"""
+    return season.stats(), 200
+
+@app.route('/api/admin/standings')
+def standings_stats():
+    """Standings cube: version, size and how many gameweek slices were recomputed"""
+    return cube.stats(), 200
+
+@app.route('/api/admin/warm-state')
+def warm_state_stats():
+    """Warm-restart snapshot: database size, last snapshot and entries restored at boot"""
+    return warm_state.stats(), 200
+
+@app.route('/api/admin/gw-archive')
+def gw_archive_stats():
+    """Finished-gameweek archive: archived gameweeks, files on disk and memory/disk hit counts"""
+    return archive.stats(), 200
+
+@app.route('/api/admin/http-cache')
+def http_cache_stats():
+    """Upstream revalidation cache: entries, bytes, 304 hit ratio and bytes not re-downloaded"""
+    return http_cache.stats(), 200
+
+@app.route('/api/admin/entry-store')
+def entry_store_stats():
+    """Shared entry metadata/history store: current gameweek epoch, entries held, hits and fetches"""
+    return entries.stats(), 200
+
+@app.route('/api/admin/upstream-stats')
+def upstream_stats():
+    """Per-endpoint call counts and latency for upstream (FPL + Blob) requests"""
+    return {'upstream': fpl_client.latency_stats(), 'timestamp': int(time.time())}, 200
+
 @app.route('/')
 def root():
     """Info page"""
@@ -234,7 +324,9 @@ def root():
             'health': '/health',
             'fixtures': '/api/fixtures',
             'manifest': '/api/manifest',
-            'data': '/api/data/<gameweek>'
+            'data': '/api/data/<gameweek>',
+            'standings': '/api/standings',
+            'squads': '/api/squads?entries=<id,id,...>'
         },
         'features': {
             'redis': REDIS_ENABLED,
@@ -258,516 +350,655 @@ def get_manifest():
         'Expires': '0'
     }
 
-# Cache for fixtures (5 minutes - fixtures don't change often)
-fixtures_cache = {"data": None, "timestamp": 0}
-fixtures_cache_lock = threading.Lock()
+def load_fixtures(_key):
+    """Fixtures plus team and player-to-team maps (cache loader; raises on upstream failure)"""
+    # Shared bootstrap snapshot (includes teams and players)
+    snapshot = get_snapshot()
+
+    # Fetch fixtures
+    fixtures_data = fpl_client.get_fixtures()
+
+    # Team map; player-to-team map (web_name, full name, second_name) is prebuilt on the snapshot
+    team_map = {str(team_id): team['short_name'] for team_id, team in snapshot.teams.items()}
+    player_team_map = snapshot.player_team_map
+
+    result = {
+        'fixtures': fixtures_data,
+        'teamMap': team_map,
+        'playerTeamMap': player_team_map
+    }
+
+    log(f"[fixtures] Loaded {len(fixtures_data)} fixtures with {len(team_map)} teams and {len(player_team_map)} player mappings")
+
+    return result
+
+# Cache for fixtures (5 minutes - fixtures don't change often); stale copies are served while refreshing
 FIXTURES_CACHE_DURATION = 300  # 5 minutes
+fixtures_cache = caches.namespace('fixtures', ttl=FIXTURES_CACHE_DURATION, max_entries=1,
+                                  loader=load_fixtures, stale_ttl=3600, refresh_ahead=30)
 
 @app.route('/api/fixtures')
 def get_fixtures():
     """Fetch and return FPL fixture data with player mappings"""
-    current_time = time.time()
-    
-    # Check cache first
-    with fixtures_cache_lock:
-        if fixtures_cache["data"] and (current_time - fixtures_cache["timestamp"]) < FIXTURES_CACHE_DURATION:
-            log("[fixtures] Served from cache")
-            return fixtures_cache["data"], 200
-    
     try:
-        # Fetch bootstrap data (includes teams and players)
-        bootstrap_response = requests.get(
-            'https://fantasy.premierleague.com/api/bootstrap-static/',
-            timeout=10
-        )
-        bootstrap_response.raise_for_status()
-        bootstrap_data = bootstrap_response.json()
-        
-        # Fetch fixtures
-        fixtures_response = requests.get(
-            'https://fantasy.premierleague.com/api/fixtures/',
-            timeout=10
-        )
-        fixtures_response.raise_for_status()
-        fixtures_data = fixtures_response.json()
-        
-        # Build team map
-        team_map = {str(team['id']): team['short_name'] for team in bootstrap_data['teams']}
-        
-        # Build player-to-team map with multiple name formats
-        player_team_map = {}
-        for player in bootstrap_data['elements']:
-            team_name = team_map[str(player['team'])]
-            
-            # Add web_name (short name)
-            player_team_map[player['web_name']] = team_name
-            
-            # Add full name
-            full_name = f"{player['first_name']} {player['second_name']}"
-            player_team_map[full_name] = team_name
-            
-            # Add second_name only (most common in your CSV)
-            player_team_map[player['second_name']] = team_name
-        
-        result = {
-            'fixtures': fixtures_data,
-            'teamMap': team_map,
-            'playerTeamMap': player_team_map
-        }
-        
-        # Cache the result
-        with fixtures_cache_lock:
-            fixtures_cache["data"] = result
-            fixtures_cache["timestamp"] = current_time
-        
-        log(f"[fixtures] Served {len(fixtures_data)} fixtures with {len(team_map)} teams and {len(player_team_map)} player mappings")
-        
-        return result, 200
-        
+        return fixtures_cache.fetch('all'), 200
     except Exception as e:
         log(f"[fixtures] Error fetching data: {e}")
         return {'error': 'Failed to fetch fixture data'}, 500
 
 @app.route('/api/data/<int:gameweek>')
 def get_gameweek_data(gameweek):
-    """Serve CSV data directly through backend to bypass CDN caching"""
+    """
+    Serve a gameweek CSV from the local mirror (ETag = content hash, 304 on a
+    matching If-None-Match), falling back to Blob and then the bundled copy.
+    With ?since=<version> (the X-Data-Version of a previous response), returns
+    only the row patches since that version, or 410 if it is too old to patch.
+    """
+    since = request.args.get('since')
+    if since:
+        patches = deltas.since(gameweek, since)
+        if patches is None:
+            return {'error': 'Version not available, fetch the full CSV', 'version': deltas.current_version(gameweek)}, 410
+        return {'gameweek': gameweek, 'version': deltas.current_version(gameweek), 'patches': patches}, 200
+    
     try:
         with manifest_lock:
             gw_entry = current_manifest.get('gameweeks', {}).get(str(gameweek))
         
-        if not gw_entry:
-            return {'error': f'No data for GW{gameweek}'}, 404
-        
         # Handle both old (string pointer URL) and new (object) formats
         if isinstance(gw_entry, str):
             # Old format: pointer URL - fetch it first
             log(f"[proxy] GW{gameweek} using old pointer format")
-            pointer_res = requests.get(f"{gw_entry}?_t={int(time.time())}", timeout=10)
-            pointer_res.raise_for_status()
-            gw_info = pointer_res.json()
+            gw_info = fpl_client.get_json(f"{gw_entry}?_t={int(time.time())}")
         else:
-            # New format: direct object
-            gw_info = gw_entry
+            # New format: direct object (no entry at all still tries the bundled copy)
+            gw_info = gw_entry or {}
         
-        csv_url = gw_info.get('url')
-        if not csv_url:
-            return {'error': 'Invalid gameweek data'}, 500
-        
-        # Fetch CSV from Vercel Blob with aggressive cache busting
-        bust_param = f"?_t={int(time.time())}&_r={uuid.uuid4().hex[:8]}"
-        response = requests.get(f"{csv_url}{bust_param}", timeout=10)
-        response.raise_for_status()
-        
-        log(f"[proxy] Served GW{gameweek} data ({len(response.content)} bytes)")
+        # Served from the local content-addressed mirror; Blob only on a miss
+        data, digest, source = mirror.resolve(gameweek, gw_info)
+        if data is None:
+            return {'error': f'No data for GW{gameweek}'}, 404
         
-        return response.content, 200, {
+        headers = {
             'Content-Type': 'text/csv',
-            'Cache-Control': 'no-cache, no-store, must-revalidate, max-age=0',
-            'Pragma': 'no-cache',
-            'Expires': '0'
+            # Browsers may keep a copy but must revalidate it (cheap 304 below)
+            'Cache-Control': 'no-cache, must-revalidate',
+            'ETag': f'"{digest}"',
+            'X-Data-Version': digest,
+            'X-Data-Source': source
         }
         
+        if request.if_none_match.contains(digest):
+            return '', 304, headers
+        
+        log(f"[proxy] Served GW{gameweek} data from {source} ({len(data)} bytes)")
+        return data, 200, headers
+        
     except requests.exceptions.RequestException as e:
-        log(f"[proxy] Error fetching GW{gameweek} from blob: {e}")
+        log(f"[proxy] Error fetching GW{gameweek} manifest pointer: {e}")
         return {'error': 'Failed to fetch data from storage'}, 500
     except Exception as e:
         log(f"[proxy] Error serving GW{gameweek}: {e}")
         return {'error': 'Internal server error'}, 500
 
+def load_player_stats(element_id):
+    """Player info, history and fixtures (cache loader; LookupError if the player is unknown)"""
+    # Team/position info from the shared bootstrap snapshot (O(1) lookups)
+    snapshot = get_snapshot()
+    player_info = snapshot.elements.get(element_id)
+
+    if not player_info:
+        raise LookupError('Player not found')
+
+    team_name = snapshot.team_short_name(player_info.get('team'), "Unknown")
+    position = snapshot.position_of(player_info)
+
+    # Fetch player's detailed history
+    history_data = fpl_client.get_element_summary(element_id)
+
+    result = {
+        'player_info': {
+            'id': element_id,
+            'first_name': player_info.get('first_name'),
+            'second_name': player_info.get('second_name'),
+            'web_name': player_info.get('web_name'),
+            'team': team_name,
+            'position': position,
+            'now_cost': player_info.get('now_cost', 0) / 10,
+            'total_points': player_info.get('total_points', 0),
+            'form': player_info.get('form', '0.0'),
+            'points_per_game': player_info.get('points_per_game', '0.0'),
+            'selected_by_percent': player_info.get('selected_by_percent', '0.0'),
+            'ict_index': player_info.get('ict_index', '0.0'),
+            'influence': player_info.get('influence', '0.0'),
+            'creativity': player_info.get('creativity', '0.0'),
+            'threat': player_info.get('threat', '0.0'),
+        },
+        'history': history_data.get('history', []),
+        'fixtures': history_data.get('fixtures', []),
+        'season_stats': {
+            'minutes': player_info.get('minutes', 0),
+            'goals_scored': player_info.get('goals_scored', 0),
+            'assists': player_info.get('assists', 0),
+            'clean_sheets': player_info.get('clean_sheets', 0),
+            'bonus': player_info.get('bonus', 0),
+            'yellow_cards': player_info.get('yellow_cards', 0),
+            'red_cards': player_info.get('red_cards', 0),
+        }
+    }
+
+    log(f"[player] Loaded stats for player {element_id} ({player_info.get('web_name')})")
+    return result
+
 # Cache for player stats (5 minutes - players don't change often)
-player_cache = {}
-player_cache_lock = threading.Lock()
 PLAYER_CACHE_DURATION = 300  # 5 minutes
+player_cache = caches.namespace('player', ttl=PLAYER_CACHE_DURATION, max_entries=1000,
+                                loader=load_player_stats, stale_ttl=1800, refresh_ahead=30)
 
 @app.route('/api/player/<int:element_id>')
 def get_player_stats(element_id):
     """Fetch detailed player stats from FPL API"""
-    current_time = time.time()
-    
-    # Check cache
-    with player_cache_lock:
-        if element_id in player_cache:
-            cached = player_cache[element_id]
-            if (current_time - cached["timestamp"]) < PLAYER_CACHE_DURATION:
-                return cached["data"], 200
-    
     try:
-        # Fetch bootstrap for team/position info
-        bootstrap_res = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/", timeout=10)
-        bootstrap_res.raise_for_status()
-        bootstrap = bootstrap_res.json()
-        
-        # Find player in elements
-        player_info = None
-        for p in bootstrap.get('elements', []):
-            if p['id'] == element_id:
-                player_info = p
-                break
-        
-        if not player_info:
-            return {'error': 'Player not found'}, 404
-        
-        # Get team name
-        team_id = player_info.get('team')
-        team_name = "Unknown"
-        for t in bootstrap.get('teams', []):
-            if t['id'] == team_id:
-                team_name = t['short_name']
-                break
-        
-        # Get position
-        position_map = {1: 'GKP', 2: 'DEF', 3: 'MID', 4: 'FWD'}
-        position = position_map.get(player_info.get('element_type'), 'UNK')
-        
-        # Fetch player's detailed history
-        history_res = requests.get(f"https://fantasy.premierleague.com/api/element-summary/{element_id}/", timeout=10)
-        history_res.raise_for_status()
-        history_data = history_res.json()
-        
-        result = {
-            'player_info': {
-                'id': element_id,
-                'first_name': player_info.get('first_name'),
-                'second_name': player_info.get('second_name'),
-                'web_name': player_info.get('web_name'),
-                'team': team_name,
-                'position': position,
-                'now_cost': player_info.get('now_cost', 0) / 10,
-                'total_points': player_info.get('total_points', 0),
-                'form': player_info.get('form', '0.0'),
-                'points_per_game': player_info.get('points_per_game', '0.0'),
-                'selected_by_percent': player_info.get('selected_by_percent', '0.0'),
-                'ict_index': player_info.get('ict_index', '0.0'),
-                'influence': player_info.get('influence', '0.0'),
-                'creativity': player_info.get('creativity', '0.0'),
-                'threat': player_info.get('threat', '0.0'),
-            },
-            'history': history_data.get('history', []),
-            'fixtures': history_data.get('fixtures', []),
-            'season_stats': {
-                'minutes': player_info.get('minutes', 0),
-                'goals_scored': player_info.get('goals_scored', 0),
-                'assists': player_info.get('assists', 0),
-                'clean_sheets': player_info.get('clean_sheets', 0),
-                'bonus': player_info.get('bonus', 0),
-                'yellow_cards': player_info.get('yellow_cards', 0),
-                'red_cards': player_info.get('red_cards', 0),
-            }
-        }
-        
-        # Cache the result
-        with player_cache_lock:
-            player_cache[element_id] = {"data": result, "timestamp": current_time}
-        
-        log(f"[player] Served stats for player {element_id} ({player_info.get('web_name')})")
-        return result, 200
-        
+        return player_cache.fetch(element_id), 200
+    except LookupError:
+        return {'error': 'Player not found'}, 404
     except Exception as e:
         log(f"[player] Error fetching player {element_id}: {e}")
         return {'error': 'Failed to fetch player data'}, 500
 
+# One budget for all of a squad's upstream calls, which run concurrently; the
+# optional parts that miss it are dropped and the result is cached only briefly
+SQUAD_DEADLINE = float(os.getenv("SQUAD_DEADLINE_SECONDS", "8"))
+DEGRADED_CACHE_DURATION = 10
+
+def degraded_ttl(value):
+    return DEGRADED_CACHE_DURATION if value.get('degraded') else None
+
+def squad_context_calls(current_event, snapshot, deadline):
+    """The upstream calls behind a squad context, for fpl_client.fan_out"""
+    fixture_gw = snapshot.next_event_id or current_event
+    calls = {
+        'live': lambda: fpl_client.get_live(current_event, timeout=fpl_client.remaining(deadline)),
+        # Fixtures for next gameweek to show upcoming matches
+        'fixtures': lambda: fpl_client.get_fixtures(fixture_gw, timeout=fpl_client.remaining(deadline)),
+    }
+    if current_event > 1:
+        calls['prev_live'] = lambda: fpl_client.get_live(current_event - 1, timeout=fpl_client.remaining(deadline))
+    return calls
+
+def assemble_squad_context(snapshot, results, errors):
+    """
+    Everything a squad needs that is the same for every manager: live points,
+    previous gameweek points and next fixtures. Live points are required; next
+    fixtures and previous-GW points are left empty (and listed under 'degraded')
+    if their fetch failed or missed the deadline.
+    """
+    if 'live' in errors:
+        raise errors['live']
+    teams_map = snapshot.teams
+    degraded = []
+
+    live_elements = {e['id']: e for e in results['live'].get('elements', [])}
+
+    fixtures_by_team = {}
+    if 'fixtures' in errors:
+        log(f"[squad] Failed to fetch fixtures: {errors['fixtures']}")
+        degraded.append('next_fixture')
+    for fix in results.get('fixtures') or []:
+        # For home team
+        fixtures_by_team[fix['team_h']] = {
+            'opponent_id': fix['team_a'],
+            'opponent_name': teams_map.get(fix['team_a'], {}).get('short_name', '???'),
+            'is_home': True,
+            'difficulty': fix.get('team_h_difficulty', 3),
+            'kickoff_time': fix.get('kickoff_time'),
+            'finished': fix.get('finished', False),
+        }
+        # For away team
+        fixtures_by_team[fix['team_a']] = {
+            'opponent_id': fix['team_h'],
+            'opponent_name': teams_map.get(fix['team_h'], {}).get('short_name', '???'),
+            'is_home': False,
+            'difficulty': fix.get('team_a_difficulty', 3),
+            'kickoff_time': fix.get('kickoff_time'),
+            'finished': fix.get('finished', False),
+        }
+
+    prev_gw_points = {}
+    if 'prev_live' in errors:
+        log(f"[squad] Failed to fetch prev GW points: {errors['prev_live']}")
+        degraded.append('prev_gw_points')
+    for elem in (results.get('prev_live') or {}).get('elements', []):
+        prev_gw_points[elem['id']] = elem.get('stats', {}).get('total_points', 0)
+
+    return {
+        'live_elements': live_elements,
+        'fixtures_by_team': fixtures_by_team,
+        'prev_gw_points': prev_gw_points,
+        'degraded': degraded,
+    }
+
+def load_squad_context(current_event):
+    """Shared squad context for a gameweek, its fetches run concurrently (cache loader)"""
+    snapshot = get_snapshot()
+    deadline = time.monotonic() + SQUAD_DEADLINE
+    results, errors = fpl_client.fan_out(squad_context_calls(current_event, snapshot, deadline), deadline)
+    return assemble_squad_context(snapshot, results, errors)
+
+# Shared squad inputs: short TTL so live points stay as fresh as the squad cache
+SQUAD_CONTEXT_CACHE_DURATION = 30
+squad_context_cache = caches.namespace('squad_context', ttl=SQUAD_CONTEXT_CACHE_DURATION, max_entries=2,
+                                       loader=load_squad_context, persist=False, ttl_for=degraded_ttl)
+
+def squad_gameweek(snapshot):
+    return snapshot.current_event_id or 1
+
+def build_squad(entry_id, manager_data, picks_data, context, snapshot, current_event):
+    """Assemble one manager's squad from their entry + picks and the shared squad context"""
+    players_map = snapshot.elements
+    teams_map = snapshot.teams
+    position_map = {1: 'GK', 2: 'DEF', 3: 'MID', 4: 'FWD'}
+    live_elements = context['live_elements']
+    fixtures_by_team = context['fixtures_by_team']
+    prev_gw_points = context['prev_gw_points']
+
+    team_name = manager_data.get('name', 'Unknown Team')
+
+    # Get manager's value info (in tenths, so divide by 10)
+    last_deadline_bank = manager_data.get('last_deadline_bank', 0) / 10  # Bank at last deadline
+
+    # Team standings for opponent position display
+    team_positions = snapshot.team_positions
+
+    # Build squad list
+    squad = []
+    for pick in picks_data.get('picks', []):
+        element_id = pick['element']
+        player = players_map.get(element_id, {})
+        team = teams_map.get(player.get('team'), {})
+        live_player = live_elements.get(element_id, {})
+        stats = live_player.get('stats', {})
+
+        # Get next fixture for this player's team
+        player_team_id = player.get('team')
+        next_fixture = fixtures_by_team.get(player_team_id)
+        if next_fixture:
+            next_fixture = next_fixture.copy()  # Don't mutate the original
+            next_fixture['opponent_position'] = team_positions.get(next_fixture.get('opponent_id'), 0)
+
+        squad.append({
+            'element_id': element_id,
+            'name': player.get('web_name', 'Unknown'),
+            'position': position_map.get(player.get('element_type'), 'UNK'),
+            'team': team.get('short_name', '???'),
+            'team_name': team.get('short_name', '???'),  # Alias for frontend
+            'team_id': player_team_id,
+            'slot': pick['position'],
+            'is_captain': pick.get('is_captain', False),
+            'is_vice_captain': pick.get('is_vice_captain', False),
+            'multiplier': pick.get('multiplier', 1),
+            'points': stats.get('total_points', 0),  # Current GW points
+            'prev_gw_points': prev_gw_points.get(element_id, 0),  # Previous GW points
+            'total_points': player.get('total_points', 0),  # Season total
+            'form': player.get('form', '0.0'),
+            'price': player.get('now_cost', 0) / 10,  # Price in millions
+            'minutes': stats.get('minutes', 0),
+            'next_fixture': next_fixture,
+        })
+
+    # Calculate squad value from player prices
+    squad_value = sum(p.get('price', 0) for p in squad)
+
+    return {
+        'entry_id': entry_id,
+        'team_name': team_name,
+        'gameweek': current_event,
+        'squad': squad,
+        'squad_value': round(squad_value, 1),
+        'bank': round(last_deadline_bank, 1),
+        'total_value': round(squad_value + last_deadline_bank, 1),
+        'degraded': context['degraded'],
+    }
+
+def load_squad(entry_id):
+    """
+    A manager's current squad with live points and next fixtures (cache loader).
+    Entry and picks are fetched concurrently with the shared context, all under
+    one SQUAD_DEADLINE instead of one timeout per call. The context goes through
+    squad_context_cache.fetch, so concurrent misses share a single download.
+    """
+    snapshot = get_snapshot()
+    current_event = squad_gameweek(snapshot)
+    deadline = time.monotonic() + SQUAD_DEADLINE
+
+    pending = fpl_client.start({
+        'entry': lambda: entries.get_entry(entry_id, timeout=fpl_client.remaining(deadline)),
+        'picks': lambda: fpl_client.get_picks(entry_id, current_event, timeout=fpl_client.remaining(deadline)),
+    })
+    # On this thread, not the executor: the context loader fans out on the pool itself
+    context = squad_context_cache.fetch(current_event)
+    results, errors = fpl_client.gather(pending, deadline)
+    for required in ('entry', 'picks'):
+        if required in errors:
+            raise errors[required]
+
+    result = build_squad(entry_id, results['entry'], results['picks'], context, snapshot, current_event)
+    log(f"[squad] Loaded squad for entry {entry_id} ({result['team_name']})"
+        + (f", without {', '.join(result['degraded'])}" if result['degraded'] else ""))
+    return result
+
 # Cache for squad data (2 minutes)
-squad_cache = {}
-squad_cache_lock = threading.Lock()
 SQUAD_CACHE_DURATION = 120  # 2 minutes
+squad_cache = caches.namespace('squad', ttl=SQUAD_CACHE_DURATION, max_entries=200,
+                               loader=load_squad, stale_ttl=600, refresh_ahead=15, ttl_for=degraded_ttl)
+
+MAX_BATCH_ENTRIES = 50
+
+def load_squads(entry_ids):
+    """
+    Squads for many managers at once: cached ones as-is, and for the rest the
+    shared context is fetched once and every manager's entry + picks concurrently.
+    Fills squad_cache as it goes. Returns (squads by entry id, client-safe
+    error messages by entry id).
+    """
+    squads, errors = {}, {}
+    missing = []
+    for entry_id in entry_ids:
+        cached = squad_cache.get(entry_id)
+        if cached is not None:
+            squads[entry_id] = cached
+        else:
+            missing.append(entry_id)
+    if not missing:
+        return squads, errors
+
+    snapshot = get_snapshot()
+    current_event = squad_gameweek(snapshot)
+    context = squad_context_cache.fetch(current_event)
+    deadline = time.monotonic() + SQUAD_DEADLINE
+
+    def load_one(entry_id):
+        try:
+            manager_data = entries.get_entry(entry_id, timeout=fpl_client.remaining(deadline))
+            picks_data = fpl_client.get_picks(entry_id, current_event, timeout=fpl_client.remaining(deadline))
+            squad = build_squad(entry_id, manager_data, picks_data, context, snapshot, current_event)
+            squad_cache.set(entry_id, squad)
+            return entry_id, squad, None
+        except Exception as e:
+            # Upstream error text stays in the log; clients get the same message as /api/squad
+            log(f"[squad] Error fetching squad for entry {entry_id}: {e}")
+            return entry_id, None, 'Failed to fetch squad data'
+
+    for entry_id, squad, error in fpl_client.executor.map(load_one, missing):
+        if squad is not None:
+            squads[entry_id] = squad
+        else:
+            errors[entry_id] = error
+    log(f"[squad] Batch loaded {len(missing) - len(errors)} of {len(missing)} squads "
+        f"({len(entry_ids) - len(missing)} cached)")
+    return squads, errors
 
 @app.route('/api/squad/<int:entry_id>')
 def get_squad(entry_id):
     """Fetch a manager's current squad from FPL API"""
-    current_time = time.time()
-    
-    # Check cache
-    with squad_cache_lock:
-        if entry_id in squad_cache:
-            cached = squad_cache[entry_id]
-            if (current_time - cached["timestamp"]) < SQUAD_CACHE_DURATION:
-                return cached["data"], 200
-    
     try:
-        # Fetch bootstrap for player/team info
-        bootstrap_res = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/", timeout=10)
-        bootstrap_res.raise_for_status()
-        bootstrap = bootstrap_res.json()
-        
-        # Build lookup maps
-        players_map = {p['id']: p for p in bootstrap.get('elements', [])}
-        teams_map = {t['id']: t for t in bootstrap.get('teams', [])}
-        position_map = {1: 'GK', 2: 'DEF', 3: 'MID', 4: 'FWD'}
-        
-        # Find current and next gameweek
-        events = bootstrap.get('events', [])
-        current_event = None
-        next_event = None
-        for event in events:
-            if event.get('is_current'):
-                current_event = event['id']
-            if event.get('is_next'):
-                next_event = event['id']
-        
-        if not current_event:
-            current_event = 1
-        
-        # Fetch manager info
-        manager_res = requests.get(f"https://fantasy.premierleague.com/api/entry/{entry_id}/", timeout=10)
-        manager_res.raise_for_status()
-        manager_data = manager_res.json()
-        team_name = manager_data.get('name', 'Unknown Team')
-        
-        # Get manager's value info (in tenths, so divide by 10)
-        last_deadline_value = manager_data.get('last_deadline_value', 0) / 10  # Squad value at last deadline
-        last_deadline_bank = manager_data.get('last_deadline_bank', 0) / 10  # Bank at last deadline
-        last_deadline_total = manager_data.get('last_deadline_total_transfers', 0)
-        
-        # Fetch picks for current gameweek
-        picks_res = requests.get(f"https://fantasy.premierleague.com/api/entry/{entry_id}/event/{current_event}/picks/", timeout=10)
-        picks_res.raise_for_status()
-        picks_data = picks_res.json()
-        
-        # Fetch live data for current gameweek to get points
-        live_res = requests.get(f"https://fantasy.premierleague.com/api/event/{current_event}/live/", timeout=10)
-        live_res.raise_for_status()
-        live_data = live_res.json()
-        live_elements = {e['id']: e for e in live_data.get('elements', [])}
-        
-        # Fetch fixtures for next gameweek to show upcoming matches
-        fixtures_by_team = {}
-        fixture_gw = next_event if next_event else current_event
-        try:
-            fixtures_res = requests.get(f"https://fantasy.premierleague.com/api/fixtures/?event={fixture_gw}", timeout=10)
-            if fixtures_res.ok:
-                fixtures_data = fixtures_res.json()
-                for fix in fixtures_data:
-                    # For home team
-                    fixtures_by_team[fix['team_h']] = {
-                        'opponent_id': fix['team_a'],
-                        'opponent_name': teams_map.get(fix['team_a'], {}).get('short_name', '???'),
-                        'is_home': True,
-                        'difficulty': fix.get('team_h_difficulty', 3),
-                        'kickoff_time': fix.get('kickoff_time'),
-                        'finished': fix.get('finished', False),
-                    }
-                    # For away team
-                    fixtures_by_team[fix['team_a']] = {
-                        'opponent_id': fix['team_h'],
-                        'opponent_name': teams_map.get(fix['team_h'], {}).get('short_name', '???'),
-                        'is_home': False,
-                        'difficulty': fix.get('team_a_difficulty', 3),
-                        'kickoff_time': fix.get('kickoff_time'),
-                        'finished': fix.get('finished', False),
-                    }
-        except Exception as e:
-            log(f"[squad] Failed to fetch fixtures: {e}")
-        
-        # Get team standings for opponent position display
-        team_positions = {}
-        sorted_teams = sorted(bootstrap.get('teams', []), key=lambda t: (-t.get('points', 0), t.get('position', 99)))
-        for idx, team in enumerate(sorted_teams):
-            team_positions[team['id']] = idx + 1
-        
-        # Fetch previous gameweek points
-        prev_gw_points = {}
-        if current_event > 1:
-            try:
-                prev_live_res = requests.get(f"https://fantasy.premierleague.com/api/event/{current_event - 1}/live/", timeout=10)
-                if prev_live_res.ok:
-                    prev_live_data = prev_live_res.json()
-                    for elem in prev_live_data.get('elements', []):
-                        prev_gw_points[elem['id']] = elem.get('stats', {}).get('total_points', 0)
-            except Exception as e:
-                log(f"[squad] Failed to fetch prev GW points: {e}")
-        
-        # Build squad list
-        squad = []
-        for pick in picks_data.get('picks', []):
-            element_id = pick['element']
-            player = players_map.get(element_id, {})
-            team = teams_map.get(player.get('team'), {})
-            live_player = live_elements.get(element_id, {})
-            stats = live_player.get('stats', {})
-            
-            # Get next fixture for this player's team
-            player_team_id = player.get('team')
-            next_fixture = fixtures_by_team.get(player_team_id)
-            if next_fixture:
-                next_fixture = next_fixture.copy()  # Don't mutate the original
-                next_fixture['opponent_position'] = team_positions.get(next_fixture.get('opponent_id'), 0)
-            
-            squad.append({
-                'element_id': element_id,
-                'name': player.get('web_name', 'Unknown'),
-                'position': position_map.get(player.get('element_type'), 'UNK'),
-                'team': team.get('short_name', '???'),
-                'team_name': team.get('short_name', '???'),  # Alias for frontend
-                'team_id': player_team_id,
-                'slot': pick['position'],
-                'is_captain': pick.get('is_captain', False),
-                'is_vice_captain': pick.get('is_vice_captain', False),
-                'multiplier': pick.get('multiplier', 1),
-                'points': stats.get('total_points', 0),  # Current GW points
-                'prev_gw_points': prev_gw_points.get(element_id, 0),  # Previous GW points
-                'total_points': player.get('total_points', 0),  # Season total
-                'form': player.get('form', '0.0'),
-                'price': player.get('now_cost', 0) / 10,  # Price in millions
-                'minutes': stats.get('minutes', 0),
-                'next_fixture': next_fixture,
-            })
-        
-        # Calculate squad value from player prices
-        squad_value = sum(p.get('price', 0) for p in squad)
-        
-        result = {
-            'entry_id': entry_id,
-            'team_name': team_name,
-            'gameweek': current_event,
-            'squad': squad,
-            'squad_value': round(squad_value, 1),
-            'bank': round(last_deadline_bank, 1),
-            'total_value': round(squad_value + last_deadline_bank, 1),
-        }
-        
-        # Cache the result
-        with squad_cache_lock:
-            squad_cache[entry_id] = {"data": result, "timestamp": current_time}
-        
-        log(f"[squad] Served squad for entry {entry_id} ({team_name})")
-        return result, 200
-        
+        return squad_cache.fetch(entry_id), 200
     except Exception as e:
         log(f"[squad] Error fetching squad for entry {entry_id}: {e}")
         return {'error': 'Failed to fetch squad data'}, 500
 
+@app.route('/api/squads')
+def get_squads():
+    """
+    Squads for many managers in one response: ?entries=1,2,3 or, without it,
+    the whole league. Shared live/fixture payloads are fetched once for all of them.
+    """
+    raw = request.args.get('entries')
+    if raw:
+        try:
+            entry_ids = list(dict.fromkeys(int(e) for e in raw.split(',') if e.strip()))
+        except ValueError:
+            return {'error': 'entries must be a comma-separated list of entry ids'}, 400
+        if len(entry_ids) > MAX_BATCH_ENTRIES:
+            return {'error': f'At most {MAX_BATCH_ENTRIES} entries per request'}, 400
+    else:
+        entry_ids = LEAGUE_ENTRY_IDS
+
+    try:
+        squads, errors = load_squads(entry_ids)
+    except Exception as e:
+        log(f"[squad] Error fetching squads: {e}")
+        return {'error': 'Failed to fetch squad data'}, 500
+
+    ordered = [squads[e] for e in entry_ids if e in squads]
+    return {
+        'gameweek': ordered[0]['gameweek'] if ordered else None,
+        'squads': ordered,
+        'errors': {str(e): msg for e, msg in errors.items()},
+    }, 200
+
+def load_manager_history(entry_id):
+    """A manager's season history, transfers and chips (cache loader)"""
+    # Shared with chips; refetched only at gameweek boundaries
+    history_data = entries.get_history(entry_id)
+
+    # Process gameweek history
+    gw_history = []
+    total_transfers = 0
+    total_transfer_cost = 0
+
+    for gw in history_data.get('current', []):
+        gw_history.append({
+            'gameweek': gw.get('event'),
+            'points': gw.get('points', 0),
+            'points_on_bench': gw.get('points_on_bench', 0),
+            'transfers_made': gw.get('event_transfers', 0),
+            'transfer_cost': gw.get('event_transfers_cost', 0),
+            'overall_rank': gw.get('overall_rank', 0),
+            'bank': gw.get('bank', 0) / 10,  # Convert to millions
+            'value': gw.get('value', 0) / 10,  # Convert to millions
+        })
+        total_transfers += gw.get('event_transfers', 0)
+        total_transfer_cost += gw.get('event_transfers_cost', 0)
+
+    # Process chips used
+    chips_used = []
+    for chip in history_data.get('chips', []):
+        chips_used.append({
+            'name': chip.get('name'),
+            'gameweek': chip.get('event'),
+        })
+
+    result = {
+        'entry_id': entry_id,
+        'gameweek_history': gw_history,
+        'total_transfers': total_transfers,
+        'total_transfer_cost': total_transfer_cost,
+        'chips_used': chips_used,
+    }
+
+    log(f"[manager-history] Loaded history for entry {entry_id}")
+    return result
+
 # Cache for manager history (transfers) - 5 minutes
-manager_history_cache = {}
-manager_history_cache_lock = threading.Lock()
 MANAGER_HISTORY_CACHE_DURATION = 300  # 5 minutes
+manager_history_cache = caches.namespace('manager_history', ttl=MANAGER_HISTORY_CACHE_DURATION, max_entries=200,
+                                         loader=load_manager_history, stale_ttl=3600, refresh_ahead=30)
 
 @app.route('/api/manager-history/<int:entry_id>')
 def get_manager_history(entry_id):
     """Fetch a manager's season history including transfers and chips"""
-    current_time = time.time()
-    
-    # Check cache
-    with manager_history_cache_lock:
-        if entry_id in manager_history_cache:
-            cached = manager_history_cache[entry_id]
-            if (current_time - cached["timestamp"]) < MANAGER_HISTORY_CACHE_DURATION:
-                return cached["data"], 200
-    
     try:
-        # Fetch manager's history
-        history_res = requests.get(
-            f"https://fantasy.premierleague.com/api/entry/{entry_id}/history/",
-            timeout=10
-        )
-        history_res.raise_for_status()
-        history_data = history_res.json()
-        
-        # Process gameweek history
-        gw_history = []
-        total_transfers = 0
-        total_transfer_cost = 0
-        
-        for gw in history_data.get('current', []):
-            gw_history.append({
-                'gameweek': gw.get('event'),
-                'points': gw.get('points', 0),
-                'points_on_bench': gw.get('points_on_bench', 0),
-                'transfers_made': gw.get('event_transfers', 0),
-                'transfer_cost': gw.get('event_transfers_cost', 0),
-                'overall_rank': gw.get('overall_rank', 0),
-                'bank': gw.get('bank', 0) / 10,  # Convert to millions
-                'value': gw.get('value', 0) / 10,  # Convert to millions
-            })
-            total_transfers += gw.get('event_transfers', 0)
-            total_transfer_cost += gw.get('event_transfers_cost', 0)
-        
-        # Process chips used
-        chips_used = []
-        for chip in history_data.get('chips', []):
-            chips_used.append({
-                'name': chip.get('name'),
-                'gameweek': chip.get('event'),
-            })
-        
-        result = {
-            'entry_id': entry_id,
-            'gameweek_history': gw_history,
-            'total_transfers': total_transfers,
-            'total_transfer_cost': total_transfer_cost,
-            'chips_used': chips_used,
-        }
-        
-        # Cache the result
-        with manager_history_cache_lock:
-            manager_history_cache[entry_id] = {"data": result, "timestamp": current_time}
-        
-        log(f"[manager-history] Served history for entry {entry_id}")
-        return result, 200
-        
+        return manager_history_cache.fetch(entry_id), 200
     except Exception as e:
         log(f"[manager-history] Error fetching history for entry {entry_id}: {e}")
         return {'error': 'Failed to fetch manager history'}, 500
 
+def load_gameweek_status(_key):
+    """Current and next gameweek with deadlines (cache loader)"""
+    snapshot = get_snapshot()
+    current_gw = None
+    next_gw = None
+
+    event = snapshot.current_event
+    if event:
+        current_gw = {
+            'id': event['id'],
+            'name': f"GW{event['id']}",
+            'deadline_time': event['deadline_time'],
+            'finished': event.get('finished', False),
+            'is_current': True
+        }
+    event = snapshot.next_event
+    if event:
+        next_gw = {
+            'id': event['id'],
+            'name': f"GW{event['id']}",
+            'deadline_time': event['deadline_time'],
+            'is_next': True
+        }
+
+    result = {
+        'current_gameweek': current_gw,
+        'next_gameweek': next_gw
+    }
+
+    log(f"[gw-status] Loaded GW status: current={current_gw['id'] if current_gw else None}, next={next_gw['id'] if next_gw else None}")
+    return result
+
 # Cache for gameweek status
-gw_status_cache = {"data": None, "timestamp": 0}
-gw_status_cache_lock = threading.Lock()
 GW_STATUS_CACHE_DURATION = 60  # 1 minute
+gw_status_cache = caches.namespace('gw_status', ttl=GW_STATUS_CACHE_DURATION, max_entries=1,
+                                   loader=load_gameweek_status, stale_ttl=600, refresh_ahead=10)
 
 @app.route('/api/gameweek-status')
 def get_gameweek_status():
     """Return current and next gameweek info including deadlines"""
-    current_time = time.time()
-    
-    with gw_status_cache_lock:
-        if gw_status_cache["data"] and (current_time - gw_status_cache["timestamp"]) < GW_STATUS_CACHE_DURATION:
-            return gw_status_cache["data"], 200
-    
     try:
-        res = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/", timeout=10)
-        res.raise_for_status()
-        data = res.json()
-        
-        events = data.get('events', [])
-        current_gw = None
-        next_gw = None
-        
-        for event in events:
-            if event.get('is_current'):
-                current_gw = {
-                    'id': event['id'],
-                    'name': f"GW{event['id']}",
-                    'deadline_time': event['deadline_time'],
-                    'finished': event.get('finished', False),
-                    'is_current': True
-                }
-            if event.get('is_next'):
-                next_gw = {
-                    'id': event['id'],
-                    'name': f"GW{event['id']}",
-                    'deadline_time': event['deadline_time'],
-                    'is_next': True
-                }
-        
-        result = {
-            'current_gameweek': current_gw,
-            'next_gameweek': next_gw
-        }
-        
-        with gw_status_cache_lock:
-            gw_status_cache["data"] = result
-            gw_status_cache["timestamp"] = current_time
-        
-        log(f"[gw-status] Served GW status: current={current_gw['id'] if current_gw else None}, next={next_gw['id'] if next_gw else None}")
-        return result, 200
-        
+        return gw_status_cache.fetch('status'), 200
     except Exception as e:
         log(f"[gw-status] Error: {e}")
         return {'error': 'Failed to fetch gameweek status'}, 500
 
+def aggregate_segment(seg):
+    """Aggregate one gameweek's season-store segment to per-manager totals, captain and chicken-rank flag"""
+    managers = {}
+    captain_choices = {}
+    
+    is_total = seg.column('is_total')
+    is_captain = seg.column('is_captain')
+    points_applied = seg.column('points_applied')
+    bench_points = seg.column('bench_points')
+    
+    for i in range(seg.rows):
+        manager_name = seg.string('manager_name', i)
+        
+        # Initialize manager if not exists
+        if manager_name not in managers:
+            managers[manager_name] = {
+                'manager_name': manager_name,
+                'team_name': seg.string('entry_team_name', i),
+                'total_points': 0,
+                'bench_points': 0,
+                'captain_player': '',
+            }
+        
+        if is_total[i]:
+            # This is the totals row - extract key stats (merge, don't overwrite)
+            managers[manager_name]['total_points'] = points_applied[i]
+            managers[manager_name]['bench_points'] = bench_points[i]
+            managers[manager_name]['team_name'] = seg.string('entry_team_name', i) or managers[manager_name]['team_name']
+        elif is_captain[i]:
+            # Track captain for chicken rank
+            player = seg.string('player', i)
+            managers[manager_name]['captain_player'] = player
+            captain_choices[player] = captain_choices.get(player, 0) + 1
+    
+    # Find most popular captain
+    most_popular = max(captain_choices.items(), key=lambda x: x[1])[0] if captain_choices else ''
+    
+    # Mark who picked popular captain
+    for m in managers.values():
+        m['picked_popular_captain'] = m.get('captain_player', '') == most_popular
+    
+    return list(managers.values())
+
+# Per-gameweek aggregates keyed by CSV content hash: a new manifest version only
+# re-aggregates the gameweeks whose file actually changed
+gw_aggregates_cache = caches.namespace('gw_aggregates', ttl=30 * 86400, max_entries=64)
+
+def resolve_gw_info(gw_entry):
+    """Manifest entry as a dict; old-format entries are pointer URLs to one"""
+    if isinstance(gw_entry, str):
+        return fpl_client.get_json(f"{gw_entry}?_t={int(time.time())}")
+    return gw_entry or {}
+
+def ensure_segment(gw, gw_info):
+    """Season-store segment for a manifest entry; the CSV is only fetched if its hash moved"""
+    digest = gw_info.get('hash')
+    if not season.has(gw, digest):
+        data, digest, source = mirror.resolve(gw, gw_info)
+        if data is None:
+            return None
+        # This manifest copy may be older than a segment the scraper just ingested
+        season.ingest(gw, data, digest, authoritative=False)
+    return season.segment(gw)
+
+def fetch_and_parse_gw(gw, manifest_copy):
+    """Per-manager aggregates for one gameweek, re-parsed only when its content hash moves"""
+    try:
+        gw_entry = manifest_copy.get('gameweeks', {}).get(str(gw))
+        if not gw_entry:
+            return gw, []
+        
+        gw_info = resolve_gw_info(gw_entry)
+        digest = gw_info.get('hash')
+        if digest:
+            managers = gw_aggregates_cache.get(digest)
+            if managers is not None:
+                return gw, managers
+        
+        seg = ensure_segment(gw, gw_info)
+        if seg is None:
+            return gw, []
+        
+        managers = aggregate_segment(seg)
+        gw_aggregates_cache.set(seg.hash, managers)
+        log(f"[historical] Aggregated GW{gw} from season store ({len(managers)} managers)")
+        return gw, managers
+    except Exception as e:
+        log(f"[historical] Error fetching GW{gw}: {e}")
+        return gw, []
+
+def load_historical(manifest_version):
+    """Aggregated manager data for every gameweek except the latest (cache loader, keyed by manifest version)"""
+    with manifest_lock:
+        manifest_copy = current_manifest.copy()
+    # A refresh-ahead of an old key may run after a new upload; never cache the new data under it
+    if manifest_copy.get('version') != manifest_version:
+        raise ValueError(f"Manifest is at version {manifest_copy.get('version')}, not {manifest_version}")
+    
+    gameweeks = sorted([int(gw) for gw in manifest_copy.get('gameweeks', {}).keys()])
+    historical_gws = gameweeks[:-1]  # All except latest
+    if not historical_gws:
+        return {}
+    
+    log(f"[historical] Assembling GWs {historical_gws[0]}-{historical_gws[-1]}...")
+    
+    # Unchanged GWs come straight from gw_aggregates_cache; misses fetch concurrently on the shared pool
+    results = list(fpl_client.executor.map(lambda gw: fetch_and_parse_gw(gw, manifest_copy), historical_gws))
+    
+    # Build response - now only contains aggregated manager data
+    gw_data = {str(gw): managers for gw, managers in results if managers}
+    
+    log(f"[historical] Loaded {len(gw_data)} gameweeks ({sum(len(r) for r in gw_data.values())} total rows)")
+    return gw_data
+
 # Cache for historical data (never changes, so cache for 24 hours)
-historical_cache = {"data": None, "version": None, "timestamp": 0}
-historical_cache_lock = threading.Lock()
+# Keyed by manifest version, so a new upload misses here and is re-assembled from gw_aggregates_cache
 HISTORICAL_CACHE_DURATION = 86400  # 24 hours - historical data never changes
+historical_cache = caches.namespace('historical', ttl=HISTORICAL_CACHE_DURATION, max_entries=2,
+                                    loader=load_historical, refresh_ahead=600)
 
 @app.route('/api/historical')
 def get_historical_data():
@@ -781,187 +1012,127 @@ def get_historical_data():
             return {'gameweeks': {}, 'latest': gameweeks[0] if gameweeks else None}, 200
         
         latest_gw = gameweeks[-1]
-        historical_gws = gameweeks[:-1]  # All except latest
-        
-        current_time = time.time()
         manifest_version = manifest_copy.get('version')
         
-        # Check cache - only valid if manifest version matches
-        with historical_cache_lock:
-            if (historical_cache["data"] and 
-                historical_cache["version"] == manifest_version and
-                (current_time - historical_cache["timestamp"]) < HISTORICAL_CACHE_DURATION):
-                log(f"[historical] Served from cache ({len(historical_cache['data'])} gameweeks)")
-                return {
-                    'gameweeks': historical_cache["data"],
-                    'latest': latest_gw,
-                    'cached': True
-                }, 200
-        
-        log(f"[historical] Fetching GWs {historical_gws[0]}-{historical_gws[-1]} concurrently...")
-        
-        def fetch_and_parse_gw(gw):
-            try:
-                gw_entry = manifest_copy.get('gameweeks', {}).get(str(gw))
-                if not gw_entry:
-                    return gw, []
-                
-                if isinstance(gw_entry, str):
-                    pointer_res = requests.get(f"{gw_entry}?_t={int(time.time())}", timeout=10)
-                    pointer_res.raise_for_status()
-                    gw_info = pointer_res.json()
-                else:
-                    gw_info = gw_entry
-                
-                csv_url = gw_info.get('url')
-                if not csv_url:
-                    return gw, []
-                
-                response = requests.get(csv_url, timeout=10)
-                response.raise_for_status()
-                csv_text = response.content.decode('utf-8')
-                
-                if csv_text.strip() == "The game is being updated.":
-                    return gw, []
-                
-                # Parse CSV and AGGREGATE to manager totals only
-                import csv
-                from io import StringIO
-                reader = csv.DictReader(StringIO(csv_text))
-                
-                managers = {}
-                captain_choices = {}
-                
-                for row in reader:
-                    manager_name = row.get('manager_name', '').strip()
-                    if not manager_name:
-                        continue
-                    
-                    # Initialize manager if not exists
-                    if manager_name not in managers:
-                        managers[manager_name] = {
-                            'manager_name': manager_name,
-                            'team_name': row.get('entry_team_name', ''),
-                            'total_points': 0,
-                            'bench_points': 0,
-                            'captain_player': '',
-                        }
-                    
-                    player = row.get('player', '')
-                    
-                    if player == 'TOTAL':
-                        # This is the totals row - extract key stats (merge, don't overwrite)
-                        managers[manager_name]['total_points'] = int(float(row.get('points_applied', 0) or 0))
-                        managers[manager_name]['bench_points'] = int(float(row.get('bench_points', 0) or 0))
-                        managers[manager_name]['team_name'] = row.get('entry_team_name', '') or managers[manager_name]['team_name']
-                    else:
-                        # Track captain for chicken rank
-                        is_captain = row.get('is_captain') in ['True', 'true', '1', True]
-                        if is_captain:
-                            managers[manager_name]['captain_player'] = player
-                            captain_choices[player] = captain_choices.get(player, 0) + 1
-                
-                # Find most popular captain
-                most_popular = max(captain_choices.items(), key=lambda x: x[1])[0] if captain_choices else ''
-                
-                # Mark who picked popular captain
-                for m in managers.values():
-                    m['picked_popular_captain'] = m.get('captain_player', '') == most_popular
-                
-                return gw, list(managers.values())
-            except Exception as e:
-                log(f"[historical] Error fetching GW{gw}: {e}")
-                return gw, []
-        
-        # Fetch all historical GWs concurrently
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            results = list(executor.map(fetch_and_parse_gw, historical_gws))
-        
-        # Build response - now only contains aggregated manager data
-        gw_data = {str(gw): managers for gw, managers in results if managers}
-        
-        # Cache the result
-        with historical_cache_lock:
-            historical_cache["data"] = gw_data
-            historical_cache["version"] = manifest_version
-            historical_cache["timestamp"] = current_time
-        
-        log(f"[historical] Served {len(gw_data)} gameweeks ({sum(len(r) for r in gw_data.values())} total rows)")
+        # Cache is only valid for the current manifest version
+        was_cached = manifest_version in historical_cache
+        gw_data = historical_cache.fetch(manifest_version)
+        if was_cached:
+            log(f"[historical] Served from cache ({len(gw_data)} gameweeks)")
         
         return {
             'gameweeks': gw_data,
             'latest': latest_gw,
-            'cached': False
+            'cached': was_cached
         }, 200
         
     except Exception as e:
         log(f"[historical] Error: {e}")
         return {'error': 'Failed to fetch historical data'}, 500
+
+# ====== STANDINGS CUBE ======
+def refresh_standings():
+    """Bring the standings cube up to date with the manifest (recomputes only from the first changed GW)"""
+    with manifest_lock:
+        manifest_copy = current_manifest.copy()
     
-@app.route('/api/chips')
-def get_chips():
-    """Fetch chip usage for all managers (concurrent + 1-hour cache)"""
+    def segment_for(gw):
+        try:
+            return gw, ensure_segment(gw, resolve_gw_info(manifest_copy['gameweeks'][str(gw)]))
+        except Exception as e:
+            log(f"[standings] Error loading GW{gw}: {e}")
+            return gw, None
+    
+    gameweeks = sorted(int(gw) for gw in manifest_copy.get('gameweeks', {}))
+    segments = dict(fpl_client.executor.map(segment_for, gameweeks))
+    failed = [gw for gw, seg in segments.items() if seg is None]
+    if failed:
+        # A gameweek that could not be loaded is not a removed one: keep the previous cube
+        log(f"[standings] Keeping cube {cube.version}: GW{', GW'.join(map(str, failed))} unavailable")
+        return False
+    return cube.refresh(segments, generation=manifest_copy.get('timestamp'))
+
+# Held for the one lazy build a request may trigger before warm-up or a scrape has built the cube
+standings_build_lock = threading.Lock()
+standings_build_attempted = False
+
+def ensure_standings():
+    """Build the cube once if nothing has yet; later updates come from the scrape and upload paths"""
+    global standings_build_attempted
+    if cube.version is not None:
+        return
+    with standings_build_lock:
+        if cube.version is not None or standings_build_attempted:
+            return
+        standings_build_attempted = True
+        refresh_standings()
+
+@app.route('/api/standings')
+def get_standings():
+    """
+    Cumulative standings, rank movement, bench and hit totals for every manager
+    and gameweek in one payload (metrics[name][manager][gameweek index]).
+    ETag is the cube version; a matching If-None-Match gets a 304. Served as
+    built after the last scrape: requests never reload gameweek segments.
+    """
     try:
-        current_time = time.time()
-        
-        # Check cache first
-        with chips_cache_lock:
-            if chips_cache["data"] and (current_time - chips_cache["timestamp"]) < CHIPS_CACHE_DURATION:
-                log(f"[chips] Served from cache ({len(chips_cache['data'])} managers)")
-                return {'chips': chips_cache["data"]}, 200
-        
-        # Cache miss - fetch fresh data concurrently
-        log("[chips] Cache miss, fetching from FPL API concurrently...")
-        entry_ids = [
-            394273, 373574, 650881, 6197529, 1094601, 6256408, 62221, 701623,
-            3405299, 5438502, 5423005, 4807443, 581156, 4912819, 876871, 4070923,
-            5898648, 872442, 468791, 8592148
-        ]
-        
-        def fetch_manager_chips(entry_id):
-            try:
-                entry_res = requests.get(f'https://fantasy.premierleague.com/api/entry/{entry_id}/', timeout=10)
-                entry_res.raise_for_status()
-                entry_data = entry_res.json()
-                
-                manager_name = f"{entry_data['player_first_name']} {entry_data['player_last_name']}"
-                
-                history_res = requests.get(f'https://fantasy.premierleague.com/api/entry/{entry_id}/history/', timeout=10)
-                history_res.raise_for_status()
-                history_data = history_res.json()
-                
-                return {
-                    'manager_name': manager_name,
-                    'entry_id': entry_id,
-                    'chips': history_data.get('chips', [])
-                }
-            except Exception as e:
-                log(f"[chips] Error fetching data for entry {entry_id}: {e}")
-                return None
-        
-        # Fetch all managers concurrently (max 10 parallel requests)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            results = list(executor.map(fetch_manager_chips, entry_ids))
-        
-        chips_data = [r for r in results if r is not None]
+        ensure_standings()
+        payload = cube.payload()
+        headers = {
+            'Cache-Control': 'no-cache, must-revalidate',
+            'ETag': f'"{payload["version"]}"',
+            'X-Data-Version': payload['version'] or ''
+        }
+        if payload['version'] and request.if_none_match.contains(payload['version']):
+            return '', 304, headers
+        return payload, 200, headers
+    except Exception as e:
+        log(f"[standings] Error: {e}")
+        return {'error': 'Failed to build standings'}, 500
+
+def fetch_manager_chips(entry_id):
+    try:
+        # Both come from the shared entry store (one fetch per entry per gameweek boundary)
+        entry_data = entries.get_entry(entry_id)
         
-        # Update cache
-        with chips_cache_lock:
-            chips_cache["data"] = chips_data
-            chips_cache["timestamp"] = current_time
+        manager_name = f"{entry_data['player_first_name']} {entry_data['player_last_name']}"
         
-        log(f"[chips] Served fresh data for {len(chips_data)} managers (concurrent fetch), cached for 1 hour")
-        return {'chips': chips_data}, 200
+        history_data = entries.get_history(entry_id)
         
+        return {
+            'manager_name': manager_name,
+            'entry_id': entry_id,
+            'chips': history_data.get('chips', [])
+        }
+    except Exception as e:
+        log(f"[chips] Error fetching data for entry {entry_id}: {e}")
+        return None
+
+def load_chips(_key):
+    """Chip usage for every league manager, fetched concurrently (cache loader)"""
+    # Fetch all managers concurrently on the shared worker pool
+    results = list(fpl_client.executor.map(fetch_manager_chips, LEAGUE_ENTRY_IDS))
+    
+    chips_data = [r for r in results if r is not None]
+    log(f"[chips] Loaded fresh data for {len(chips_data)} managers (concurrent fetch)")
+    return chips_data
+
+chips_cache = caches.namespace('chips', ttl=CHIPS_CACHE_DURATION, max_entries=1,
+                               loader=load_chips, stale_ttl=6 * 3600, refresh_ahead=120)
+
+@app.route('/api/chips')
+def get_chips():
+    """Fetch chip usage for all managers (concurrent + 1-hour cache)"""
+    try:
+        return {'chips': chips_cache.fetch('all')}, 200
     except Exception as e:
         log(f"[chips] Error: {e}")
         return {'error': 'Failed to fetch chip data'}, 500
 
 # ====== PROJECTIONS ENDPOINT ======
 # Per-gameweek projections cache
-projections_cache = {}  # {gw: {"data": ..., "timestamp": ...}}
-projections_cache_lock = threading.Lock()
 PROJECTIONS_CACHE_DURATION = 3600  # 1 hour
+projections_cache = caches.namespace('projections', ttl=PROJECTIONS_CACHE_DURATION, max_entries=10)
 
 def build_projections_lookup(data):
     """Create lookup by player name (case-insensitive) with common variations"""
@@ -986,8 +1157,6 @@ def get_projections():
         gw (optional): Gameweek number. If not provided, uses the current gameweek from manifest.
     """
     try:
-        current_time = time.time()
-        
         # Determine which gameweek to fetch
         requested_gw = request.args.get('gw', type=int)
         
@@ -999,18 +1168,16 @@ def get_projections():
         cache_key = str(requested_gw)
         
         # Check per-gameweek cache
-        with projections_cache_lock:
-            if cache_key in projections_cache:
-                cached = projections_cache[cache_key]
-                if cached["data"] and (current_time - cached["timestamp"]) < PROJECTIONS_CACHE_DURATION:
-                    log(f"[projections] Serving GW{requested_gw} from cache")
-                    return cached["data"], 200
+        cached = projections_cache.get(cache_key)
+        if cached is not None:
+            log(f"[projections] Serving GW{requested_gw} from cache")
+            return cached, 200
         
         # Fetch from blob storage
         blob_url = f"{PUBLIC_BASE}projections_gw{requested_gw}.json?_t={int(time.time())}"
         log(f"[projections] Fetching GW{requested_gw} from {blob_url}")
         
-        response = requests.get(blob_url, timeout=10)
+        response = fpl_client.get(blob_url, timeout=10)
         if response.ok:
             data = response.json()
             lookup = build_projections_lookup(data)
@@ -1023,11 +1190,7 @@ def get_projections():
             }
             
             # Cache it per gameweek
-            with projections_cache_lock:
-                projections_cache[cache_key] = {
-                    "data": result,
-                    "timestamp": current_time
-                }
+            projections_cache.set(cache_key, result)
             
             log(f"[projections] Served {len(result['players'])} player projections for GW{requested_gw}")
             return result, 200
@@ -1038,7 +1201,7 @@ def get_projections():
                 fallback_gw = requested_gw - 1
                 log(f"[projections] Trying fallback to GW{fallback_gw}")
                 fallback_url = f"{PUBLIC_BASE}projections_gw{fallback_gw}.json?_t={int(time.time())}"
-                fallback_response = requests.get(fallback_url, timeout=10)
+                fallback_response = fpl_client.get(fallback_url, timeout=10)
                 if fallback_response.ok:
                     data = fallback_response.json()
                     lookup = build_projections_lookup(data)
@@ -1084,9 +1247,7 @@ def upload_projections(gw=None):
         if success:
             # Clear cache for this gameweek so next request gets fresh data
             cache_key = str(target_gw)
-            with projections_cache_lock:
-                if cache_key in projections_cache:
-                    del projections_cache[cache_key]
+            projections_cache.pop(cache_key)
             
             log(f"[projections] Uploaded {len(data['players'])} players for GW{target_gw}")
             return {'success': True, 'gameweek': target_gw, 'players_count': len(data['players'])}, 200
@@ -1122,6 +1283,7 @@ def upload_csv(gw):
         if success:
             # Update manifest
             h = get_file_hash(csv_data)
+            mirror.put(csv_data, h)
             timestamp = int(time.time())
             
             with manifest_lock:
@@ -1140,11 +1302,13 @@ def upload_csv(gw):
                 # Upload updated manifest to blob storage (using correct filename)
                 manifest_bytes = json.dumps(current_manifest).encode('utf-8')
                 smart_upload_bytes('fpl-league-manifest.json', manifest_bytes, content_type='application/json')
+            # After the manifest points at this version, as on the scrape path
+            deltas.record(gw, csv_data, h)
+            season.ingest(gw, csv_data, h)
             
             # Clear historical cache
-            with historical_cache_lock:
-                historical_cache["data"] = None
-                historical_cache["timestamp"] = 0
+            historical_cache.clear()
+            refresh_standings()
             
             log(f"[admin] Uploaded CSV for GW{gw} ({len(csv_data)} bytes)")
             return {'success': True, 'gw': gw, 'blob': blob_name, 'hash': h}, 200
@@ -1171,7 +1335,7 @@ def smart_upload_bytes(blob_name: str, data: bytes, content_type: str = "text/pl
             request_headers.update(headers)
 
         url = f"{UPLOAD_ENDPOINT}?name={blob_name}"
-        r = requests.post(url, headers=request_headers, data=data, timeout=60)
+        r = fpl_client.post(url, headers=request_headers, data=data, timeout=60)
         r.raise_for_status()
         file_hashes[blob_name] = new_hash
         log(f"Uploaded {blob_name} ({len(data)} bytes)")
@@ -1183,70 +1347,37 @@ def smart_upload_bytes(blob_name: str, data: bytes, content_type: str = "text/pl
 def smart_upload_csv(blob_name: str, data: bytes) -> bool:
     return smart_upload_bytes(blob_name, data, content_type="text/csv")
 
-def run_scraper(cmd: list[str], expect_file: Path, timeout_sec: int = 90) -> bytes:
-    try:
-        if expect_file.exists():
-            expect_file.unlink()
-    except Exception:
-        pass
-
-    log(f"Running: {' '.join(cmd)}")
-    proc = subprocess.run(cmd, cwd="/app", capture_output=True, text=True, timeout=timeout_sec)
-
-    if proc.returncode != 0:
-        raise RuntimeError(f"Scraper failed ({cmd[0]}): {proc.stderr or proc.stdout}")
-
-    if not expect_file.exists():
-        raise FileNotFoundError(f"Expected output not found: {expect_file}")
-
-    data = expect_file.read_bytes()
-    if not data:
-        raise RuntimeError(f"Output file is empty: {expect_file}")
-
-    return data
-
-def get_output_file_path(file_type: str, gw: int) -> Path:
-    return Path(f"/app/fpl_{file_type}_gw{gw}.csv")
-
 def scrape_rosters_bytes(gw: int) -> bytes:
-    output_file = get_output_file_path("rosters_points", gw)
-    return run_scraper([
-        "python3", "fpl_scrape_rosters.py",
-        "--gw", str(gw),
-        "--entries",
-        "394273", "373574", "650881", "6197529", "1094601", "6256408", "62221", "701623",
-        "3405299", "5438502", "5423005", "4807443", "581156", "4912819", "876871", "4070923",
-        "5898648", "872442", "468791", "8592148"
-    ], output_file)
+    """
+    Scrape league rosters in-process over the pooled FPL session. The scraper's
+    element/team lookups are built once per bootstrap snapshot, not per cycle.
+    """
+    snap = get_snapshot()
+    dicts = snap.derived("roster_dicts", lambda: fpl_scrape_rosters.build_dicts(snap.data))
+    start = time.perf_counter()
+    data = fpl_scrape_rosters.scrape_rosters_csv(gw, LEAGUE_ENTRY_IDS, dicts=dicts,
+                                                 workers=SCRAPE_WORKERS, rate=SCRAPE_RATE)
+    log(f"Scraped GW{gw} rosters in-process ({len(data)} bytes, {time.perf_counter() - start:.2f}s)")
+    return data
 
 def detect_current_gameweek() -> int:
     """
-    Use the official FPL API to determine the current gameweek.
-    This is more reliable than testing each GW individually.
-    Returns the current/live gameweek number, or None if API fails.
+    Current gameweek from cached event deadlines: the last event whose deadline
+    has passed. The bootstrap snapshot is only re-downloaded for this when it is
+    older than EVENTS_MAX_AGE. Returns None if it cannot be determined.
     """
-    log("Detecting current gameweek from FPL API...")
     try:
-        r = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/", timeout=30)
-        r.raise_for_status()
-        data = r.json()
-        
-        current_gw = None
-        for event in data.get('events', []):
-            if event.get('is_current'):
-                current_gw = event['id']
-                break
+        snapshot = get_snapshot(max_age=EVENTS_MAX_AGE)
         
+        current_gw = scrape_schedule.current_gameweek(snapshot.events, time.time())
         if current_gw:
-            log(f"Current gameweek from FPL API: GW{current_gw}")
             return current_gw
         
-        # Fallback: find the latest finished or in-progress gameweek
-        for event in reversed(data.get('events', [])):
-            if event.get('finished') or event.get('data_checked'):
-                current_gw = event['id']
-                log(f"Fallback: using latest finished GW{current_gw}")
-                return current_gw
+        # Fallback: no deadline data, use FPL's own flags
+        current_gw = snapshot.current_event_id or snapshot.latest_finished_event_id()
+        if current_gw:
+            log(f"Fallback: using GW{current_gw} from event flags")
+            return current_gw
         
         log("Warning: Could not determine current gameweek from API")
         return None
@@ -1255,27 +1386,26 @@ def detect_current_gameweek() -> int:
         log(f"Error detecting current gameweek: {e}")
         return None
 
-def is_game_day() -> bool:
-    now_utc = datetime.now(timezone.utc)
-    is_dst = 3 <= now_utc.month <= 10 and now_utc.replace(month=3, day=31).weekday() <= now_utc.weekday()
-    uk_offset = 1 if is_dst else 0
-    uk_time = now_utc.replace(tzinfo=None) + timedelta(hours=uk_offset)
-    weekday = uk_time.weekday()
-    hour = uk_time.hour
-    minute = uk_time.minute
-    
-    is_weekend = weekday in [5, 6] and 12 <= hour <= 22
-    is_midweek = weekday in [1, 2, 3] and 18 <= hour <= 22
-    
-    # Friday 8pm-10:30pm UK time (3pm-5:30pm EST)
-    is_friday_early = weekday == 4 and (hour == 20 or hour == 21 or (hour == 22 and minute <= 30))
-    
-    return is_weekend or is_midweek or is_friday_early
+last_scrape_plan = None
 
-def get_dynamic_interval() -> int:
+def get_scrape_plan() -> ScrapePlan:
+    """
+    When to scrape next, from the fixture list: every GAMEDAY_INTERVAL while a
+    fixture is live or its bonus is pending, otherwise at the next kickoff or
+    deadline (at most IDLE_INTERVAL away)
+    """
+    global last_scrape_plan
     if STATIC_INTERVAL > 0:
-        return STATIC_INTERVAL
-    return GAMEDAY_INTERVAL if is_game_day() else NON_GAMEDAY_INTERVAL
+        plan = ScrapePlan('static', STATIC_INTERVAL, 'INTERVAL_SECONDS is set')
+    else:
+        try:
+            snapshot = get_snapshot(max_age=EVENTS_MAX_AGE)
+            fixtures = fixtures_cache.fetch('all')['fixtures']
+            plan = scrape_schedule.plan(snapshot.events, fixtures, time.time(), GAMEDAY_INTERVAL, IDLE_INTERVAL)
+        except Exception as e:
+            plan = ScrapePlan('unknown', NON_GAMEDAY_INTERVAL, f'schedule unavailable: {e}')
+    last_scrape_plan = plan
+    return plan
 
 # ====== ENHANCED UPLOAD WITH PUSH ======
 def validate_csv_data(csv_data: bytes, gw: int) -> tuple[bool, str]:
@@ -1330,6 +1460,7 @@ def scrape_and_upload_gameweek(gw: int) -> bool:
 
         if uploaded:
             log(f"New version uploaded for GW{gw}, updating manifest...")
+            mirror.put(rosters_data, h)
             
             # Use in-memory manifest as source of truth - DON'T load from blob storage
             # This preserves manual updates and prevents overwriting good data
@@ -1370,20 +1501,35 @@ def scrape_and_upload_gameweek(gw: int) -> bool:
             
             # ALWAYS update in-memory manifest (this is the source of truth now)
             update_manifest_in_memory(manifest_data)
+            # Only now that clients can load this version: patches and the season segment follow it
+            patch = deltas.record(gw, rosters_data, h)
+            season.ingest(gw, rosters_data, h)
+            try:
+                refresh_standings()
+            except Exception as e:
+                log(f"[standings] Refresh after GW{gw} upload failed: {e}")
             
             if manifest_uploaded:
                 log(f"SUCCESS: Updated manifest for GW{gw} (blob backup + in-memory)")
                 
-                # Push notification to all connected clients
-                publish_update('gameweek_updated', {
+                # Push notification to all connected clients: just the changed rows when
+                # the patch is small, otherwise tell them to refetch the CSV
+                update = {
                     'gameweek': gw,
                     'manifest_version': manifest_data['version'],
                     'updated_at': manifest_data['updated']
-                })
+                }
+                patch_size = len(json.dumps(patch)) if patch else None
+                if patch_size is not None and patch_size < len(rosters_data) // 4:
+                    update['patch'] = patch
+                    publish_update('gameweek_patch', update)
+                    log(f"[push] GW{gw} patch: {len(patch['upserts'])} rows changed ({patch_size} bytes vs {len(rosters_data)} CSV)")
+                else:
+                    publish_update('gameweek_updated', update)
                 
                 return True
         else:
-            log(f"GW{gw} content unchanged, no updates needed")
+            log(f"GW{gw} content unchanged or upload failed, no updates made")
 
         return True
 
@@ -1396,7 +1542,14 @@ def scrape_and_upload_gameweek(gw: int) -> bool:
 
 # ====== BACKGROUND WORKERS ======
 def redis_health_check():
-    """Background thread to monitor Redis connection"""
+    """Background thread: connect to Redis, then monitor the connection"""
+    started = time.time()
+    connect_redis()
+    record_phase('redis', started)
+    if not REDIS_ENABLED:
+        return
+    log("Redis health monitor started")
+    
     while scraper_running:
         try:
             if REDIS_ENABLED:
@@ -1416,6 +1569,9 @@ def scraper_worker():
     global scraper_running
     log("Scraper worker started")
     
+    # Never build a manifest on top of the empty placeholder
+    manifest_ready.wait()
+    
     while scraper_running:
         cycle_start_time = datetime.utcnow()
         try:
@@ -1443,12 +1599,12 @@ def scraper_worker():
         except Exception as e:
             log(f"GENERAL ERROR: {e}")
 
-        interval = get_dynamic_interval()
+        plan = get_scrape_plan() if ACTIVE == "1" else ScrapePlan('inactive', NON_GAMEDAY_INTERVAL, 'ACTIVE=0')
         cycle_duration = (datetime.utcnow() - cycle_start_time).total_seconds()
         
-        sleep_time = max(0, interval - cycle_duration)
+        sleep_time = max(0, plan.interval - cycle_duration)
         if sleep_time > 0:
-            log(f"Sleeping for {sleep_time:.1f}s")
+            log(f"Sleeping for {sleep_time:.1f}s ({plan.mode}: {plan.reason})")
             slept = 0
             while scraper_running and slept < sleep_time:
                 time.sleep(1)
@@ -1461,71 +1617,158 @@ def stop_gracefully(signum, frame):
     global scraper_running
     log("Received shutdown signal, stopping gracefully...")
     scraper_running = False
+    caches.stop_refresher()
+    sse_hub.stop()
+    snapshot_warm_state("shutdown")
+
+# ====== WARM RESTART ======
+def snapshot_warm_state(reason: str = "periodic"):
+    """Persist manifest, upload hashes and cache entries so the next boot starts warm"""
+    if 'warm_state' not in startup['phases']:
+        return  # still restoring; writing now would drop the entries we are about to load
+    started = time.time()
+    try:
+        with manifest_lock:
+            manifest_copy = current_manifest.copy()
+        warm_state.put('manifest', manifest_copy)
+        warm_state.put('file_hashes', dict(file_hashes))
+        counts = warm_state.snapshot_caches(caches)
+        warm_state.record_snapshot(started)
+        log(f"[warm-state] {reason} snapshot: {counts['written']} cache entries written, "
+            f"{counts['removed']} removed ({time.time() - started:.2f}s)")
+    except Exception as e:
+        log(f"[warm-state] {reason} snapshot failed: {e}")
+
+def restore_warm_state():
+    """Reload the last snapshot; a manifest newer than the one from blob wins"""
+    started = time.time()
+    saved_hashes = warm_state.get('file_hashes', {})
+    for name, digest in saved_hashes.items():
+        file_hashes.setdefault(name, digest)
+    
+    saved_manifest = warm_state.get('manifest')
+    if saved_manifest and saved_manifest.get('gameweeks'):
+        with manifest_lock:
+            current_ts = current_manifest.get('timestamp') or 0
+        if (saved_manifest.get('timestamp') or 0) > current_ts:
+            update_manifest_in_memory(saved_manifest)
+    
+    restored = warm_state.restore_caches(caches)
+    log(f"[warm-state] Restored {len(saved_hashes)} upload hashes and {restored} cache entries "
+        f"in {time.time() - started:.2f}s")
 
-signal.signal(signal.SIGINT, stop_gracefully)
-signal.signal(signal.SIGTERM, stop_gracefully)
+def warm_state_worker():
+    """Snapshot warm-restart state every SNAPSHOT_INTERVAL seconds"""
+    while scraper_running:
+        slept = 0
+        while scraper_running and slept < SNAPSHOT_INTERVAL:
+            time.sleep(1)
+            slept += 1
+        if scraper_running:
+            snapshot_warm_state()
 
 # ====== CACHE WARMER ======
 def warm_caches():
-    """Pre-warm all caches to avoid cold start delays"""
+    """Prime the shared caches once at boot; refresh-ahead keeps hot entries fresh afterwards"""
     log("[cache-warmer] Starting cache warm-up...")
     
+    with manifest_lock:
+        manifest_version = current_manifest.get('version')
+    
+    for name, ns, key in [
+        ('Historical', historical_cache, manifest_version),
+        ('Fixtures', fixtures_cache, 'all'),
+        ('Chips', chips_cache, 'all'),
+        ('Gameweek status', gw_status_cache, 'status'),
+    ]:
+        start = time.time()
+        try:
+            ns.fetch(key)
+            log(f"[cache-warmer] {name} cache warmed in {time.time() - start:.1f}s")
+        except Exception as e:
+            log(f"[cache-warmer] Error warming {name.lower()} cache: {e}")
+    
+    start = time.time()
     try:
-        # Warm historical cache by calling the endpoint internally
-        with app.test_client() as client:
-            start = time.time()
-            resp = client.get('/api/historical')
-            log(f"[cache-warmer] Historical cache warmed in {time.time() - start:.1f}s")
-            
-            start = time.time()
-            resp = client.get('/api/fixtures')
-            log(f"[cache-warmer] Fixtures cache warmed in {time.time() - start:.1f}s")
-            
-            start = time.time()
-            resp = client.get('/api/chips')
-            log(f"[cache-warmer] Chips cache warmed in {time.time() - start:.1f}s")
+        refresh_standings()
+        log(f"[cache-warmer] Standings cube built in {time.time() - start:.1f}s")
     except Exception as e:
-        log(f"[cache-warmer] Error warming caches: {e}")
+        log(f"[cache-warmer] Error building standings cube: {e}")
     
     log("[cache-warmer] Cache warm-up complete!")
 
-def cache_warmer_worker():
-    """Background thread that keeps caches warm"""
-    # Wait for server to fully start
-    time.sleep(10)
+def startup_worker():
+    """Boot-time work that must not delay the port bind: restore, manifest, then cache warm-up"""
+    # Upload hashes, a newer manifest and cache entries from before the restart
+    started = time.time()
+    restore_warm_state()
+    record_phase('warm_state', started)
     
-    while scraper_running:
-        try:
-            warm_caches()
-        except Exception as e:
-            log(f"[cache-warmer] Error: {e}")
-        
-        # Refresh every 30 minutes (well before 1-hour cache expiry)
-        time.sleep(1800)
+    started = time.time()
+    load_manifest_from_blob()
+    manifest_ready.set()
+    record_phase('manifest', started)
+    
+    # Map season-store segments left on disk by the previous run before anything needs them
+    started = time.time()
+    log(f"[startup] Season store: mapped {season.open()} gameweek segments, "
+        f"ingested {season.ingest_directory(mirror.bundled_dir)} from bundled data/")
+    record_phase('season', started)
+    
+    started = time.time()
+    warm_caches()
+    record_phase('cache_warmup', started)
+    
+    # Entries read since their last refresh are renewed shortly before their TTL runs out;
+    # anything that expires anyway is served stale while a single background refresh runs
+    caches.start_refresher()
+    log("[startup] Refresh-ahead scheduler started")
+    
+    startup['ready'] = True
+    record_phase('ready', startup['began'])
+    log(f"[startup] Ready {startup['phases']['ready']:.1f}s after import: {startup['phases']}")
 
 # ====== STARTUP ======
-if __name__ == '__main__':
-    log("=" * 60)
-    log("Starting FPL Dashboard Backend v2.4")
-    log("Features: SSE Push + Background Scraper + In-Memory Manifest + CDN Bypass + Cache Warmer")
-    log(f"Redis: {'ENABLED (Upstash)' if REDIS_ENABLED else 'DISABLED'}")
-    log("=" * 60)
+_background_started = False
+
+def start_background_workers():
+    """Start the startup worker, Redis connection, scraper and snapshots (once per process)"""
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+    
+    # Restore, manifest load and cache warm-up; /health reports 'starting' until it finishes
+    startup_thread = threading.Thread(target=startup_worker, daemon=True)
+    startup_thread.start()
+    log("Startup worker started (warm-state restore, manifest, cache warm-up)")
     
-    # Start Redis health check thread
-    if REDIS_ENABLED:
-        health_thread = threading.Thread(target=redis_health_check, daemon=True)
-        health_thread.start()
-        log("Redis health monitor started")
+    # Connect to Redis (then monitor it) without holding up anything else
+    health_thread = threading.Thread(target=redis_health_check, daemon=True)
+    health_thread.start()
     
-    # Start scraper in background thread
+    # Start scraper in background thread (it waits for the manifest)
     scraper_thread = threading.Thread(target=scraper_worker, daemon=True)
     scraper_thread.start()
     log("Background scraper started")
     
-    # Start cache warmer in background thread
-    cache_warmer_thread = threading.Thread(target=cache_warmer_worker, daemon=True)
-    cache_warmer_thread.start()
-    log("Cache warmer started (will warm caches in 10s)")
+    warm_state_thread = threading.Thread(target=warm_state_worker, daemon=True)
+    warm_state_thread.start()
+    log(f"Warm-state snapshots every {SNAPSHOT_INTERVAL}s ({warm_state.path})")
+
+# Development server. In production the Dockerfile runs gunicorn with the
+# gevent worker (gunicorn.conf.py), which calls start_background_workers()
+# from its post_worker_init hook.
+if __name__ == '__main__':
+    log("=" * 60)
+    log("Starting FPL Dashboard Backend v2.4")
+    log("Features: SSE Push + Background Scraper + In-Memory Manifest + CDN Bypass + Cache Warmer")
+    log("Redis: connecting in background")
+    log("=" * 60)
+    
+    signal.signal(signal.SIGINT, stop_gracefully)
+    signal.signal(signal.SIGTERM, stop_gracefully)
+    start_background_workers()
     
     # Start Flask SSE server
     port = int(os.getenv('PORT', 5000))
@@ -1535,4 +1778,4 @@ if __name__ == '__main__':
     log(f"Data proxy: http://0.0.0.0:{port}/api/data/<gameweek>")
     log(f"Health check: http://0.0.0.0:{port}/health")
     
-    app.run(host='0.0.0.0', port=port, threaded=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, threaded=True)
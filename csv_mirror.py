@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Local content-addressed mirror of the gameweek roster CSVs.
+
+The manifest already records each gameweek's content hash (md5 of the CSV),
+so a file is immutable once we have it under that hash. The mirror keeps
+recent files in memory (a bounded fpl_cache namespace) and every file on
+disk, so /api/data/<gw> is served locally instead of re-downloading from
+Vercel Blob on every request. The scraper fills it directly after an upload;
+anything missing is fetched from Blob once and verified against the hash.
+If Blob is unreachable, the CSVs bundled in data/ are the last resort.
+
+Usage:
+  from csv_mirror import mirror
+  mirror.put(csv_bytes)                         # returns the hash
+  data, digest, source = mirror.resolve(gw, gw_info)
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import fpl_client
+from fpl_cache import caches
+from singleflight import SingleFlight
+
+MIRROR_DIR = os.getenv("CSV_MIRROR_DIR", "/tmp/fpl-csv-mirror")
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def _log(msg: str):
+    print(f"[mirror] {msg}", flush=True)
+
+
+def content_hash(data: bytes) -> str:
+    # Same digest app.get_file_hash() writes into the manifest
+    return hashlib.md5(data).hexdigest()
+
+
+class CsvMirror:
+    def __init__(self, directory: str = MIRROR_DIR, bundled_dir: str = BUNDLED_DIR):
+        self.directory = directory
+        self.bundled_dir = bundled_dir
+        # Content-addressed, so entries never go stale; the TTL only bounds memory residency.
+        # Not snapshotted for warm restarts: every file is already on disk.
+        self._memory = caches.namespace("csv_mirror", ttl=7 * 86400, max_entries=48, persist=False)
+        self._flight = SingleFlight()
+        self.blob_fetches = 0
+        self.bundled_fallbacks = 0
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.csv")
+
+    def put(self, data: bytes, digest: Optional[str] = None) -> str:
+        digest = digest or content_hash(data)
+        self._memory.set(digest, data, size=len(data))
+        path = self._path(digest)
+        if not os.path.exists(path):
+            tmp = None
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                # Unique per writer: concurrent puts of the same digest must not share a temp file
+                fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=self.directory)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except OSError as e:
+                _log(f"Could not write {path}: {e}")
+                if tmp is not None:
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        data = self._memory.get(digest)
+        if data is not None:
+            return data
+        try:
+            with open(self._path(digest), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._memory.set(digest, data, size=len(data))
+        return data
+
+    def bundled(self, gw: int) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.bundled_dir, f"fpl_rosters_points_gw{gw}.csv"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _fetch_blob(self, url: str) -> bytes:
+        # Blob's CDN may hold an older object under the same name; bust it
+        r = fpl_client.get(f"{url}?_t={int(time.time())}", timeout=10)
+        r.raise_for_status()
+        self.blob_fetches += 1
+        return r.content
+
+    def resolve(self, gw: int, gw_info: Dict[str, Any]) -> Tuple[Optional[bytes], Optional[str], str]:
+        """
+        (data, hash, source) for a manifest entry; source is 'mirror', 'blob' or
+        'bundled'. (None, None, 'missing') if nothing could be found.
+        """
+        digest = gw_info.get("hash")
+        if digest:
+            data = self.get(digest)
+            if data is not None:
+                return data, digest, "mirror"
+
+        url = gw_info.get("url")
+        if url:
+            try:
+                # Concurrent misses for the same file share one download
+                data = self._flight.do((gw, digest), lambda: self._fetch_blob(url))
+                actual = content_hash(data)
+                if digest and actual != digest:
+                    _log(f"GW{gw} blob content {actual[:8]} does not match manifest hash {digest[:8]}")
+                return data, self.put(data, actual), "blob"
+            except Exception as e:
+                _log(f"GW{gw} blob fetch failed: {e}")
+
+        data = self.bundled(gw)
+        if data is not None:
+            self.bundled_fallbacks += 1
+            _log(f"GW{gw} served from bundled data/ copy")
+            return data, content_hash(data), "bundled"
+        return None, None, "missing"
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            files = len([n for n in os.listdir(self.directory) if n.endswith(".csv")])
+        except OSError:
+            files = 0
+        return {
+            "directory": self.directory,
+            "files": files,
+            "memory": self._memory.stats(),
+            "blob_fetches": self.blob_fetches,
+            "bundled_fallbacks": self.bundled_fallbacks,
+        }
+
+
+# Process-wide mirror shared by the data endpoint and the scraper loop
+mirror = CsvMirror()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Shared per-entry metadata and history store.
+
+entry/{id}/ and entry/{id}/history/ were fetched by three independent streams:
+the chips endpoint (hourly, every league manager), manager-history (5-minute
+TTL) and the roster scraper / squad view (entry metadata). Those payloads only
+change at gameweek boundaries: team name, bank and squad value at a deadline,
+the gameweek's points and ranks once it is finished and data-checked. So all
+consumers read one copy per entry from here, refetched only when that epoch
+changes:
+
+  epoch = (last gameweek whose deadline has passed, whether it is final)
+
+The epoch is worked out from the bootstrap events fpl_client hands every
+listener, against the clock, so a passing deadline invalidates entries even
+before the next bootstrap download. MAX_AGE bounds how long an entry is kept
+if no bootstrap has been seen at all. Entries live in an fpl_cache namespace,
+so they count against the shared memory budget and survive warm restarts.
+
+Usage:
+  from entry_store import entries
+  entry = entries.get_entry(394273)        # entry/{id}/
+  history = entries.get_history(394273)    # entry/{id}/history/
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+import fpl_client
+from fpl_cache import caches
+from scrape_schedule import current_gameweek
+from singleflight import SingleFlight
+
+MAX_AGE = int(os.getenv("ENTRY_STORE_MAX_AGE_SECONDS", str(12 * 3600)))
+
+
+def _log(msg: str):
+    print(f"[entry-store] {msg}", flush=True)
+
+
+class EntryStore:
+    def __init__(self, max_age: float = MAX_AGE):
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        # (kind, entry_id) -> (epoch, payload)
+        self._cache = caches.namespace("entry_store", ttl=max_age, max_entries=500)
+        self._flight = SingleFlight()
+        self.fetches = 0
+        self.hits = 0
+        self.last_epoch: Optional[Tuple[int, bool]] = None
+
+    def note_events(self, events: List[Dict[str, Any]]):
+        with self._lock:
+            self._events = events
+
+    def epoch(self, now: Optional[float] = None) -> Optional[Tuple[int, bool]]:
+        """(current gameweek by deadline, finished and data_checked) or None before any bootstrap."""
+        with self._lock:
+            events = self._events
+        gw = current_gameweek(events, time.time() if now is None else now)
+        if gw is None:
+            return None
+        event = next((e for e in events if e["id"] == gw), {})
+        return gw, bool(event.get("finished") and event.get("data_checked"))
+
+    def _get(self, kind: str, entry_id: int, fetch) -> Dict[str, Any]:
+        epoch = self.epoch()
+        with self._lock:
+            previous, self.last_epoch = self.last_epoch, epoch
+        if previous is not None and previous != epoch:
+            _log(f"Gameweek boundary {previous} -> {epoch}: entries refetch on next read")
+        key = (kind, entry_id)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == epoch:
+            with self._lock:
+                self.hits += 1
+            return cached[1]
+
+        def load():
+            payload = fetch()
+            self._cache.set(key, (epoch, payload))
+            with self._lock:
+                self.fetches += 1
+            return payload
+
+        return self._flight.do((key, epoch), load)
+
+    def get_entry(self, entry_id: int, session: Optional[requests.Session] = None,
+                  timeout: float = fpl_client.DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """entry/{id}/: names, bank and value at the last deadline."""
+        return self._get("entry", entry_id, lambda: fpl_client.get_entry(entry_id, session=session, timeout=timeout))
+
+    def get_history(self, entry_id: int, session: Optional[requests.Session] = None,
+                    timeout: float = fpl_client.DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """entry/{id}/history/: per-gameweek points, ranks, transfers and chips."""
+        return self._get("history", entry_id, lambda: fpl_client.get_history(entry_id, session=session, timeout=timeout))
+
+    def stats(self) -> Dict[str, Any]:
+        epoch = self.epoch()
+        with self._lock:
+            return {
+                "epoch": epoch,
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "fetches": self.fetches,
+            }
+
+
+# Process-wide store shared by chips, manager-history, squads and the roster scraper
+entries = EntryStore()
+fpl_client.on_bootstrap(entries.note_events)
@@ -347,6 +347,10 @@ const playerData = {
   penalties_saved: toNum(raw.penalties_saved),
   penalties_missed: toNum(raw.penalties_missed),
   minutes: toNum(raw.minutes),
+  bps: toNum(raw.bps),
+  provisional_bonus: toNum(raw.provisional_bonus),
+  effective_multiplier: toNum(raw.effective_multiplier),
+  auto_sub: normalizeStr(raw.auto_sub),
 };
         managerStats[manager].players.push(playerData);
         // Add player cost to team value
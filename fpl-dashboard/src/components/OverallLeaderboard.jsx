@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useMemo, useCallback } from 'react';
+import React, { useState, useEffect, useMemo, useCallback, useRef } from 'react';
 import { 
   BarChart3, 
   Wallet, 
@@ -36,6 +36,8 @@ const OverallLeaderboard = () => {
   const [historyLoading, setHistoryLoading] = useState(false);
   const [activeTab, setActiveTab] = useState('overview'); // 'overview' or 'team'
   const [countdown, setCountdown] = useState('');
+  // Whole-league squads prefetched in one request; reused on click while fresh
+  const prefetchedSquads = useRef({ fetchedAt: 0, byEntry: {} });
 
   // Entry ID mapping (verified against FPL API)
   const entryIdMap = {
@@ -243,6 +245,21 @@ const OverallLeaderboard = () => {
     });
   }, [combinedData, availableGameweeks, gameweekData]);
 
+  // Prefetch every manager's squad with one batch request (shared upstream fetches on the server)
+  useEffect(() => {
+    let cancelled = false;
+    fetch('https://bpl-red-sun-894.fly.dev/api/squads')
+      .then(res => (res.ok ? res.json() : null))
+      .then(data => {
+        if (cancelled || !data?.squads) return;
+        const byEntry = {};
+        data.squads.forEach(squad => { byEntry[squad.entry_id] = squad; });
+        prefetchedSquads.current = { fetchedAt: Date.now(), byEntry };
+      })
+      .catch(() => {});
+    return () => { cancelled = true; };
+  }, []);
+
   // Fetch squad and history when manager selected
   const handleManagerClick = useCallback(async (manager) => {
     if (!manager.entryId) {
@@ -257,17 +274,27 @@ const OverallLeaderboard = () => {
     setSquadData(null);
     setManagerHistory(null);
     
-    // Fetch both squad and history in parallel
+    // Use the prefetched squad if it is under 2 minutes old (the server's squad cache TTL)
+    const prefetched = prefetchedSquads.current;
+    const cachedSquad = Date.now() - prefetched.fetchedAt < 120000 ? prefetched.byEntry[manager.entryId] : null;
+    if (cachedSquad) {
+      setSquadData(cachedSquad);
+      setSquadLoading(false);
+    }
+    
+    // Fetch history (and the squad, if not prefetched) in parallel
     const [squadRes, historyRes] = await Promise.all([
-      fetch(`https://bpl-red-sun-894.fly.dev/api/squad/${manager.entryId}`).catch(() => null),
+      cachedSquad ? null : fetch(`https://bpl-red-sun-894.fly.dev/api/squad/${manager.entryId}`).catch(() => null),
       fetch(`https://bpl-red-sun-894.fly.dev/api/manager-history/${manager.entryId}`).catch(() => null),
     ]);
     
-    if (squadRes?.ok) {
-      const data = await squadRes.json();
-      setSquadData(data);
+    if (!cachedSquad) {
+      if (squadRes?.ok) {
+        const data = await squadRes.json();
+        setSquadData(data);
+      }
+      setSquadLoading(false);
     }
-    setSquadLoading(false);
     
     if (historyRes?.ok) {
       const data = await historyRes.json();
@@ -15,6 +15,8 @@ const toNum = (v) => {
   return isNaN(n) ? 0 : n;
 };
 const truthy = (v) => v === true || v === 'True' || v === 'true' || v === 1 || v === '1';
+// Same key the backend uses for row patches: "<entry_id>:<element_id>" or "<entry_id>:TOTAL"
+const rowKey = (r) => `${toNum(r.entry_id)}:${normalizeStr(r.player) === 'TOTAL' ? 'TOTAL' : toNum(r.element_id)}`;
 
 export const DataProvider = ({ children }) => {
   // Core data state
@@ -36,17 +38,11 @@ export const DataProvider = ({ children }) => {
   const eventSourceRef = useRef(null);
   const fallbackIntervalRef = useRef(null);
   const abortRef = useRef(null);
+  // Raw rows + version of the latest GW CSV, so SSE patches can be applied in place
+  const latestRowsRef = useRef(null); // { gameweek, version, rows: Map<key, row> }
 
-  // Parse CSV to managers (same logic as existing components)
-  const parseCsvToManagers = useCallback((csvText, gameweek) => {
-    if (!csvText || csvText.trim() === "The game is being updated.") {
-      return { managers: [], captainChoices: {} };
-    }
-
-    const parsed = Papa.parse(csvText, { header: true, dynamicTyping: true, skipEmptyLines: true });
-    if (parsed.errors?.length) console.warn(`Parsing errors in GW${gameweek}:`, parsed.errors);
-    
-    const rows = parsed.data;
+  // Parse CSV rows (Papa output or patched rows) to managers (same logic as existing components)
+  const rowsToManagers = useCallback((rows, gameweek) => {
     const managerStats = {};
     const captainChoices = {};
 
@@ -93,6 +89,12 @@ export const DataProvider = ({ children }) => {
           fixture_finished: truthy(raw.fixture_finished),
           status: normalizeStr(raw.status),
           player_cost: playerCost,
+          bps: toNum(raw.bps),
+          // Unconfirmed bonus from live BPS, already included in points_gw
+          provisional_bonus: toNum(raw.provisional_bonus),
+          // Multiplier after live auto-subs / vice-captain promotion ("in" / "out" when subbed)
+          effective_multiplier: toNum(raw.effective_multiplier),
+          auto_sub: normalizeStr(raw.auto_sub),
         };
         managerStats[manager].players.push(playerData);
         managerStats[manager].team_value += playerCost;
@@ -163,6 +165,22 @@ export const DataProvider = ({ children }) => {
     return { managers: managersArray, captainChoices };
   }, []);
 
+  const parseCsvToManagers = useCallback((csvText, gameweek, version = null) => {
+    if (!csvText || csvText.trim() === "The game is being updated.") {
+      return { managers: [], captainChoices: {} };
+    }
+
+    const parsed = Papa.parse(csvText, { header: true, dynamicTyping: true, skipEmptyLines: true });
+    if (parsed.errors?.length) console.warn(`Parsing errors in GW${gameweek}:`, parsed.errors);
+
+    latestRowsRef.current = {
+      gameweek,
+      version,
+      rows: new Map(parsed.data.map(r => [rowKey(r), r])),
+    };
+    return rowsToManagers(parsed.data, gameweek);
+  }, [rowsToManagers]);
+
   // Fetch all initial data
   const fetchAllData = useCallback(async (isBackgroundRefresh = false) => {
     if (abortRef.current) abortRef.current.abort();
@@ -198,13 +216,14 @@ export const DataProvider = ({ children }) => {
 
       // Step 2: Fetch latest GW data (always fresh)
       console.log(`🔴 [DataContext] Fetching live GW${latestGw}...`);
+      // no-cache (not no-store): the browser revalidates with If-None-Match and gets a 304 if unchanged
       const latestRes = await fetch(`${API_BASE}/api/data/${latestGw}`, { 
-        cache: 'no-store', 
+        cache: 'no-cache', 
         signal: abort.signal 
       });
       if (!latestRes.ok) throw new Error(`Failed to load GW${latestGw}`);
       const latestCsv = await latestRes.text();
-      const latestParsed = parseCsvToManagers(latestCsv, latestGw);
+      const latestParsed = parseCsvToManagers(latestCsv, latestGw, latestRes.headers.get('X-Data-Version'));
 
       // Step 3: Fetch historical, fixtures, and chips in parallel
       const [historicalRes, fixturesRes, chipsRes] = await Promise.all([
@@ -275,13 +294,13 @@ export const DataProvider = ({ children }) => {
       console.log(`🔄 [DataContext] Refreshing GW${latestGameweek}...`);
       
       const [latestRes, statusRes] = await Promise.all([
-        fetch(`${API_BASE}/api/data/${latestGameweek}`, { cache: 'no-store' }),
+        fetch(`${API_BASE}/api/data/${latestGameweek}`, { cache: 'no-cache' }),
         fetch(`${API_BASE}/api/gameweek-status`, { cache: 'no-store' }),
       ]);
 
       if (latestRes.ok) {
         const latestCsv = await latestRes.text();
-        const latestParsed = parseCsvToManagers(latestCsv, latestGameweek);
+        const latestParsed = parseCsvToManagers(latestCsv, latestGameweek, latestRes.headers.get('X-Data-Version'));
         
         setGameweekData(prev => ({
           ...prev,
@@ -306,6 +325,55 @@ export const DataProvider = ({ children }) => {
     }
   }, [latestGameweek, parseCsvToManagers]);
 
+  // Apply row patches ({ from, to, upserts, removed }) to the cached latest-GW rows.
+  // Returns false if they don't chain from our version, so the caller can fall back.
+  const applyPatches = useCallback((gameweek, patches) => {
+    const state = latestRowsRef.current;
+    if (!state || state.gameweek !== gameweek || !state.version) return false;
+
+    const rows = new Map(state.rows);
+    let version = state.version;
+    for (const patch of patches) {
+      if (patch.from !== version) return false;
+      for (const { key, ...changes } of patch.upserts) {
+        rows.set(key, { ...(rows.get(key) || {}), ...changes });
+      }
+      for (const key of patch.removed) rows.delete(key);
+      version = patch.to;
+    }
+
+    latestRowsRef.current = { gameweek, version, rows };
+    const parsed = rowsToManagers([...rows.values()], gameweek);
+    setGameweekData(prev => ({ ...prev, [gameweek]: parsed.managers }));
+    setCaptainStats(prev => ({ ...prev, [gameweek]: parsed.captainChoices }));
+    setLastUpdate(new Date());
+    return true;
+  }, [rowsToManagers]);
+
+  // Handle a pushed patch: apply it directly, catch up via ?since= if we missed
+  // some, and only refetch the whole CSV if neither works
+  const handlePatch = useCallback(async (update) => {
+    const gameweek = update.gameweek;
+    if (applyPatches(gameweek, [update.patch])) {
+      console.log(`[DataContext] SSE: Applied GW${gameweek} patch (${update.patch.upserts.length} rows)`);
+      return;
+    }
+
+    const version = latestRowsRef.current?.version;
+    if (version && latestRowsRef.current.gameweek === gameweek) {
+      try {
+        const res = await fetch(`${API_BASE}/api/data/${gameweek}?since=${encodeURIComponent(version)}`, { cache: 'no-store' });
+        if (res.ok) {
+          const { patches } = await res.json();
+          if (applyPatches(gameweek, patches)) return;
+        }
+      } catch (e) {
+        // fall through to a full refresh
+      }
+    }
+    refreshLatestGameweek();
+  }, [applyPatches, refreshLatestGameweek]);
+
   // Set up SSE for live updates
   const setupSSE = useCallback(() => {
     if (eventSourceRef.current) {
@@ -325,7 +393,9 @@ export const DataProvider = ({ children }) => {
       eventSource.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
-          if (data.type === 'gameweek_updated') {
+          if (data.type === 'gameweek_patch') {
+            handlePatch(data.data);
+          } else if (data.type === 'gameweek_updated') {
             console.log('[DataContext] SSE: Gameweek updated, refreshing...');
             refreshLatestGameweek();
           }
@@ -349,7 +419,7 @@ export const DataProvider = ({ children }) => {
       console.error('[DataContext] SSE setup failed:', err);
       setConnectionStatus('disconnected');
     }
-  }, [refreshLatestGameweek]);
+  }, [refreshLatestGameweek, handlePatch]);
 
   // Initial data fetch
   useEffect(() => {
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Process-wide bootstrap-static snapshot.
+
+bootstrap-static is a multi-megabyte payload that every endpoint and the
+scraper loop needs. Instead of each caller downloading and re-scanning it,
+one snapshot is shared by the whole process and its lookup indexes are built
+once per refresh.
+
+Usage:
+  from fpl_bootstrap import get_snapshot
+  snap = get_snapshot()
+  player = snap.elements.get(element_id)
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+import fpl_client
+
+BOOTSTRAP_TTL = int(os.getenv("BOOTSTRAP_TTL_SECONDS", "120"))
+
+# Fallback labels if element_types is missing from the payload
+DEFAULT_POSITIONS = {1: "GKP", 2: "DEF", 3: "MID", 4: "FWD"}
+
+
+class BootstrapSnapshot:
+    """One bootstrap-static download plus the indexes built from it (treat as read-only)."""
+
+    def __init__(self, data: Dict[str, Any], fetched_at: float):
+        self.data = data
+        self.fetched_at = fetched_at
+
+        self.elements: Dict[int, Dict[str, Any]] = {e["id"]: e for e in data.get("elements", [])}
+        self.teams: Dict[int, Dict[str, Any]] = {t["id"]: t for t in data.get("teams", [])}
+        self.events: List[Dict[str, Any]] = data.get("events", [])
+
+        self.positions: Dict[int, str] = {
+            t["id"]: t.get("singular_name_short") for t in data.get("element_types", [])
+        } or dict(DEFAULT_POSITIONS)
+
+        # League table position: sort by points, then FPL's own position field
+        sorted_teams = sorted(self.teams.values(), key=lambda t: (-t.get("points", 0), t.get("position", 99)))
+        self.team_positions: Dict[int, int] = {t["id"]: idx + 1 for idx, t in enumerate(sorted_teams)}
+
+        self.current_event: Optional[Dict[str, Any]] = None
+        self.next_event: Optional[Dict[str, Any]] = None
+        for event in self.events:
+            if event.get("is_current"):
+                self.current_event = event
+            if event.get("is_next"):
+                self.next_event = event
+
+        # Name -> team short name, used to join CSV player names to clubs
+        self.player_team_map: Dict[str, str] = {}
+        for p in self.elements.values():
+            team = self.teams.get(p.get("team"))
+            if not team:
+                continue
+            short = team["short_name"]
+            self.player_team_map[p["web_name"]] = short
+            self.player_team_map[f"{p['first_name']} {p['second_name']}"] = short
+            self.player_team_map[p["second_name"]] = short
+
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.Lock()
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def current_event_id(self) -> Optional[int]:
+        return self.current_event["id"] if self.current_event else None
+
+    @property
+    def next_event_id(self) -> Optional[int]:
+        return self.next_event["id"] if self.next_event else None
+
+    def position_of(self, element: Dict[str, Any]) -> str:
+        return self.positions.get(element.get("element_type"), "UNK")
+
+    def team_short_name(self, team_id: Optional[int], default: str = "???") -> str:
+        return self.teams.get(team_id, {}).get("short_name", default)
+
+    def derived(self, name: str, build: Callable[[], Any]) -> Any:
+        """Memoize a structure derived from this snapshot (rebuilt only when the snapshot is refreshed)."""
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = build()
+            return self._derived[name]
+
+    def latest_finished_event_id(self) -> Optional[int]:
+        """Latest finished or data-checked event (used when no event is flagged current)."""
+        for event in reversed(self.events):
+            if event.get("finished") or event.get("data_checked"):
+                return event["id"]
+        return None
+
+
+class BootstrapStore:
+    """
+    Holds the current snapshot and refreshes it when it gets older than the TTL.
+    Only one refresh runs at a time; concurrent callers wait for it and share the result.
+    """
+
+    def __init__(self, ttl: int = BOOTSTRAP_TTL):
+        self.ttl = ttl
+        self._snapshot: Optional[BootstrapSnapshot] = None
+        self._refresh_lock = threading.Lock()
+
+    def _fetch(self) -> BootstrapSnapshot:
+        return BootstrapSnapshot(fpl_client.get_bootstrap_static(), time.time())
+
+    def get(self, max_age: Optional[float] = None) -> BootstrapSnapshot:
+        max_age = self.ttl if max_age is None else max_age
+        snap = self._snapshot
+        if snap and snap.age < max_age:
+            return snap
+
+        with self._refresh_lock:
+            # Another caller may have refreshed while we waited for the lock
+            snap = self._snapshot
+            if snap and snap.age < max_age:
+                return snap
+            try:
+                self._snapshot = self._fetch()
+            except Exception:
+                if snap is None:
+                    raise
+                # Upstream hiccup: a slightly stale snapshot beats an error
+                print(f"[bootstrap] Refresh failed, serving snapshot aged {snap.age:.0f}s", flush=True)
+                return snap
+            return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+
+_store = BootstrapStore()
+
+
+def get_snapshot(max_age: Optional[float] = None) -> BootstrapSnapshot:
+    """Return the shared snapshot, refreshing it first if it is older than max_age (default: TTL)."""
+    return _store.get(max_age)
+
+
+def invalidate():
+    _store.invalidate()
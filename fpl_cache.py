@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bounded in-process cache: named namespaces with per-namespace TTL and
+max-entry limits, approximate byte accounting and one global memory budget
+enforced by least-recently-used eviction across all namespaces.
+
+The Fly VM has 512 MB, so nothing cached here may grow without bound: a
+crawler walking /api/player/1..800 or random entry ids just cycles entries
+through the LRU instead of growing the process until it is OOM-killed.
+
+Namespaces created with a loader also support stale-while-revalidate: once an
+entry passes its TTL it is still served for up to stale_ttl seconds while a
+single background refresh runs. A refresh-ahead thread renews entries that
+were read since their last refresh shortly before they expire, so hot data
+is never fetched on a user's request.
+
+Usage:
+  from fpl_cache import caches
+  squad_cache = caches.namespace("squad", ttl=120, max_entries=200)
+  data = squad_cache.get(entry_id)
+  if data is None:
+      data = load(entry_id)
+      squad_cache.set(entry_id, data)
+
+  fixtures_cache = caches.namespace("fixtures", ttl=300, loader=load_fixtures,
+                                    stale_ttl=3600, refresh_ahead=30)
+  data = fixtures_cache.fetch("all")   # fresh, stale+refresh, or loaded once
+  caches.start_refresher()
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import concurrent.futures
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from singleflight import SingleFlight
+
+MEMORY_BUDGET = int(os.getenv("CACHE_MEMORY_BUDGET_MB", "96")) * 1024 * 1024
+REFRESH_INTERVAL = 5  # seconds between refresh-ahead scans
+
+# Background refreshes get their own small pool: loaders may fan out on
+# fpl_client.executor, and waiting on that pool from inside it could deadlock.
+_refresh_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+def _log(msg: str):
+    print(f"[cache] {msg}", flush=True)
+
+
+def approx_size(value: Any) -> int:
+    """Rough byte cost of a cached value (compact JSON length; good enough for budgeting)."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    try:
+        return len(json.dumps(value, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "stored_at", "expires_at", "last_used", "hits")
+
+    def __init__(self, value: Any, size: int, stored_at: float, expires_at: float, last_used: int):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.last_used = last_used
+        self.hits = 0  # reads since this value was stored; > 0 marks the entry hot
+
+
+class CacheNamespace:
+    """One named cache. All state is guarded by the owning registry's lock."""
+
+    def __init__(self, registry: "CacheRegistry", name: str, ttl: float, max_entries: int,
+                 loader: Optional[Callable[[Hashable], Any]] = None,
+                 stale_ttl: float = 0, refresh_ahead: float = 0, persist: bool = True,
+                 ttl_for: Optional[Callable[[Any], Optional[float]]] = None):
+        self.registry = registry
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.loader = loader
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.persist = persist  # included in warm-restart snapshots (see warm_state.py)
+        self.ttl_for = ttl_for  # per-value TTL override (e.g. shorter for a degraded result); None = ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._refreshing: set = set()
+        self.bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    # ---- internal helpers (caller holds registry lock) ----
+    def _remove(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+            self.registry._bytes -= entry.size
+        return entry
+
+    def _touch(self, key: Hashable, entry: _Entry):
+        entry.last_used = self.registry._tick()
+        entry.hits += 1
+        self._entries.move_to_end(key)
+
+    def _lookup(self, key: Hashable, now: float):
+        """Return (entry, is_fresh); drops entries past their stale window. Counts hits/misses."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+        if now < entry.expires_at:
+            self.hits += 1
+            self._touch(key, entry)
+            return entry, True
+        if now < entry.expires_at + self.stale_ttl:
+            self._touch(key, entry)
+            return entry, False
+        self._remove(key)
+        self.expirations += 1
+        self.misses += 1
+        return None, False
+
+    # ---- public API ----
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Fresh value only (stale entries are kept for fetch() but not returned here)."""
+        with self.registry._lock:
+            entry, fresh = self._lookup(key, time.time())
+            if entry is None:
+                return default
+            if not fresh:
+                self.misses += 1
+                return default
+            return entry.value
+
+    def fetch(self, key: Hashable) -> Any:
+        """
+        Value for key via the namespace loader: fresh from cache; stale from cache
+        while one background refresh runs; or loaded now (concurrent misses share
+        one load). Loader exceptions propagate only when there is nothing to serve.
+        """
+        with self.registry._lock:
+            entry, fresh = self._lookup(key, time.time())
+            if entry is not None:
+                if not fresh:
+                    self.stale_hits += 1
+                    self.refresh_async(key)
+                return entry.value
+        return self._flight.do(key, lambda: self._load(key))
+
+    def _load(self, key: Hashable) -> Any:
+        value = self.loader(key)
+        self.set(key, value)
+        return value
+
+    def refresh_async(self, key: Hashable):
+        """Schedule one background reload of key (no-op if one is already running)."""
+        if self.loader is None:
+            return
+        with self.registry._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        _refresh_executor.submit(self._refresh, key)
+
+    def _refresh(self, key: Hashable):
+        try:
+            self._flight.do(key, lambda: self._load(key))
+            with self.registry._lock:
+                self.refreshes += 1
+        except Exception as e:
+            _log(f"Background refresh of {self.name}[{key}] failed: {e}")
+            with self.registry._lock:
+                self.refresh_errors += 1
+                # Cool the entry down so refresh-ahead does not retry it every scan
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.hits = 0
+        finally:
+            with self.registry._lock:
+                self._refreshing.discard(key)
+
+    def _due_for_refresh(self, now: float) -> List[Hashable]:
+        if self.loader is None or self.refresh_ahead <= 0:
+            return []
+        return [key for key, e in self._entries.items()
+                if e.hits and e.expires_at - now <= self.refresh_ahead
+                and now < e.expires_at + self.stale_ttl]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: Optional[int] = None):
+        size = approx_size(value) if size is None else size
+        if ttl is None and self.ttl_for is not None:
+            ttl = self.ttl_for(value)
+        now = time.time()
+        with self.registry._lock:
+            self._remove(key)
+            entry = _Entry(value, size, now, now + (self.ttl if ttl is None else ttl), self.registry._tick())
+            self._entries[key] = entry
+            self.bytes += size
+            self.registry._bytes += size
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self.registry._enforce_budget()
+
+    def pop(self, key: Hashable) -> Any:
+        with self.registry._lock:
+            entry = self._remove(key)
+            return entry.value if entry else None
+
+    def clear(self) -> int:
+        with self.registry._lock:
+            count = len(self._entries)
+            self.registry._bytes -= self.bytes
+            self._entries.clear()
+            self.bytes = 0
+            return count
+
+    def export(self) -> List[tuple]:
+        """(key, value, size, stored_at, expires_at) for every entry still servable (fresh or stale)."""
+        now = time.time()
+        with self.registry._lock:
+            return [(key, e.value, e.size, e.stored_at, e.expires_at)
+                    for key, e in self._entries.items() if now < e.expires_at + self.stale_ttl]
+
+    def restore(self, key: Hashable, value: Any, size: int, stored_at: float, expires_at: float) -> bool:
+        """
+        Re-insert an exported entry with its original timestamps, so it expires
+        when it would have. Skipped if past its stale window or if the key was
+        stored more recently in this process. Returns True if inserted.
+        """
+        with self.registry._lock:
+            if time.time() >= expires_at + self.stale_ttl:
+                return False
+            current = self._entries.get(key)
+            if current is not None and current.stored_at >= stored_at:
+                return False
+            self._remove(key)
+            entry = _Entry(value, size, stored_at, expires_at, self.registry._tick())
+            self._entries[key] = entry
+            self.bytes += size
+            self.registry._bytes += size
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self.registry._enforce_budget()
+            return True
+
+    def keys(self) -> List[Hashable]:
+        with self.registry._lock:
+            return list(self._entries.keys())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """True if a fresh value is cached (does not count as a hit or miss)."""
+        with self.registry._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() < entry.expires_at
+
+    def stats(self) -> Dict[str, Any]:
+        with self.registry._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "refresh_ahead": self.refresh_ahead,
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+            }
+
+
+class CacheRegistry:
+    def __init__(self, memory_budget: int = MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._lock = threading.RLock()
+        self._namespaces: Dict[str, CacheNamespace] = {}
+        self._bytes = 0
+        self._clock = 0
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _enforce_budget(self):
+        """Evict globally least-recently-used entries until we are back under budget."""
+        while self._bytes > self.memory_budget:
+            victim = None
+            for ns in self._namespaces.values():
+                if not ns._entries:
+                    continue
+                key = next(iter(ns._entries))
+                entry = ns._entries[key]
+                if victim is None or entry.last_used < victim[2].last_used:
+                    victim = (ns, key, entry)
+            if victim is None:
+                break
+            ns, key, _ = victim
+            ns._remove(key)
+            ns.evictions += 1
+
+    def namespace(self, name: str, ttl: float, max_entries: int = 1000,
+                  loader: Optional[Callable[[Hashable], Any]] = None,
+                  stale_ttl: float = 0, refresh_ahead: float = 0, persist: bool = True,
+                  ttl_for: Optional[Callable[[Any], Optional[float]]] = None) -> CacheNamespace:
+        with self._lock:
+            ns = self._namespaces.get(name)
+            if ns is None:
+                ns = CacheNamespace(self, name, ttl, max_entries, loader, stale_ttl, refresh_ahead, persist,
+                                    ttl_for)
+                self._namespaces[name] = ns
+            return ns
+
+    # ---- refresh-ahead ----
+    def refresh_ahead_once(self) -> int:
+        """Schedule background refreshes for hot entries about to expire. Returns how many."""
+        now = time.time()
+        with self._lock:
+            due = [(ns, key) for ns in self._namespaces.values() for key in ns._due_for_refresh(now)]
+        for ns, key in due:
+            ns.refresh_async(key)
+        return len(due)
+
+    def _refresh_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh_ahead_once()
+            except Exception as e:
+                _log(f"Refresh-ahead scan failed: {e}")
+
+    def start_refresher(self, interval: float = REFRESH_INTERVAL):
+        if self._refresher and self._refresher.is_alive():
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, args=(interval,), daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self):
+        self._stop.set()
+
+    def get(self, name: str) -> Optional[CacheNamespace]:
+        return self._namespaces.get(name)
+
+    def names(self) -> List[str]:
+        return sorted(self._namespaces)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_budget": self.memory_budget,
+                "bytes": self._bytes,
+                "namespaces": {name: ns.stats() for name, ns in sorted(self._namespaces.items())},
+            }
+
+
+# Process-wide registry shared by every endpoint
+caches = CacheRegistry()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Shared FPL API client: one keep-alive connection pool, one worker pool and
+typed fetch helpers, used by app.py and the scraper scripts.
+
+Every call goes through the same pooled requests.Session (unless a caller
+passes its own, e.g. with a login cookie), so a league-wide fan-out reuses
+warm TCP+TLS connections instead of handshaking per request. Each call's
+latency is recorded per endpoint for the /api/admin/upstream-stats view.
+
+live, picks and per-gameweek fixtures for a gameweek that is finished and
+data_checked never change, so those fetches go through gw_archive: fetched
+once, kept gzip-compressed on disk, and read from there ever after. Every
+bootstrap-static fetched here tells the archive which gameweeks are final.
+Slow-changing resources (bootstrap-static, fixtures, entry history, the Blob
+manifest and projections) are revalidated through http_cache (ETag /
+Last-Modified), so an unchanged one costs a 304 instead of a full download
+and parse.
+
+Usage:
+  import fpl_client
+  entry = fpl_client.get_entry(394273)
+  results = list(fpl_client.executor.map(fpl_client.get_history, entry_ids))
+"""
+
+import os
+import re
+import threading
+import time
+import concurrent.futures
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from gw_archive import archive
+from http_cache import http_cache
+
+API_BASE = "https://fantasy.premierleague.com/api/"
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; FPLRosterBot/1.3)"
+DEFAULT_TIMEOUT = 10
+
+# Sized for our fan-out: 20 managers x a few calls each, plus endpoint traffic
+POOL_SIZE = int(os.getenv("FPL_POOL_SIZE", "32"))
+WORKERS = int(os.getenv("FPL_WORKERS", "16"))
+
+
+def make_session(cookie: Optional[str] = None, user_agent: str = DEFAULT_USER_AGENT) -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({
+        "User-Agent": user_agent,
+        "Accept": "application/json,text/plain,*/*",
+        "Referer": "https://fantasy.premierleague.com/"
+    })
+    if cookie:
+        s.headers.update({"Cookie": cookie})
+    return s
+
+
+_session = make_session()
+
+# Shared worker pool for concurrent upstream fan-out (never create one per request)
+executor = concurrent.futures.ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="fpl-client")
+
+
+def get_session() -> requests.Session:
+    return _session
+
+
+class RateLimiter:
+    """Thread-safe pacing: at most `rate` calls per second across all threads sharing it."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ====== BOOTSTRAP LISTENERS ======
+# Called with the events list of every bootstrap-static fetched here, so modules
+# that key data by gameweek (e.g. entry_store) learn about deadlines and
+# finished gameweeks without fetching bootstrap themselves.
+_bootstrap_listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+
+def on_bootstrap(listener: Callable[[List[Dict[str, Any]]], None]):
+    _bootstrap_listeners.append(listener)
+
+
+# ====== LATENCY ACCOUNTING ======
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def _endpoint_label(url: str) -> str:
+    """Collapse ids out of a URL so calls group by endpoint, e.g. 'entry/{id}/history/'."""
+    path = url.split("?")[0]
+    if path.startswith(API_BASE):
+        path = path[len(API_BASE):]
+    else:
+        path = path.rsplit("/", 1)[-1] or path
+    return re.sub(r"\d+", "{id}", path)
+
+
+def _record(url: str, elapsed: float, ok: bool):
+    label = _endpoint_label(url)
+    ms = elapsed * 1000
+    with _stats_lock:
+        s = _stats.setdefault(label, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        s["count"] += 1
+        s["total_ms"] += ms
+        if ms > s["max_ms"]:
+            s["max_ms"] = ms
+        if not ok:
+            s["errors"] += 1
+
+
+def latency_stats() -> Dict[str, Dict[str, float]]:
+    """Per-endpoint call counts, errors and average/max latency in ms."""
+    with _stats_lock:
+        return {
+            label: {
+                "count": s["count"],
+                "errors": s["errors"],
+                "avg_ms": round(s["total_ms"] / s["count"], 1) if s["count"] else 0.0,
+                "max_ms": round(s["max_ms"], 1),
+            }
+            for label, s in sorted(_stats.items())
+        }
+
+
+# ====== FAN-OUT UNDER A DEADLINE ======
+def fan_out(calls: Dict[str, Callable[[], Any]], deadline: float) -> Tuple[Dict[str, Any], Dict[str, BaseException]]:
+    """
+    Run independent calls concurrently on the shared executor and wait until
+    time.monotonic() reaches deadline. Returns (results, errors) by name; a
+    call still running at the deadline is reported as a TimeoutError (its
+    thread finishes in the background, bounded by its own request timeout).
+    Do not call from inside an executor task: waiting on the pool from the
+    pool can starve it.
+    """
+    return gather(start(calls), deadline)
+
+
+def start(calls: Dict[str, Callable[[], Any]]) -> Dict[str, concurrent.futures.Future]:
+    """Submit calls to the shared executor without waiting (collect them with gather)."""
+    return {name: executor.submit(fn) for name, fn in calls.items()}
+
+
+def gather(futures: Dict[str, concurrent.futures.Future],
+           deadline: float) -> Tuple[Dict[str, Any], Dict[str, BaseException]]:
+    """Wait for started calls until deadline; (results, errors) as for fan_out."""
+    concurrent.futures.wait(futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+    results: Dict[str, Any] = {}
+    errors: Dict[str, BaseException] = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            errors[name] = TimeoutError(f"{name} missed the deadline")
+        elif future.exception() is not None:
+            errors[name] = future.exception()
+        else:
+            results[name] = future.result()
+    return results, errors
+
+
+def remaining(deadline: float, floor: float = 0.5) -> float:
+    """Seconds left before deadline, as a request timeout (never below floor)."""
+    return max(floor, deadline - time.monotonic())
+
+
+# ====== RAW REQUESTS ======
+def get(url: str, timeout: float = DEFAULT_TIMEOUT, session: Optional[requests.Session] = None,
+        cache: bool = True, **kwargs) -> requests.Response:
+    """
+    GET through the pooled session with latency accounting. Does not raise on HTTP errors.
+    Plain GETs (no extra kwargs, no login cookie) of a resource on http_cache's
+    allow-list are revalidated through it.
+    """
+    s = session or _session
+    entry = None
+    cacheable = cache and not kwargs and "Cookie" not in s.headers and http_cache.cacheable(url)
+    if cacheable:
+        entry = http_cache.lookup(url)
+        kwargs["headers"] = http_cache.conditional_headers(entry)
+    start = time.perf_counter()
+    ok = False
+    try:
+        r = s.get(url, timeout=timeout, **kwargs)
+        if cacheable:
+            r = http_cache.handle(url, entry, r)
+        ok = r.ok
+        return r
+    finally:
+        _record(url, time.perf_counter() - start, ok)
+
+
+def post(url: str, timeout: float = 60, session: Optional[requests.Session] = None,
+         **kwargs) -> requests.Response:
+    start = time.perf_counter()
+    ok = False
+    try:
+        r = (session or _session).post(url, timeout=timeout, **kwargs)
+        ok = r.ok
+        return r
+    finally:
+        _record(url, time.perf_counter() - start, ok)
+
+
+def get_json(url: str, timeout: float = DEFAULT_TIMEOUT, session: Optional[requests.Session] = None) -> Any:
+    """GET and decode JSON, raising requests.HTTPError on a non-2xx response."""
+    r = get(url, timeout=timeout, session=session)
+    r.raise_for_status()
+    return http_cache.json(r)
+
+
+def get_archived_json(kind: str, gw: int, url: str, timeout: float = DEFAULT_TIMEOUT,
+                      session: Optional[requests.Session] = None, entry_id: Optional[int] = None) -> Any:
+    """get_json for a per-gameweek payload, served from the finished-gameweek archive when possible."""
+    def fetch_body():
+        # A final gameweek's body is about to be archived; no need to keep it in http_cache too
+        r = get(url, timeout=timeout, session=session, cache=not archive.is_final(gw))
+        r.raise_for_status()
+        return r.content, http_cache.json(r)
+
+    return archive.fetch(kind, gw, fetch_body, entry_id)
+
+
+# ====== TYPED FPL FETCHES ======
+def get_bootstrap_static(session: Optional[requests.Session] = None,
+                         timeout: float = 20) -> Dict[str, Any]:
+    data = get_json(f"{API_BASE}bootstrap-static/", timeout, session)
+    events = data.get("events", [])
+    archive.note_events(events)
+    for listener in _bootstrap_listeners:
+        listener(events)
+    return data
+
+
+def get_entry(entry_id: int, session: Optional[requests.Session] = None,
+              timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    return get_json(f"{API_BASE}entry/{entry_id}/", timeout, session)
+
+
+def get_picks(entry_id: int, gw: int, session: Optional[requests.Session] = None,
+              timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    return get_archived_json("picks", gw, f"{API_BASE}entry/{entry_id}/event/{gw}/picks/",
+                             timeout, session, entry_id)
+
+
+def get_history(entry_id: int, session: Optional[requests.Session] = None,
+                timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """Manager's season history, including chip usage."""
+    return get_json(f"{API_BASE}entry/{entry_id}/history/", timeout, session)
+
+
+def get_transfers(entry_id: int, session: Optional[requests.Session] = None,
+                  timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, Any]]:
+    return get_json(f"{API_BASE}entry/{entry_id}/transfers/", timeout, session)
+
+
+def get_live(gw: int, session: Optional[requests.Session] = None,
+             timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    return get_archived_json("live", gw, f"{API_BASE}event/{gw}/live/", timeout, session)
+
+
+def get_fixtures(gw: Optional[int] = None, session: Optional[requests.Session] = None,
+                 timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, Any]]:
+    """Fixtures for one gameweek, or the whole season when gw is None."""
+    if gw is None:
+        return get_json(f"{API_BASE}fixtures/", timeout, session)
+    return get_archived_json("fixtures", gw, f"{API_BASE}fixtures/?event={gw}", timeout, session)
+
+
+def get_element_summary(element_id: int, session: Optional[requests.Session] = None,
+                        timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    return get_json(f"{API_BASE}element-summary/{element_id}/", timeout, session)
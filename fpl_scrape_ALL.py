@@ -21,29 +21,16 @@ import sys
 from typing import Dict, Any, List, Optional, Set
 import requests
 
-BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
-ENTRY_URL_TPL = "https://fantasy.premierleague.com/api/entry/{entry_id}/"
-PICKS_URL_TPL = "https://fantasy.premierleague.com/api/entry/{entry_id}/event/{gw}/picks/"
-LIVE_URL_TPL  = "https://fantasy.premierleague.com/api/event/{gw}/live/"
-FIXTURES_URL_TPL = "https://fantasy.premierleague.com/api/fixtures/?event={gw}"
+import fpl_client
 
 ELEMENT_TYPE = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+TIMEOUT = 20
 
 def make_session(cookie: Optional[str]) -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (compatible; FPLRosterBot/1.1)",
-        "Accept": "application/json,text/plain,*/*",
-        "Referer": "https://fantasy.premierleague.com/"
-    })
-    if cookie:
-        s.headers.update({"Cookie": cookie})
-    return s
+    return fpl_client.make_session(cookie, user_agent="Mozilla/5.0 (compatible; FPLRosterBot/1.1)")
 
 def get_bootstrap(session: requests.Session) -> Dict[str, Any]:
-    r = session.get(BOOTSTRAP_URL, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = fpl_client.get_bootstrap_static(session=session, timeout=TIMEOUT)
     
     # Enhanced to include global ownership data for ALL players
     elements = {}
@@ -62,23 +49,11 @@ def get_bootstrap(session: requests.Session) -> Dict[str, Any]:
         "teams": {t["id"]: t for t in data["teams"]},
     }
 
-def get_entry(session: requests.Session, entry_id: int) -> Dict[str, Any]:
-    r = session.get(ENTRY_URL_TPL.format(entry_id=entry_id), timeout=20)
-    r.raise_for_status()
-    return r.json()
-
-def get_picks(session: requests.Session, entry_id: int, gw: int) -> Dict[str, Any]:
-    r = session.get(PICKS_URL_TPL.format(entry_id=entry_id, gw=gw), timeout=20)
-    r.raise_for_status()
-    return r.json()
-
 def get_live_snap(session: requests.Session, gw: int) -> Dict[int, Dict[str, int]]:
     """
     Returns {element_id: {"points": int, "minutes": int}}
     """
-    r = session.get(LIVE_URL_TPL.format(gw=gw), timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = fpl_client.get_live(gw, session=session, timeout=TIMEOUT)
     out: Dict[int, Dict[str, int]] = {}
     for e in data.get("elements", []):
         pid = e["id"]
@@ -89,11 +64,6 @@ def get_live_snap(session: requests.Session, gw: int) -> Dict[int, Dict[str, int
         }
     return out
 
-def get_fixtures(session: requests.Session, gw: int) -> List[Dict[str, Any]]:
-    r = session.get(FIXTURES_URL_TPL.format(gw=gw), timeout=20)
-    r.raise_for_status()
-    return r.json()
-
 def build_team_fixture_index(fixtures: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
     """
     Map team_id -> list of fixtures in this GW (handles DGWs gracefully).
@@ -170,7 +140,7 @@ def collect_league_picks(entry_ids: List[int], session: requests.Session, gw: in
     
     for eid in entry_ids:
         try:
-            picks = get_picks(session, eid, gw)
+            picks = fpl_client.get_picks(eid, gw, session=session, timeout=TIMEOUT)
             for p in picks.get("picks", []):
                 league_picks.add(p["element"])
         except requests.HTTPError as e:
@@ -187,8 +157,8 @@ def calculate_league_ownership(entry_ids: List[int], session: requests.Session,
     
     for eid in entry_ids:
         try:
-            entry = get_entry(session, eid)
-            picks = get_picks(session, eid, gw)
+            entry = fpl_client.get_entry(eid, session=session, timeout=TIMEOUT)
+            picks = fpl_client.get_picks(eid, gw, session=session, timeout=TIMEOUT)
             
             manager_name = (entry.get("player_first_name", "") + " " + entry.get("player_last_name", "")).strip()
             
@@ -334,7 +304,7 @@ def main():
 
     # Fixtures for status
     try:
-        fixtures = get_fixtures(session, args.gw)
+        fixtures = fpl_client.get_fixtures(args.gw, session=session, timeout=TIMEOUT)
         team_fixtures = build_team_fixture_index(fixtures)
         print(f"✅ Fetched fixture data")
     except requests.HTTPError as e:
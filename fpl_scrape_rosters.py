@@ -9,42 +9,76 @@ Usage examples:
   python3 fpl_scrape_rosters.py --gw 1 --entries 394273 123456 999999
   python3 fpl_scrape_rosters.py --gw 1 --entries-file league_ids.txt
   python3 fpl_scrape_rosters.py --gw 1 --entries 394273 --cookie "pl_profile=...; pl_user=...; ..."
+  python3 fpl_scrape_rosters.py --gw 1 --entries-file big_league.txt --workers 8 --rate 10
 
 Output:
   fpl_rosters_points_gw{gw}.csv (with global ownership data, accurate bench points, and transfer costs)
+
+In-process use (the server calls this instead of spawning the CLI):
+  csv_bytes = scrape_rosters_csv(gw, entry_ids, dicts=build_dicts(bootstrap_json))
+
+Live points include provisional bonus (top-3 BPS per started fixture whose
+bonus FPL has not confirmed yet), reported in the bps/provisional_bonus columns,
+and live automatic substitutions / vice-captain promotion (effective_multiplier,
+auto_sub), resolved once per scrape instead of in every browser.
+
+Picks are frozen once the deadline passes, so each manager's entry + picks are
+cached per gameweek; repeat scrapes of a live gameweek only fetch
+event/{gw}/live and fixtures?event={gw}.
 """
 
 import argparse
 import csv
+import io
+import os
 import sys
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
 import requests
 
-BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
-ENTRY_URL_TPL = "https://fantasy.premierleague.com/api/entry/{entry_id}/"
-PICKS_URL_TPL = "https://fantasy.premierleague.com/api/entry/{entry_id}/event/{gw}/picks/"
-LIVE_URL_TPL  = "https://fantasy.premierleague.com/api/event/{gw}/live/"
-FIXTURES_URL_TPL = "https://fantasy.premierleague.com/api/fixtures/?event={gw}"
-HISTORY_URL_TPL = "https://fantasy.premierleague.com/api/entry/{entry_id}/history/"
+import fpl_client
+from fpl_cache import caches
+from entry_store import entries
 
 ELEMENT_TYPE = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+TIMEOUT = 20
+RETRIES = 2          # extra attempts per manager on timeouts, connection errors, 429 and 5xx
+RETRY_BACKOFF = 1.0  # seconds, doubled on each retry
 
-def make_session(cookie: Optional[str]) -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (compatible; FPLRosterBot/1.3)",  # Incremented version
-        "Accept": "application/json,text/plain,*/*",
-        "Referer": "https://fantasy.premierleague.com/"
-    })
-    if cookie:
-        s.headers.update({"Cookie": cookie})
-    return s
-
-def get_bootstrap(session: requests.Session) -> Dict[str, Any]:
-    r = session.get(BOOTSTRAP_URL, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+# (gw, entry_id) -> (entry, picks). The TTL only bounds drift in team names and
+# squad value (price changes); the picks themselves never change after the deadline.
+ENTRY_INPUTS_TTL = int(os.getenv("ROSTER_INPUTS_TTL_SECONDS", str(3 * 3600)))
+entry_inputs_cache = caches.namespace("roster_inputs", ttl=ENTRY_INPUTS_TTL, max_entries=200)
 
+def make_session(cookie: Optional[str]) -> requests.Session:
+    return fpl_client.make_session(cookie, user_agent="Mozilla/5.0 (compatible; FPLRosterBot/1.3)")
+
+FIELDNAMES = [
+    "entry_id", "entry_team_name", "manager_name", "gameweek",
+    "element_id", "player", "position", "club",
+    "player_cost", "value_ratio", "global_ownership", "global_captain_percent",
+    "multiplier", "is_captain", "is_vice_captain",
+    "points_gw", "points_applied", "bench_points",
+    "transfer_cost", "event_transfers", "gross_points",
+    "minutes", "status", "opponent_team", "kickoff_time",
+    "fixture_started", "fixture_finished",
+    # Detailed stats for player display
+    "goals_scored", "assists", "clean_sheets", "saves", "bonus",
+    "yellow_cards", "red_cards", "own_goals", "penalties_saved", "penalties_missed",
+    # Team value fields (TOTAL row only)
+    "bank", "total_value",
+    # Live bonus: BPS so far and bonus not yet confirmed by FPL (already included in points_gw)
+    "bps", "provisional_bonus",
+    # After live auto-subs / vice-captain promotion; points_applied = points_gw * effective_multiplier
+    "effective_multiplier", "auto_sub",
+]
+
+def get_bootstrap(session: Optional[requests.Session]) -> Dict[str, Any]:
+    return build_dicts(fpl_client.get_bootstrap_static(session=session, timeout=TIMEOUT))
+
+def build_dicts(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a raw bootstrap-static payload into the element/team lookups rows_from_picks needs."""
     # Enhanced to include global ownership data
     elements = {}
     for e in data["elements"]:
@@ -63,29 +97,13 @@ def get_bootstrap(session: requests.Session) -> Dict[str, Any]:
         "teams": {t["id"]: t for t in data["teams"]},
     }
 
-def get_entry(session: requests.Session, entry_id: int) -> Dict[str, Any]:
-    r = session.get(ENTRY_URL_TPL.format(entry_id=entry_id), timeout=20)
-    r.raise_for_status()
-    return r.json()
-
-def get_picks(session: requests.Session, entry_id: int, gw: int) -> Dict[str, Any]:
-    r = session.get(PICKS_URL_TPL.format(entry_id=entry_id, gw=gw), timeout=20)
-    r.raise_for_status()
-    return r.json()
-
-def get_history(session: requests.Session, entry_id: int) -> Dict[str, Any]:
-    """Fetches the manager's season history, including chip usage."""
-    r = session.get(HISTORY_URL_TPL.format(entry_id=entry_id), timeout=20)
-    r.raise_for_status()
-    return r.json()
-
-def get_live_snap(session: requests.Session, gw: int) -> Dict[int, Dict[str, int]]:
+def get_live_snap(session: Optional[requests.Session], gw: int,
+                  fixtures: Optional[List[Dict[str, Any]]] = None) -> Dict[int, Dict[str, int]]:
     """
     Returns {element_id: {"points": int, "minutes": int, "goals_scored": int, ...}}
+    With fixtures, each entry also carries "bps" and "provisional_bonus" (see provisional_bonus()).
     """
-    r = session.get(LIVE_URL_TPL.format(gw=gw), timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = fpl_client.get_live(gw, session=session, timeout=TIMEOUT)
     out: Dict[int, Dict[str, int]] = {}
     for e in data.get("elements", []):
         pid = e["id"]
@@ -103,13 +121,73 @@ def get_live_snap(session: requests.Session, gw: int) -> Dict[int, Dict[str, int
             "own_goals": int(stats.get("own_goals", 0) or 0),
             "penalties_saved": int(stats.get("penalties_saved", 0) or 0),
             "penalties_missed": int(stats.get("penalties_missed", 0) or 0),
+            "bps": int(stats.get("bps", 0) or 0),
+            "provisional_bonus": 0,
         }
+    if fixtures is not None:
+        for pid, bonus in provisional_bonus(data, fixtures).items():
+            if pid in out:
+                out[pid]["provisional_bonus"] = bonus
+    return out
+
+BONUS_POINTS = (3, 2, 1)  # by BPS rank within a fixture
+
+def bonus_from_bps(bps: Dict[int, int]) -> Dict[int, int]:
+    """
+    Bonus for one fixture from {element_id: bps}. Standard competition ranking
+    ("1224"), then rank 1/2/3 -> 3/2/1: tied players share the higher award and
+    the places they cover are skipped (3,3,1 / 3,2,2 / 3,3,3).
+    """
+    ordered = sorted(bps.items(), key=lambda kv: kv[1], reverse=True)
+    out: Dict[int, int] = {}
+    rank = 0
+    for pos, (pid, value) in enumerate(ordered):
+        if pos == 0 or value != ordered[pos - 1][1]:
+            rank = pos + 1
+        if rank > len(BONUS_POINTS):
+            break
+        out[pid] = BONUS_POINTS[rank - 1]
     return out
 
-def get_fixtures(session: requests.Session, gw: int) -> List[Dict[str, Any]]:
-    r = session.get(FIXTURES_URL_TPL.format(gw=gw), timeout=20)
-    r.raise_for_status()
-    return r.json()
+def provisional_bonus(live: Dict[str, Any], fixtures: List[Dict[str, Any]]) -> Dict[int, int]:
+    """
+    {element_id: bonus} for started fixtures whose bonus FPL has not awarded yet
+    (stats.total_points only includes bonus once it is confirmed, hours after
+    the final whistle). BPS is per fixture, from each element's explain block
+    in the live payload, so a double-gameweek player is ranked in each of their
+    fixtures separately; fixtures missing from explain fall back to the
+    fixture's own bps stat. Totals are summed across a player's fixtures.
+    """
+    started = {f["id"]: f for f in fixtures if f.get("started")}
+    per_fixture: Dict[int, Dict[int, int]] = {}
+    confirmed = set()
+
+    for e in live.get("elements", []):
+        for block in e.get("explain") or []:
+            fid = block.get("fixture")
+            if fid not in started:
+                continue
+            stats = {s.get("identifier"): s for s in block.get("stats", [])}
+            if (stats.get("bonus") or {}).get("points"):
+                confirmed.add(fid)
+            if "bps" in stats and (stats.get("minutes") or {}).get("value", 1):
+                per_fixture.setdefault(fid, {})[e["id"]] = int(stats["bps"].get("value", 0) or 0)
+
+    for fid, f in started.items():
+        stats = {s.get("identifier"): s for s in f.get("stats") or []}
+        if (stats.get("bonus") or {}).get("h") or (stats.get("bonus") or {}).get("a"):
+            confirmed.add(fid)
+        if fid not in per_fixture and "bps" in stats:
+            per_fixture[fid] = {x["element"]: int(x.get("value", 0) or 0)
+                                for side in ("h", "a") for x in stats["bps"].get(side, [])}
+
+    out: Dict[int, int] = {}
+    for fid, bps in per_fixture.items():
+        if fid in confirmed:
+            continue
+        for pid, bonus in bonus_from_bps(bps).items():
+            out[pid] = out.get(pid, 0) + bonus
+    return out
 
 def build_team_fixture_index(fixtures: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
     """
@@ -178,9 +256,83 @@ def derive_status(minutes: int, fstat: Dict[str, Any]) -> str:
         return "in_progress"
     return "not_started"
 
+# Formation minimums an automatic substitution must keep (by element_type)
+MIN_FORMATION = {1: 1, 2: 3, 3: 2, 4: 1}
+
+def resolve_auto_subs(pick_list: List[Dict[str, Any]],
+                      elements: Dict[int, Dict[str, Any]],
+                      live_snap: Dict[int, Dict[str, int]],
+                      team_fixtures: Dict[int, List[Dict[str, Any]]],
+                      bench_boost: bool = False) -> Dict[int, Tuple[int, str]]:
+    """
+    Apply FPL's automatic substitutions to the live picks and return
+    {element_id: (effective_multiplier, "in" | "out" | "")}.
+
+    A starter who did not play (0 minutes and all of their fixtures finished,
+    or no fixture at all) is replaced by the first bench player, in bench
+    order, who has played and keeps at least 1 GK / 3 DEF / 2 MID / 1 FWD; the
+    goalkeeper can only be replaced by the bench goalkeeper. A bench player
+    whose fixture is still to come blocks the players behind them, so a sub is
+    only made once it is certain. If the captain did not play, the vice-captain
+    takes the captain's multiplier. Bench Boost keeps all 15, so only the
+    captaincy rule applies. Picks FPL has already settled pass through unchanged.
+    """
+    def minutes(p):
+        return live_snap.get(p["element"], {}).get("minutes", 0)
+
+    def done(p):
+        team = elements.get(p["element"], {}).get("team")
+        return not team_fixtures.get(team) or choose_fixture_status(team, team_fixtures)["finished"]
+
+    def did_not_play(p):
+        return minutes(p) <= 0 and done(p)
+
+    def element_type(p):
+        return elements.get(p["element"], {}).get("element_type")
+
+    ordered = sorted(pick_list, key=lambda p: p["position"])
+    starters = [p for p in ordered if p["position"] <= 11]
+    bench = [p for p in ordered if p["position"] > 11]
+    result = {p["element"]: (p["multiplier"], "") for p in ordered}
+
+    if not bench_boost:
+        lineup = [element_type(p) for p in starters]
+        used = set()
+        for starter in starters:
+            if not did_not_play(starter):
+                continue
+            gk_out = element_type(starter) == 1
+            for sub in bench:
+                if sub["element"] in used or (element_type(sub) == 1) != gk_out:
+                    continue
+                trial = list(lineup)
+                trial.remove(element_type(starter))
+                trial.append(element_type(sub))
+                if any(trial.count(t) < n for t, n in MIN_FORMATION.items()):
+                    continue
+                if minutes(sub) > 0:
+                    lineup = trial
+                    used.add(sub["element"])
+                    result[starter["element"]] = (0, "out")
+                    result[sub["element"]] = (1, "in")
+                    break
+                if not done(sub):
+                    break  # may still play: wait rather than skip past them
+
+    captain = next((p for p in ordered if p["is_captain"]), None)
+    vice = next((p for p in ordered if p["is_vice_captain"]), None)
+    if captain and vice and did_not_play(captain) and not did_not_play(vice):
+        # Settled picks move the multiplier to the vice already; keep whichever is set (TC = 3)
+        captain_multiplier = max(captain["multiplier"], vice["multiplier"], 2)
+        if result[captain["element"]][0] > 0:
+            result[captain["element"]] = (1, result[captain["element"]][1])
+        if result[vice["element"]][0] > 0:
+            result[vice["element"]] = (captain_multiplier, result[vice["element"]][1])
+    return result
+
 def rows_from_picks(entry: Dict[str, Any],
                     picks: Dict[str, Any],
-                    history: Dict[str, Any],
+                    history: Optional[Dict[str, Any]],
                     dicts: Dict[str, Any],
                     live_snap: Dict[int, Dict[str, int]],
                     team_fixtures: Dict[int, List[Dict[str, Any]]],
@@ -194,6 +346,7 @@ def rows_from_picks(entry: Dict[str, Any],
 
     rows: List[Dict[str, Any]] = []
     team_total = 0
+    team_provisional = 0
     team_value = 0
 
     # ===== ENTRY HISTORY DATA =====
@@ -207,15 +360,16 @@ def rows_from_picks(entry: Dict[str, Any],
     api_total_value = int(entry_history.get("value", 0) or 0)
     # ===================================
 
-    # Bench Boost Detection
-    is_bench_boost_active = False
-    for chip in history.get('chips', []):
+    # Bench Boost Detection (picks carries the chip played this GW; history is optional)
+    is_bench_boost_active = picks.get("active_chip") == "bboost"
+    for chip in (history or {}).get('chips', []):
         if chip.get('name') == 'bboost' and chip.get('event') == gw:
             is_bench_boost_active = True
             break
 
     calculated_bench_points = 0
     pick_list = picks.get("picks", [])
+    effective = resolve_auto_subs(pick_list, elements, live_snap, team_fixtures, is_bench_boost_active)
 
     for p in pick_list:
         el = elements.get(p["element"])
@@ -226,11 +380,15 @@ def rows_from_picks(entry: Dict[str, Any],
         club = teams.get(club_id, {}).get("name", club_id)
 
         snap = live_snap.get(el["id"], {"points": 0, "minutes": 0, "goals_scored": 0, "assists": 0, "clean_sheets": 0, "saves": 0, "bonus": 0, "yellow_cards": 0, "red_cards": 0, "own_goals": 0, "penalties_saved": 0, "penalties_missed": 0})
-        raw_pts = snap["points"]
+        # Live points include bonus FPL has not confirmed yet
+        provisional = snap.get("provisional_bonus", 0)
+        raw_pts = snap["points"] + provisional
         minutes = snap["minutes"]
 
-        applied = raw_pts * p["multiplier"]
+        multiplier, auto_sub = effective.get(p["element"], (p["multiplier"], ""))
+        applied = raw_pts * multiplier
         team_total += applied
+        team_provisional += provisional * multiplier
 
         player_cost = el.get("cost", 0)
         team_value += player_cost
@@ -241,8 +399,8 @@ def rows_from_picks(entry: Dict[str, Any],
         status = derive_status(minutes, fstat)
         value_ratio = raw_pts / player_cost if player_cost > 0 else 0
 
-        # Calculate bench points based on BB status
-        if not is_bench_boost_active and p["multiplier"] == 0:
+        # Calculate bench points based on BB status (whoever ends up on the bench after auto-subs)
+        if not is_bench_boost_active and multiplier == 0:
             calculated_bench_points += raw_pts
 
         rows.append({
@@ -277,6 +435,10 @@ def rows_from_picks(entry: Dict[str, Any],
             "bonus": snap["bonus"],
             "yellow_cards": snap["yellow_cards"],
             "red_cards": snap["red_cards"],
+            "bps": snap.get("bps", 0),
+            "provisional_bonus": provisional,
+            "effective_multiplier": multiplier,
+            "auto_sub": auto_sub,
         })
 
     # Calculate actual bench points if Bench Boost was active
@@ -288,7 +450,7 @@ def rows_from_picks(entry: Dict[str, Any],
 
         for player_id in bench_player_ids:
             snap = live_snap.get(player_id, {"points": 0})
-            calculated_bench_points += snap["points"]
+            calculated_bench_points += snap["points"] + snap.get("provisional_bonus", 0)
 
     # Summary row with team value, bench points, AND TRANSFER COST
     team_value_ratio = team_total / team_value if team_value > 0 else 0
@@ -330,6 +492,10 @@ def rows_from_picks(entry: Dict[str, Any],
         "gross_points": team_total,           # <-- Points before deductions
         "bank": bank_value,                   # <-- Bank value (in tenths, e.g., 15 = £1.5m)
         "total_value": total_value_with_bank, # <-- Squad + Bank total value (in tenths)
+        "bps": "",
+        "provisional_bonus": team_provisional,  # <-- Unconfirmed bonus included in gross/net points
+        "effective_multiplier": "",
+        "auto_sub": sum(1 for m, sub in effective.values() if sub == "in"),  # <-- Auto-subs made
     })
 
     return rows
@@ -341,6 +507,9 @@ def parse_args():
     ap.add_argument("--entries-file", type=str, help="Path to text file with one entry ID per line")
     ap.add_argument("--cookie", type=str, default=None, help="Optional Cookie header for private teams")
     ap.add_argument("--out", type=str, default=None, help="Output CSV (default: fpl_rosters_points_gw{gw}.csv)")
+    ap.add_argument("--workers", type=int, default=1, help="Managers fetched concurrently, up to FPL_WORKERS (default: 1, sequential)")
+    ap.add_argument("--rate", type=float, default=None, help="Max entry/picks requests per second across all workers")
+    ap.add_argument("--retries", type=int, default=RETRIES, help=f"Retries per manager on transient errors (default: {RETRIES})")
     return ap.parse_args()
 
 def load_entries(args) -> List[int]:
@@ -361,6 +530,120 @@ def load_entries(args) -> List[int]:
         sys.exit(1)
     return sorted(set(ids))
 
+def _is_retryable(e: requests.RequestException) -> bool:
+    if isinstance(e, requests.HTTPError):
+        status = e.response.status_code if e.response is not None else None
+        return status is None or status == 429 or status >= 500
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+def get_entry_inputs(eid: int, gw: int,
+                     session: Optional[requests.Session] = None,
+                     limiter: Optional[fpl_client.RateLimiter] = None,
+                     retries: int = 0) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """A manager's (entry, picks) for a gameweek, fetched once and then served from the per-GW cache."""
+    key = (gw, eid)
+    inputs = entry_inputs_cache.get(key)
+    if inputs is not None:
+        return inputs
+
+    attempt = 0
+    while True:
+        try:
+            if limiter:
+                limiter.wait()
+            entry = entries.get_entry(eid, session=session, timeout=TIMEOUT)
+            if limiter:
+                limiter.wait()
+            picks = fpl_client.get_picks(eid, gw, session=session, timeout=TIMEOUT)
+            break
+        except requests.RequestException as e:
+            if attempt >= retries or not _is_retryable(e):
+                raise
+            delay = RETRY_BACKOFF * (2 ** attempt)
+            attempt += 1
+            print(f"[entry {eid}] {e} - retry {attempt}/{retries} in {delay:.0f}s", file=sys.stderr)
+            time.sleep(delay)
+
+    inputs = (entry, picks)
+    entry_inputs_cache.set(key, inputs)
+    return inputs
+
+def scrape_rows(gw: int,
+                entry_ids: List[int],
+                session: Optional[requests.Session] = None,
+                dicts: Optional[Dict[str, Any]] = None,
+                workers: int = 1,
+                rate: Optional[float] = None,
+                retries: int = RETRIES) -> List[Dict[str, Any]]:
+    """
+    Collect roster rows for every entry. Raises requests.HTTPError if a shared
+    payload (bootstrap, live, fixtures) fails; a failing entry is retried, then
+    logged and skipped. session=None uses the shared pooled fpl_client session.
+
+    workers > 1 fetches managers concurrently on the shared fpl_client.executor,
+    holding at most that many of its threads at once; rate caps entry/picks
+    requests per second across all workers. Rows always come out in entry_ids order.
+    """
+    if dicts is None:
+        dicts = get_bootstrap(session)
+
+    # Fixtures first: the live snapshot ranks BPS per fixture for provisional bonus
+    fixtures = fpl_client.get_fixtures(gw, session=session, timeout=TIMEOUT)
+    live_snap = get_live_snap(session, gw, fixtures)
+    team_fixtures = build_team_fixture_index(fixtures)
+
+    limiter = fpl_client.RateLimiter(rate) if rate else None
+
+    def entry_rows(eid: int) -> List[Dict[str, Any]]:
+        try:
+            entry, picks = get_entry_inputs(eid, gw, session, limiter, retries)
+        except requests.RequestException as e:
+            print(f"[entry {eid}] entry/picks fetch failed: {e}", file=sys.stderr)
+            return []
+        return rows_from_picks(entry, picks, None, dicts, live_snap, team_fixtures, gw)
+
+    if workers > 1 and len(entry_ids) > 1:
+        # Bounded so a rate-limited scrape leaves the rest of the shared pool to other fetches
+        slots = threading.BoundedSemaphore(workers)
+
+        def bounded_rows(eid: int) -> List[Dict[str, Any]]:
+            try:
+                return entry_rows(eid)
+            finally:
+                slots.release()
+
+        jobs = []
+        for eid in entry_ids:
+            slots.acquire()
+            jobs.append(fpl_client.executor.submit(bounded_rows, eid))
+        per_entry = [job.result() for job in jobs]
+    else:
+        per_entry = [entry_rows(eid) for eid in entry_ids]
+
+    return [row for rows in per_entry for row in rows]
+
+def rows_to_csv_bytes(rows: List[Dict[str, Any]]) -> bytes:
+    buf = io.StringIO(newline="")
+    w = csv.DictWriter(buf, fieldnames=FIELDNAMES, extrasaction='ignore')
+    w.writeheader()
+    for r in rows:
+        w.writerow(r)
+    return buf.getvalue().encode("utf-8")
+
+def scrape_rosters_csv(gw: int,
+                       entry_ids: List[int],
+                       session: Optional[requests.Session] = None,
+                       dicts: Optional[Dict[str, Any]] = None,
+                       workers: int = 1,
+                       rate: Optional[float] = None,
+                       retries: int = RETRIES) -> bytes:
+    """In-process scrape: returns the same CSV bytes the CLI writes, without touching disk."""
+    rows = scrape_rows(gw, entry_ids, session=session, dicts=dicts,
+                       workers=workers, rate=rate, retries=retries)
+    if not rows:
+        raise RuntimeError("No rows collected. Check entry IDs, GW, or cookie auth.")
+    return rows_to_csv_bytes(rows)
+
 def main():
     args = parse_args()
     out_path = args.out or f"fpl_rosters_points_gw{args.gw}.csv"
@@ -376,75 +659,23 @@ def main():
         sys.exit(2)
 
     try:
-        live_snap = get_live_snap(session, args.gw)
-        print(f"✅ Fetched live gameweek data")
+        all_rows = scrape_rows(args.gw, entry_ids, session=session, dicts=dicts,
+                               workers=args.workers, rate=args.rate, retries=args.retries)
+        print(f"✅ Fetched live gameweek and fixture data")
     except requests.HTTPError as e:
-        print(f"Failed to fetch event/{args.gw}/live: {e}", file=sys.stderr)
+        print(f"Failed to fetch live/fixture data for GW{args.gw}: {e}", file=sys.stderr)
         sys.exit(2)
 
-    try:
-        fixtures = get_fixtures(session, args.gw)
-        team_fixtures = build_team_fixture_index(fixtures)
-        print(f"✅ Fetched fixture data")
-    except requests.HTTPError as e:
-        print(f"Failed to fetch fixtures for GW{args.gw}: {e}", file=sys.stderr)
-        sys.exit(2)
-
-    all_rows: List[Dict[str, Any]] = []
-    total_hits = 0
-    
-    for eid in entry_ids:
-        try:
-            entry = get_entry(session, eid)
-        except requests.HTTPError as e:
-            print(f"[entry {eid}] entry fetch failed: {e}", file=sys.stderr)
-            continue
-
-        try:
-            picks = get_picks(session, eid, args.gw)
-        except requests.HTTPError as e:
-            print(f"[entry {eid}] picks fetch failed: {e}", file=sys.stderr)
-            continue
-
-        try:
-            history = get_history(session, eid)
-        except requests.HTTPError as e:
-            print(f"[entry {eid}] history fetch failed: {e}", file=sys.stderr)
-            history = {}
-
-        rows = rows_from_picks(entry, picks, history, dicts, live_snap, team_fixtures, args.gw)
-        all_rows.extend(rows)
-        
-        # Track transfer hits for summary
-        for row in rows:
-            if row.get("player") == "TOTAL" and row.get("transfer_cost"):
-                total_hits += row["transfer_cost"]
-
     if not all_rows:
         print("No rows collected. Check entry IDs, GW, or cookie auth.", file=sys.stderr)
         sys.exit(3)
 
-    fieldnames = [
-        "entry_id", "entry_team_name", "manager_name", "gameweek",
-        "element_id", "player", "position", "club",
-        "player_cost", "value_ratio", "global_ownership", "global_captain_percent",
-        "multiplier", "is_captain", "is_vice_captain",
-        "points_gw", "points_applied", "bench_points",
-        "transfer_cost", "event_transfers", "gross_points",
-        "minutes", "status", "opponent_team", "kickoff_time",
-        "fixture_started", "fixture_finished",
-        # Detailed stats for player display
-        "goals_scored", "assists", "clean_sheets", "saves", "bonus",
-        "yellow_cards", "red_cards", "own_goals", "penalties_saved", "penalties_missed",
-        # Team value fields (TOTAL row only)
-        "bank", "total_value",
-    ]
-
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-        w.writeheader()
-        for r in all_rows:
-            w.writerow(r)
+    # Track transfer hits for summary
+    total_hits = sum(row["transfer_cost"] for row in all_rows
+                     if row.get("player") == "TOTAL" and row.get("transfer_cost"))
+
+    with open(out_path, "wb") as f:
+        f.write(rows_to_csv_bytes(all_rows))
 
     print(f"✅ Wrote {len(all_rows)} rows to {out_path}")
     print(f"📊 Enhanced with global ownership data, accurate bench points, and transfer costs!")
@@ -32,40 +32,20 @@ from typing import Dict, Any, List, Optional
 import requests
 from datetime import datetime
 
-BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
-ENTRY_URL_TPL = "https://fantasy.premierleague.com/api/entry/{entry_id}/"
-TRANSFERS_URL_TPL = "https://fantasy.premierleague.com/api/entry/{entry_id}/transfers/"
+import fpl_client
+
+TIMEOUT = 20
 
 def make_session(cookie: Optional[str]) -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (compatible; FPLTransferBot/1.0)",
-        "Accept": "application/json,text/plain,*/*",
-        "Referer": "https://fantasy.premierleague.com/"
-    })
-    if cookie:
-        s.headers.update({"Cookie": cookie})
-    return s
+    return fpl_client.make_session(cookie, user_agent="Mozilla/5.0 (compatible; FPLTransferBot/1.0)")
 
 def get_bootstrap(session: requests.Session) -> Dict[str, Any]:
-    r = session.get(BOOTSTRAP_URL, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = fpl_client.get_bootstrap_static(session=session, timeout=TIMEOUT)
     return {
         "elements": {e["id"]: e for e in data["elements"]},
         "teams": {t["id"]: t for t in data["teams"]},
     }
 
-def get_entry(session: requests.Session, entry_id: int) -> Dict[str, Any]:
-    r = session.get(ENTRY_URL_TPL.format(entry_id=entry_id), timeout=20)
-    r.raise_for_status()
-    return r.json()
-
-def get_transfers(session: requests.Session, entry_id: int) -> List[Dict[str, Any]]:
-    r = session.get(TRANSFERS_URL_TPL.format(entry_id=entry_id), timeout=20)
-    r.raise_for_status()
-    return r.json()
-
 def load_entries(args) -> List[int]:
     ids: List[int] = []
     if args.entries:
@@ -118,8 +98,8 @@ def main():
 
     for eid in entry_ids:
         try:
-            entry = get_entry(session, eid)
-            transfers = get_transfers(session, eid)
+            entry = fpl_client.get_entry(eid, session=session, timeout=TIMEOUT)
+            transfers = fpl_client.get_transfers(eid, session=session, timeout=TIMEOUT)
         except requests.HTTPError as e:
             print(f"[entry {eid}] fetch failed: {e}", file=sys.stderr)
             continue
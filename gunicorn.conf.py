@@ -0,0 +1,48 @@
+"""
+Production serving config: gunicorn + gevent.
+
+  gunicorn -c gunicorn.conf.py app:app
+
+The gevent worker serves every connection on a greenlet, so an idle
+/sse/fpl-updates client costs a greenlet, a socket and its queue (~23 KB
+measured) instead of an OS thread parked for up to the 2 h Fly hard timeout,
+and API requests no longer compete with hundreds of stream threads. The worker
+monkey-patches the stdlib before importing app.py, so the scraper loop,
+cache refresher, SSE hub and fpl_client pools run as greenlets too.
+
+Benchmark: scripts/bench_sse.py.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Exactly one worker: the scraper loop, in-memory manifest, caches and SSE hub
+# are per-process state, and a second worker would scrape and upload twice.
+workers = 1
+worker_class = "gevent"
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", "4000"))
+
+# Keep idle keep-alive connections from Fly's proxy open longer than the proxy
+# itself does, so it never reuses a socket we are about to close.
+keepalive = int(os.getenv("KEEPALIVE_SECONDS", "75"))
+
+# gevent workers heartbeat from their event loop, so long SSE streams do not
+# trip this; it only catches a loop blocked by CPU-bound work.
+timeout = 120
+graceful_timeout = 20
+
+accesslog = None
+errorlog = "-"
+loglevel = "info"
+
+
+def post_worker_init(worker):
+    import app
+    app.log(f"gunicorn worker {worker.pid} ready (gevent, {worker_connections} connections)")
+    app.start_background_workers()
+
+
+def worker_exit(server, worker):
+    import app
+    app.stop_gracefully(None, None)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Write-once archive of finished-gameweek FPL payloads.
+
+Once an event is finished and data_checked, its event/{gw}/live, fixtures
+?event={gw} and every manager's entry/{id}/event/{gw}/picks responses never
+change again. fpl_client serves those from here: the first fetch of a final
+gameweek stores the raw response body gzip-compressed on disk, and every later
+fetch (in this process or after a restart) is a disk read, or a memory read
+while the decoded payload is still in the small in-memory tier.
+
+Files are never rewritten. A file's existence is proof that its gameweek was
+final when it was stored, so lookups do not need to know the event flags; only
+new writes do, and fpl_client feeds them from every bootstrap-static it fetches.
+Decoded payloads are shared between callers and must be treated as read-only.
+
+Layout:
+  {dir}/gw{gw}/live.json.gz
+  {dir}/gw{gw}/fixtures.json.gz
+  {dir}/gw{gw}/picks/{entry_id}.json.gz
+
+Usage:
+  from gw_archive import archive
+  archive.note_events(bootstrap["events"])
+  data = archive.load("live", 12)                # None if not archived
+  archive.store("picks", 12, body_bytes, entry_id=394273)
+
+Pre-populating a season (every final gameweek, for these managers):
+  python3 gw_archive.py --entries 394273 123456
+  python3 gw_archive.py --entries-file league_ids.txt --gw 1 2 3
+"""
+
+import argparse
+import concurrent.futures
+import gzip
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+ARCHIVE_DIR = os.getenv("GW_ARCHIVE_DIR", "/tmp/fpl-gw-archive")
+# Decoded payloads kept in memory, by raw JSON size (a live payload is ~1 MB)
+MEMORY_BYTES = int(os.getenv("GW_ARCHIVE_MEMORY_MB", "24")) * 1024 * 1024
+
+KINDS = ("live", "fixtures", "picks")
+
+
+def _log(msg: str):
+    print(f"[gw-archive] {msg}", flush=True)
+
+
+def is_final(event: Dict[str, Any]) -> bool:
+    return bool(event.get("finished") and event.get("data_checked"))
+
+
+class GameweekArchive:
+    def __init__(self, directory: str = ARCHIVE_DIR, memory_bytes: int = MEMORY_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self._lock = threading.Lock()
+        self._final: Set[int] = set()
+        # (kind, gw, entry_id) -> (decoded payload, raw size)
+        self._memory: "OrderedDict[Tuple[str, int, Optional[int]], Tuple[Any, int]]" = OrderedDict()
+        self._memory_used = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def _path(self, kind: str, gw: int, entry_id: Optional[int] = None) -> str:
+        if kind not in KINDS:
+            raise ValueError(f"Unknown archive kind: {kind}")
+        if kind == "picks":
+            if entry_id is None:
+                raise ValueError("picks need an entry_id")
+            return os.path.join(self.directory, f"gw{gw}", "picks", f"{entry_id}.json.gz")
+        return os.path.join(self.directory, f"gw{gw}", f"{kind}.json.gz")
+
+    # ---- finality ----
+    def note_events(self, events: Iterable[Dict[str, Any]]):
+        """Record which gameweeks are final (finished and data_checked) from bootstrap events."""
+        final = {e["id"] for e in events if is_final(e)}
+        with self._lock:
+            new = final - self._final
+            self._final |= final
+        if new:
+            _log(f"{len(new)} more gameweek(s) final, latest GW{max(new)}")
+
+    def is_final(self, gw: int) -> bool:
+        with self._lock:
+            return gw in self._final
+
+    def final_gameweeks(self) -> List[int]:
+        with self._lock:
+            return sorted(self._final)
+
+    # ---- memory tier ----
+    def _remember(self, key, payload: Any, size: int):
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_used -= old[1]
+            self._memory[key] = (payload, size)
+            self._memory_used += size
+            while self._memory_used > self.memory_bytes:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_used -= evicted
+
+    # ---- reads / writes ----
+    def load(self, kind: str, gw: int, entry_id: Optional[int] = None) -> Optional[Any]:
+        """The archived payload, or None if this gameweek/entry has not been archived."""
+        key = (kind, gw, entry_id)
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return hit[0]
+
+        path = self._path(kind, gw, entry_id)
+        try:
+            with gzip.open(path, "rb") as f:
+                raw = f.read()
+            payload = json.loads(raw)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            # Truncated or corrupt file: treat as missing so the next fetch rewrites it
+            _log(f"Ignoring unreadable {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self._remember(key, payload, len(raw))
+        return payload
+
+    def store(self, kind: str, gw: int, body: bytes, entry_id: Optional[int] = None) -> bool:
+        """Archive a raw upstream JSON body. Returns False if it was already archived."""
+        path = self._path(kind, gw, entry_id)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            f.write(body)
+        os.replace(tmp, path)
+        with self._lock:
+            self.stored += 1
+        return True
+
+    def fetch(self, kind: str, gw: int, fetch_body, entry_id: Optional[int] = None) -> Any:
+        """
+        Archived payload if present; otherwise call fetch_body() -> (raw bytes,
+        decoded payload) and archive the bytes if the gameweek is final.
+        """
+        payload = self.load(kind, gw, entry_id)
+        if payload is not None:
+            return payload
+        body, payload = fetch_body()
+        if self.is_final(gw):
+            try:
+                if self.store(kind, gw, body, entry_id):
+                    self._remember((kind, gw, entry_id), payload, len(body))
+            except OSError as e:
+                _log(f"Could not archive {kind} GW{gw}{f' entry {entry_id}' if entry_id else ''}: {e}")
+        return payload
+
+    def gameweeks(self) -> List[int]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(int(n[2:]) for n in names if n.startswith("gw") and n[2:].isdigit())
+
+    def stats(self) -> Dict[str, Any]:
+        files = size = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json.gz"):
+                    files += 1
+                    try:
+                        size += os.path.getsize(os.path.join(root, name))
+                    except OSError:
+                        pass
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "archived_gameweeks": self.gameweeks(),
+                "final_gameweeks": sorted(self._final),
+                "files": files,
+                "bytes": size,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "stored": self.stored,
+            }
+
+
+# Process-wide archive, consulted by fpl_client's live / picks / fixtures fetches
+archive = GameweekArchive()
+
+
+# ====== CLI: pre-populate a season ======
+def parse_args():
+    ap = argparse.ArgumentParser(description="Archive live, fixtures and picks payloads for finished gameweeks.")
+    ap.add_argument("--entries", type=int, nargs="*", help="Entry IDs whose picks to archive")
+    ap.add_argument("--entries-file", type=str, help="Path to text file with one entry ID per line")
+    ap.add_argument("--gw", type=int, nargs="*", help="Gameweeks to archive (default: every final gameweek)")
+    ap.add_argument("--dir", type=str, default=None, help=f"Archive directory (default: {ARCHIVE_DIR})")
+    ap.add_argument("--workers", type=int, default=4, help="Concurrent picks fetches (default: 4)")
+    ap.add_argument("--rate", type=float, default=5.0, help="Max picks requests per second (default: 5)")
+    return ap.parse_args()
+
+
+def load_entries(args) -> List[int]:
+    ids: List[int] = list(args.entries or [])
+    if args.entries_file:
+        with open(args.entries_file, "r", encoding="utf-8") as f:
+            for line in f:
+                core = line.split("#")[0].strip()
+                if core.isdigit():
+                    ids.append(int(core))
+    return sorted(set(ids))
+
+
+def main():
+    # Run as a script this module is __main__; use the instance fpl_client reads and writes
+    import fpl_client
+    from gw_archive import archive as store
+
+    args = parse_args()
+    if args.dir:
+        store.directory = args.dir
+    entry_ids = load_entries(args)
+
+    events = fpl_client.get_bootstrap_static()["events"]  # also marks final gameweeks
+    final = store.final_gameweeks()
+    gameweeks = [gw for gw in (args.gw or final) if gw in final]
+    skipped = sorted(set(args.gw or []) - set(final))
+    if skipped:
+        print(f"Skipping gameweeks that are not final yet: {skipped}", file=sys.stderr)
+    if not gameweeks:
+        print(f"No final gameweeks to archive ({len(events)} events in bootstrap).", file=sys.stderr)
+        sys.exit(1)
+
+    limiter = fpl_client.RateLimiter(args.rate)
+    before = store.stored
+    failures = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.workers),
+                                               thread_name_prefix="gw-archive") as pool:
+        for gw in gameweeks:
+            fpl_client.get_live(gw)
+            fpl_client.get_fixtures(gw)
+
+            def picks(eid, gw=gw):
+                if store.load("picks", gw, eid) is None:
+                    limiter.wait()
+                    fpl_client.get_picks(eid, gw)
+
+            jobs = [pool.submit(picks, eid) for eid in entry_ids]
+            for eid, job in zip(entry_ids, jobs):
+                try:
+                    job.result()
+                except Exception as e:
+                    failures += 1
+                    print(f"[entry {eid}] GW{gw} picks failed: {e}", file=sys.stderr)
+            print(f"✅ GW{gw}: live, fixtures and {len(entry_ids)} managers' picks archived")
+
+    stats = store.stats()
+    print(f"✅ {store.stored - before} new files; archive holds {stats['files']} files, "
+          f"{stats['bytes'] / 1024:.0f} KB in {store.directory}")
+    if failures:
+        sys.exit(3)
+
+
+if __name__ == "__main__":
+    main()
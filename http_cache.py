@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Conditional-revalidation HTTP cache for upstream GETs.
+
+fpl_client sends GETs of the resources on the CACHEABLE allow-list through
+here: bootstrap-static, fixtures/, entry/{id}/history/ and the Blob manifest
+and projections, which are usually unchanged between polls. Live points,
+current-gameweek picks and the Blob CSVs (held by csv_mirror) change on nearly
+every fetch, so they are not stored. A 200 that carries an ETag or
+Last-Modified is stored (zlib-compressed) in a local SQLite file; the next GET
+of the same URL goes out with If-None-Match / If-Modified-Since, and a 304 is
+answered from the stored body. An unchanged resource then costs a header round
+trip instead of a full download, and get_json reuses the already-decoded
+payload instead of parsing it again (decoded payloads are shared between
+callers: treat them as read-only).
+
+Compression and SQLite writes happen on a background writer, never on the
+request that received the response. Under gunicorn's gevent worker that
+writer hands each write to gevent's native thread pool, so the single worker's
+event loop keeps serving while zlib and SQLite run (both release the GIL).
+
+Cache-busting query parameters (v, _t) are dropped from the cache key, so the
+Blob fetches that add a timestamp to get past the CDN still revalidate against
+the same entry. The file is bounded by HTTP_CACHE_MAX_MB with least-recently-
+used eviction, and a summary of hits/revalidations is logged every few minutes.
+
+Usage:
+  from http_cache import http_cache
+  if http_cache.cacheable(url):
+      entry = http_cache.lookup(url)
+      headers = http_cache.conditional_headers(entry)
+      r = session.get(url, headers=headers)
+      r = http_cache.handle(url, entry, r)     # 304 -> stored 200; new 200 -> queued for storage
+"""
+
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from fpl_cache import caches
+
+CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "/tmp/fpl-http-cache.sqlite3")
+MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", "64")) * 1024 * 1024
+ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") != "0"
+LOG_INTERVAL = 300            # seconds between hit-ratio summaries
+TOUCH_INTERVAL = 60           # don't rewrite used_at on every hit
+BUST_PARAMS = {"v", "_t"}     # our own cache-busting query parameters
+WRITE_QUEUE_SIZE = 64         # pending stores; more are dropped until the writer catches up
+
+# URL paths worth revalidating: changed rarely relative to how often they are polled
+CACHEABLE = re.compile(
+    r"/api/(bootstrap-static/|fixtures/|entry/\d+/history/)$"
+    r"|/fpl-league-manifest\.json$"
+    r"|/projections_gw\d+\.json$"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    content_type  TEXT,
+    body          BLOB NOT NULL,
+    size          INTEGER NOT NULL,
+    stored_at     REAL NOT NULL,
+    used_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+"""
+
+
+def _log(msg: str):
+    print(f"[http-cache] {msg}", flush=True)
+
+
+def _run_native(fn, *args):
+    """fn(*args) on a real OS thread if gevent has patched threading, else inline."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return fn(*args)
+    if not monkey.is_module_patched("threading"):
+        return fn(*args)
+    import gevent
+    return gevent.get_hub().threadpool.apply(fn, args)
+
+
+def cache_key(url: str) -> str:
+    """The URL without our cache-busting parameters."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in BUST_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class CachedResponse(NamedTuple):
+    key: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+    body: bytes
+    used_at: float
+
+
+class HTTPCache:
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES, enabled: bool = ENABLED):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._bytes = 0
+        # Writes go through a queue to one writer with its own connection
+        self._writes: "queue.Queue" = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        # Decoded JSON for revalidated responses, keyed by (cache key, validator)
+        self._decoded = caches.namespace("http_json", ttl=86400, max_entries=64, persist=False)
+        self.counts = {"hits": 0, "changed": 0, "stored": 0, "uncacheable": 0, "evicted": 0, "dropped": 0}
+        self.bytes_saved = 0
+        self._last_log = time.time()
+        self._logged_counts = dict(self.counts)
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = self._open()
+            self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    # ---- request side ----
+    def cacheable(self, url: str) -> bool:
+        """Whether GETs of url should be revalidated through this cache (see CACHEABLE)."""
+        return self.enabled and CACHEABLE.search(urlsplit(url).path) is not None
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        key = cache_key(url)
+        try:
+            with self._lock:
+                row = self._db().execute(
+                    "SELECT etag, last_modified, content_type, body, used_at FROM responses WHERE key = ?",
+                    (key,)).fetchone()
+        except sqlite3.Error as e:
+            _log(f"Lookup failed for {key}: {e}")
+            return None
+        if row is None:
+            return None
+        return CachedResponse(key, row[0], row[1], row[2], row[3], row[4])
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CachedResponse]) -> Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    # ---- response side ----
+    def handle(self, url: str, entry: Optional[CachedResponse], r: requests.Response) -> requests.Response:
+        """Turn a 304 into the stored 200, store a new validated 200, pass anything else through."""
+        if not self.enabled:
+            return r
+        if r.status_code == 304 and entry is not None:
+            body = zlib.decompress(entry.body)
+            self._count("hits", saved=len(body))
+            self._touch(entry)
+            return self._replay(entry, body, r)
+        if r.status_code == 200:
+            etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+            if etag or last_modified:
+                if self._enqueue(self._write_response, cache_key(url), etag, last_modified,
+                                 r.headers.get("Content-Type"), r.content):
+                    self._count("changed" if entry is not None else "stored")
+            else:
+                self._count("uncacheable")
+        return r
+
+    @staticmethod
+    def _replay(entry: CachedResponse, body: bytes, not_modified: requests.Response) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r.reason = "OK"
+        r._content = body
+        r.headers = CaseInsensitiveDict(not_modified.headers)
+        if entry.content_type:
+            r.headers["Content-Type"] = entry.content_type
+        r.headers.pop("Content-Length", None)
+        r.headers.pop("Content-Encoding", None)
+        r.url = not_modified.url
+        r.request = not_modified.request
+        r.elapsed = not_modified.elapsed
+        r.encoding = not_modified.encoding or "utf-8"
+        r.revalidated = True
+        r.validator = entry.etag or entry.last_modified
+        r.cache_key = entry.key
+        return r
+
+    def json(self, r: requests.Response) -> Any:
+        """r.json(), reusing the decoded payload when the response was revalidated."""
+        if not getattr(r, "revalidated", False):
+            return r.json()
+        key = (r.cache_key, r.validator)
+        data = self._decoded.get(key)
+        if data is None:
+            data = r.json()
+            self._decoded.set(key, data, size=len(r.content))
+        return data
+
+    # ---- storage (background writer) ----
+    def _enqueue(self, fn, *args) -> bool:
+        if self._writer is None or not self._writer.is_alive():
+            with self._lock:
+                if self._writer is None or not self._writer.is_alive():
+                    self._writer = threading.Thread(target=self._write_loop, name="http-cache-writer", daemon=True)
+                    self._writer.start()
+        try:
+            self._writes.put_nowait((fn, args))
+            return True
+        except queue.Full:
+            self._count("dropped")
+            return False
+
+    def _write_loop(self):
+        while True:
+            fn, args = self._writes.get()
+            try:
+                total, evicted = _run_native(fn, *args)
+                with self._lock:
+                    self._bytes = total
+                    self.counts["evicted"] += evicted
+            except sqlite3.Error as e:
+                _log(f"Write failed for {args[0]}: {e}")
+            finally:
+                self._writes.task_done()
+
+    def _writer_db(self) -> sqlite3.Connection:
+        # Only ever used by the one writer, so it needs no lock; WAL lets lookups read meanwhile
+        if self._writer_conn is None:
+            self._writer_conn = self._open()
+        return self._writer_conn
+
+    def _write_response(self, key: str, etag, last_modified, content_type, content: bytes):
+        body = zlib.compress(content, 6)
+        now = time.time()
+        db = self._writer_db()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, etag, last_modified, content_type, body, size, stored_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, content_type, body, len(body), now, now))
+            return self._evict(db)
+
+    def _write_touch(self, key: str, now: float):
+        db = self._writer_db()
+        with db:
+            db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            return self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection):
+        """
+        Drop least-recently-used responses until the file is back under 90% of
+        its budget. Returns (bytes stored, responses evicted).
+        """
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        if total <= self.max_bytes:
+            return total, evicted
+        target = self.max_bytes * 0.9
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY used_at").fetchall():
+            if total <= target:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        return total, evicted
+
+    def _touch(self, entry: CachedResponse):
+        now = time.time()
+        if now - entry.used_at < TOUCH_INTERVAL:
+            return
+        self._enqueue(self._write_touch, entry.key, now)
+
+    def flush(self):
+        """Wait until every queued write has been made."""
+        self._writes.join()
+
+    # ---- accounting ----
+    def _count(self, outcome: str, saved: int = 0):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.bytes_saved += saved
+            now = time.time()
+            if now - self._last_log < LOG_INTERVAL:
+                return
+            delta = {k: v - self._logged_counts.get(k, 0) for k, v in self.counts.items()}
+            self._last_log, self._logged_counts = now, dict(self.counts)
+        total = delta["hits"] + delta["changed"] + delta["stored"] + delta["uncacheable"]
+        if total:
+            _log(f"{total} GETs in {LOG_INTERVAL // 60} min: {delta['hits']} not modified "
+                 f"({delta['hits'] / total:.0%}), {delta['changed']} changed, {delta['stored']} new, "
+                 f"{delta['uncacheable']} without validators; {self.bytes_saved / 1048576:.1f} MB saved so far")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            try:
+                entries = self._db().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            except sqlite3.Error:
+                entries = None
+            counts = dict(self.counts)
+            revalidations = counts["hits"] + counts["changed"]
+            return {
+                "enabled": self.enabled,
+                "path": self.path,
+                "entries": entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                **counts,
+                "hit_ratio": round(counts["hits"] / revalidations, 3) if revalidations else None,
+                "bytes_saved": self.bytes_saved,
+            }
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            for conn in (self._conn, self._writer_conn):
+                if conn is not None:
+                    conn.close()
+            self._conn = self._writer_conn = None
+
+
+# Process-wide cache used by fpl_client.get
+http_cache = HTTPCache()
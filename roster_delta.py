@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Row-level deltas between successive roster CSVs for a gameweek.
+
+Each scrape is diffed against the previous one by (entry_id, element_id) (the
+TOTAL row is keyed as "TOTAL"), and only the columns that changed are kept.
+During live matches that is a handful of points/minutes/status cells per
+cycle instead of the whole ~50 KB CSV, so the server can push the patch over
+SSE and clients that missed some can ask for the chain since their version.
+
+Versions are the CSV content hashes already stored in the manifest.
+
+Usage:
+  from roster_delta import deltas
+  patch = deltas.record(gw, csv_bytes, version)   # None for a first or unchanged scrape
+  chain = deltas.since(gw, client_version)        # None if the version is unknown
+"""
+
+import csv
+import io
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+MAX_PATCHES = 240  # per gameweek; two hours of 30 s live cycles
+
+
+def row_key(row: Dict[str, str]) -> str:
+    element = "TOTAL" if row.get("player") == "TOTAL" else row.get("element_id", "")
+    return f"{row.get('entry_id', '')}:{element}"
+
+
+def parse_rows(csv_bytes: bytes) -> Dict[str, Dict[str, str]]:
+    reader = csv.DictReader(io.StringIO(csv_bytes.decode("utf-8")))
+    return {row_key(row): row for row in reader}
+
+
+def diff_rows(old: Dict[str, Dict[str, str]], new: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """Changed cells per key; rows that are new to this scrape are sent whole."""
+    upserts: List[Dict[str, str]] = []
+    for key, row in new.items():
+        prev = old.get(key)
+        if prev is None:
+            upserts.append({"key": key, **row})
+            continue
+        changed = {col: val for col, val in row.items() if prev.get(col) != val}
+        if changed:
+            upserts.append({"key": key, **changed})
+    removed = [key for key in old if key not in new]
+    return {"upserts": upserts, "removed": removed}
+
+
+def merge_patches(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine two consecutive patches (first.to == second.from) into one from first.from to second.to."""
+    upserts: Dict[str, Dict[str, str]] = {u["key"]: dict(u) for u in first["upserts"]}
+    removed = list(first["removed"])
+    for u in second["upserts"]:
+        if u["key"] in removed:
+            removed.remove(u["key"])
+        upserts.setdefault(u["key"], {}).update(u)
+    for key in second["removed"]:
+        upserts.pop(key, None)
+        if key not in removed:
+            removed.append(key)
+    return {**second, "from": first["from"], "upserts": list(upserts.values()), "removed": removed}
+
+
+class _GameweekLog:
+    __slots__ = ("version", "rows", "patches")
+
+    def __init__(self, version: str, rows: Dict[str, Dict[str, str]]):
+        self.version = version
+        self.rows = rows
+        self.patches: "deque[Dict[str, Any]]" = deque(maxlen=MAX_PATCHES)
+
+
+class RosterDeltaLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._gameweeks: Dict[int, _GameweekLog] = {}
+
+    def record(self, gw: int, csv_bytes: bytes, version: str) -> Optional[Dict[str, Any]]:
+        """Store a new scrape and return the patch from the previous one (None if there is no baseline)."""
+        rows = parse_rows(csv_bytes)
+        with self._lock:
+            log = self._gameweeks.get(gw)
+            if log is None:
+                self._gameweeks[gw] = _GameweekLog(version, rows)
+                return None
+            if log.version == version:
+                return None
+            patch = {"gameweek": gw, "from": log.version, "to": version, **diff_rows(log.rows, rows)}
+            log.patches.append(patch)
+            log.version = version
+            log.rows = rows
+            return patch
+
+    def current_version(self, gw: int) -> Optional[str]:
+        with self._lock:
+            log = self._gameweeks.get(gw)
+            return log.version if log else None
+
+    def since(self, gw: int, version: str) -> Optional[List[Dict[str, Any]]]:
+        """Patches taking `version` to the current one; [] if already current, None if not in the log."""
+        with self._lock:
+            log = self._gameweeks.get(gw)
+            if log is None:
+                return None
+            if version == log.version:
+                return []
+            patches = list(log.patches)
+        for i, patch in enumerate(patches):
+            if patch["from"] == version:
+                return patches[i:]
+        return None
+
+
+# Process-wide log fed by the scraper loop
+deltas = RosterDeltaLog()
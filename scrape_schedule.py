@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fixture-aware scrape scheduling.
+
+The scraper loop used to guess match windows from the UK weekday and hour,
+polling every GAMEDAY_INTERVAL across whole weekend afternoons whether or not
+a match was on. The plan here comes from the fixtures themselves:
+
+- live: a fixture has kicked off and is not finished_provisional -> poll fast
+- bonus: a fixture is finished_provisional but not finished (bonus and final
+  stats still pending) -> poll fast
+- idle: nothing in play -> sleep until the next kickoff or gameweek
+  deadline, capped at idle_interval so prices and team names still refresh
+
+The current gameweek is the last event whose deadline has passed, so the loop
+only needs the (cached) bootstrap events, not a fresh bootstrap download.
+
+Usage:
+  from scrape_schedule import plan, current_gameweek
+  gw = current_gameweek(snapshot.events, time.time())
+  p = plan(snapshot.events, fixtures, time.time(), live_interval=30, idle_interval=3600)
+  time.sleep(p.interval)
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Safety caps so a fixture whose flags never flip (stale data, abandoned
+# match) cannot hold the loop in fast mode forever
+MAX_MATCH_SECONDS = 3 * 3600        # kickoff -> finished_provisional
+MAX_BONUS_PENDING_SECONDS = 8 * 3600  # kickoff -> finished (bonus confirmed)
+KICKOFF_LEAD = 0                     # seconds before kickoff to wake up
+DEADLINE_LAG = 30 * 60               # picks for a new gameweek appear after its deadline
+
+
+class ScrapePlan(NamedTuple):
+    mode: str                   # "live", "bonus", "idle" or "unknown"
+    interval: float             # seconds until the next scrape
+    reason: str
+    gameweek: Optional[int] = None
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """FPL ISO timestamp ("2025-08-16T14:00:00Z") -> epoch seconds."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def deadline_of(event: Dict[str, Any]) -> Optional[float]:
+    epoch = event.get("deadline_time_epoch")
+    return float(epoch) if epoch else parse_time(event.get("deadline_time"))
+
+
+def current_gameweek(events: List[Dict[str, Any]], now: float) -> Optional[int]:
+    """The last event whose deadline has passed (None before the season starts)."""
+    current = None
+    for event in events:
+        deadline = deadline_of(event)
+        if deadline is not None and deadline <= now:
+            if current is None or event["id"] > current:
+                current = event["id"]
+    return current
+
+
+def fixture_state(fixture: Dict[str, Any], now: float) -> str:
+    """'upcoming', 'live', 'bonus' (result in, bonus pending) or 'done'."""
+    kickoff = parse_time(fixture.get("kickoff_time"))
+    if kickoff is None or kickoff > now:
+        return "upcoming"
+    if fixture.get("finished"):
+        return "done"
+    if not fixture.get("finished_provisional"):
+        return "live" if now - kickoff < MAX_MATCH_SECONDS else "done"
+    return "bonus" if now - kickoff < MAX_BONUS_PENDING_SECONDS else "done"
+
+
+def plan(events: List[Dict[str, Any]], fixtures: List[Dict[str, Any]], now: float,
+         live_interval: float, idle_interval: float) -> ScrapePlan:
+    gw = current_gameweek(events, now)
+
+    states = [(fixture_state(f, now), f) for f in fixtures if f.get("event")]
+    live = [f for state, f in states if state == "live"]
+    if live:
+        return ScrapePlan("live", live_interval, f"{len(live)} fixture(s) in play", gw)
+    pending = [f for state, f in states if state == "bonus"]
+    if pending:
+        return ScrapePlan("bonus", live_interval, f"bonus pending for {len(pending)} fixture(s)", gw)
+
+    # Idle: wake for the next kickoff or just after the next deadline, whichever is first
+    wake_at, reason = now + idle_interval, "idle refresh"
+    kickoffs = [k for k in (parse_time(f.get("kickoff_time")) for _, f in states) if k and k > now]
+    if kickoffs and min(kickoffs) - KICKOFF_LEAD < wake_at:
+        wake_at, reason = min(kickoffs) - KICKOFF_LEAD, "next kickoff"
+    deadlines = [d + DEADLINE_LAG for d in (deadline_of(e) for e in events) if d and d + DEADLINE_LAG > now]
+    if deadlines and min(deadlines) < wake_at:
+        wake_at, reason = min(deadlines), "next gameweek deadline"
+    return ScrapePlan("idle", max(1.0, wake_at - now), reason, gw)
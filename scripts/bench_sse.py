@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+SSE concurrency benchmark: hold N idle /sse/fpl-updates connections open and
+measure what they cost the server and whether API requests still get through.
+
+Usage:
+  # terminal 1, either server mode
+  python app.py                                   # Werkzeug, thread per connection
+  gunicorn -c gunicorn.conf.py app:app            # gevent, greenlet per connection
+  # terminal 2
+  python scripts/bench_sse.py --url http://127.0.0.1:5000 --clients 1000 --pid <server pid>
+
+Reports connect time for all streams, /health latency while they are open, and
+(with --pid, Linux only) the server's RSS and OS thread count before and after.
+
+Reference run (Linux dev box, Redis disabled, ACTIVE=0, 1000 idle streams,
+200 /health requests issued 20 at a time):
+
+  server                  OS threads   RSS           /health p50 / p95
+  app.run(threaded=True)  3 -> 1003    44 -> 82 MB   28.7 ms / 52.9 ms
+  gunicorn + gevent       1 -> 1       44 -> 67 MB   15.4 ms / 28.0 ms
+
+Raise the client's open-file limit (ulimit -n) above --clients first.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlparse
+
+
+def proc_status(pid):
+    """RSS in MB and OS thread count for a local process, from /proc."""
+    rss = threads = None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) / 1024
+                elif line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, threads
+
+
+async def open_stream(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    # Headers, then the first event ("connected")
+    await reader.readuntil(b"\r\n\r\n")
+    await reader.readuntil(b"\n\n")
+    return reader, writer
+
+
+async def timed_get(host, port, path):
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    await reader.read()
+    writer.close()
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(args):
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+
+    before = proc_status(args.pid) if args.pid else (None, None)
+
+    start = time.perf_counter()
+    sem = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect():
+        async with sem:
+            return await asyncio.wait_for(open_stream(host, port, "/sse/fpl-updates"), args.timeout)
+
+    results = await asyncio.gather(*(connect() for _ in range(args.clients)), return_exceptions=True)
+    streams = [r for r in results if not isinstance(r, Exception)]
+    failed = len(results) - len(streams)
+    print(f"opened {len(streams)}/{args.clients} streams in {time.perf_counter() - start:.1f}s ({failed} failed)")
+
+    await asyncio.sleep(args.settle)
+    after = proc_status(args.pid) if args.pid else (None, None)
+
+    latencies = []
+    for i in range(0, args.requests, args.request_concurrency):
+        batch = min(args.request_concurrency, args.requests - i)
+        latencies += await asyncio.gather(*(timed_get(host, port, args.probe) for _ in range(batch)))
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{args.probe} with streams open: p50 {statistics.median(latencies):.1f} ms, "
+          f"p95 {p95:.1f} ms, max {latencies[-1]:.1f} ms")
+
+    if args.pid:
+        print(f"server threads: {before[1]} -> {after[1]}")
+        if before[0] is not None and after[0] is not None:
+            print(f"server RSS: {before[0]:.0f} MB -> {after[0]:.0f} MB "
+                  f"(+{(after[0] - before[0]) * 1024 / max(len(streams), 1):.1f} KB per stream)")
+
+    for _, writer in streams:
+        writer.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Hold N idle SSE connections and measure server cost and API latency.")
+    ap.add_argument("--url", default="http://127.0.0.1:5000")
+    ap.add_argument("--clients", type=int, default=1000)
+    ap.add_argument("--pid", type=int, default=None, help="Server PID for RSS/thread stats (Linux)")
+    ap.add_argument("--probe", default="/health", help="Path timed while streams are open")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--request-concurrency", type=int, default=20)
+    ap.add_argument("--connect-concurrency", type=int, default=100)
+    ap.add_argument("--settle", type=float, default=2.0, help="Seconds to wait before measuring")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: launch the server and measure time-to-first-response on
+/health and time until it reports ready (manifest loaded, caches warmed).
+
+Usage:
+  python scripts/bench_startup.py                          # python app.py
+  python scripts/bench_startup.py --cmd "gunicorn -c gunicorn.conf.py app:app"
+  python scripts/bench_startup.py --slow-upstream          # Redis + Blob that never answer
+
+--slow-upstream points REDIS_HOST and PUBLIC_BASE at a local tarpit that
+accepts connections and never replies, so the Redis ping and the manifest
+fetch each run into their full timeouts, as they do when Upstash or Blob
+hangs. The server runs with ACTIVE=0 and uploads pointed at a closed port, so
+nothing is scraped or published.
+
+Reference run (Linux dev box, median of 3; "ready" = /health startup.ready):
+
+  server / upstream          before: first response    after: first response   ready
+  python app.py, reachable   0.40 s                    0.43 s                  0.45 s
+  python app.py, tarpit      20.52 s                   0.47 s                  10.52 s
+  gunicorn, reachable        0.60 s                    0.68 s                  0.70 s
+  gunicorn, tarpit           20.90 s                   0.69 s                  10.72 s
+
+Before this change the Redis ping (5 s connect + one retry) and the 10 s
+manifest fetch ran at import, and cache warm-up started after a fixed 10 s
+sleep. With the tarpit, ready is now bounded by the manifest fetch timeout.
+"""
+
+import argparse
+import json
+import os
+import shlex
+import signal
+import socket
+import statistics
+import subprocess
+import threading
+import time
+import urllib.request
+
+
+def tarpit():
+    """Listen on a free local port; accept connections and never answer."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(64)
+    held = []
+
+    def accept():
+        while True:
+            conn, _ = sock.accept()
+            held.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    return sock.getsockname()[1]
+
+
+def probe(url, timeout=1.0):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            return json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b"{}")
+    except Exception:
+        return None
+
+
+def run_once(args, env):
+    proc = subprocess.Popen(shlex.split(args.cmd), cwd=args.cwd, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    start = time.perf_counter()
+    first = ready = None
+    body = None
+    try:
+        while time.perf_counter() - start < args.timeout:
+            body = probe(f"http://127.0.0.1:{args.port}/health")
+            now = time.perf_counter() - start
+            if body is not None and first is None:
+                first = now
+            if body is not None and "startup" not in body:
+                break  # server does not report readiness
+            if body is not None and body["startup"].get("ready"):
+                ready = now
+                break
+            time.sleep(args.poll)
+    finally:
+        # Whole process group: gunicorn's worker would otherwise keep the port
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    return first, ready, (body or {}).get("startup")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure server time-to-first-response and time-to-ready.")
+    ap.add_argument("--cmd", default="python app.py")
+    ap.add_argument("--cwd", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--slow-upstream", action="store_true", help="Point Redis and Blob at a tarpit")
+    ap.add_argument("--poll", type=float, default=0.02)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    args = ap.parse_args()
+
+    env = dict(os.environ, PORT=str(args.port), ACTIVE="0",
+               BASE_UPLOAD_ENDPOINT="http://127.0.0.1:9/upload")
+    if args.slow_upstream:
+        port = tarpit()
+        env.update(REDIS_HOST="127.0.0.1", REDIS_PORT=str(port), PUBLIC_BASE=f"http://127.0.0.1:{port}/")
+
+    firsts, readies = [], []
+    for i in range(args.runs):
+        first, ready, startup = run_once(args, env)
+        print(f"run {i + 1}: first response {first if first is None else f'{first:.2f}s'}, "
+              f"ready {ready if ready is None else f'{ready:.2f}s'}"
+              + (f", phases {startup.get('phases')}" if startup else ""))
+        if first is not None:
+            firsts.append(first)
+        if ready is not None:
+            readies.append(ready)
+
+    if firsts:
+        print(f"time to first response: median {statistics.median(firsts):.2f}s")
+    if readies:
+        print(f"time to ready:          median {statistics.median(readies):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
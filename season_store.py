@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Columnar season store for the roster CSVs.
+
+Each gameweek's fpl_rosters_points_gw{gw}.csv is ingested once into a segment
+of typed columns (int32 / int8 / float32 via the stdlib array module) plus a
+string table for names, and written to disk as one file that is memory-mapped
+on load. Columns are zero-copy memoryviews over the mapping, so a whole season
+costs a few MB of page cache instead of 38 x 39 string columns per parse, and
+a restart maps the files back in without re-parsing anything.
+
+Segments are replaced only when a gameweek's content hash changes, so the
+live gameweek is re-ingested on each new upload and finished gameweeks never
+are. TOTAL rows have element_id 0 and is_total set. Blank CSV cells read back
+as 0. At startup, gameweeks with no segment yet are ingested from the CSVs
+bundled in data/.
+
+Usage:
+  from season_store import season
+  season.ingest(gw, csv_bytes, digest)
+  seg = season.segment(gw)
+  points = seg.column("points_applied")          # memoryview of int32
+  for row in seg.total_rows():                   # one TOTAL row per manager
+      seg.string("manager_name", row)
+"""
+
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+STORE_DIR = os.getenv("SEASON_STORE_DIR", "/tmp/fpl-season")
+
+MAGIC = b"FPLSEG1\n"
+ALIGN = 8
+
+# Column schema: name -> array typecode. Strings are uint32 indexes into the
+# segment's string table; player_cost is stored in tenths like bank/total_value.
+INT_COLUMNS = [
+    "entry_id", "element_id", "multiplier",
+    "points_gw", "points_applied", "bench_points",
+    "transfer_cost", "event_transfers", "gross_points", "minutes",
+    "goals_scored", "assists", "clean_sheets", "saves", "bonus",
+    "yellow_cards", "red_cards", "own_goals", "penalties_saved", "penalties_missed",
+    "player_cost", "bank", "total_value",
+]
+FLAG_COLUMNS = ["is_total", "is_captain", "is_vice_captain", "fixture_started", "fixture_finished"]
+FLOAT_COLUMNS = ["value_ratio", "global_ownership", "global_captain_percent"]
+STRING_COLUMNS = [
+    "entry_team_name", "manager_name", "player", "position", "club",
+    "status", "opponent_team", "kickoff_time",
+]
+TENTHS_COLUMNS = {"player_cost"}
+
+SCHEMA: List[Tuple[str, str]] = (
+    [(c, "i") for c in INT_COLUMNS]
+    + [(c, "b") for c in FLAG_COLUMNS]
+    + [(c, "f") for c in FLOAT_COLUMNS]
+    + [(c, "I") for c in STRING_COLUMNS]
+)
+
+_GW_FILE = re.compile(r"fpl_rosters_points_gw(\d+)\.csv$")
+
+
+def _log(msg: str):
+    print(f"[season] {msg}", flush=True)
+
+
+def _num(value: Optional[str]) -> float:
+    if value in (None, ""):
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def _flag(value: Optional[str]) -> int:
+    return 1 if value in ("True", "true", "1") else 0
+
+
+def build_columns(csv_bytes: bytes) -> Tuple[int, Dict[str, array], List[str]]:
+    """Parse one roster CSV into typed columns and an interned string table."""
+    columns = {name: array(code) for name, code in SCHEMA}
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        idx = string_ids.get(value)
+        if idx is None:
+            idx = string_ids[value] = len(strings)
+            strings.append(value)
+        return idx
+
+    rows = 0
+    for row in csv.DictReader(io.StringIO(csv_bytes.decode("utf-8"))):
+        if not row.get("manager_name"):
+            continue
+        rows += 1
+        is_total = row.get("player") == "TOTAL"
+        for name in INT_COLUMNS:
+            value = _num(row.get(name))
+            columns[name].append(round(value * 10) if name in TENTHS_COLUMNS else int(value))
+        columns["is_total"].append(1 if is_total else 0)
+        for name in FLAG_COLUMNS[1:]:
+            columns[name].append(_flag(row.get(name)))
+        for name in FLOAT_COLUMNS:
+            columns[name].append(_num(row.get(name)))
+        for name in STRING_COLUMNS:
+            columns[name].append(intern((row.get(name) or "").strip()))
+    return rows, columns, strings
+
+
+def write_segment(path: str, gw: int, digest: str, csv_bytes: bytes) -> int:
+    """Write a segment file atomically; returns the row count."""
+    rows, columns, strings = build_columns(csv_bytes)
+
+    blocks = []
+    layout = []
+    offset = 0
+    for name, code in SCHEMA:
+        data = columns[name].tobytes()
+        layout.append({"name": name, "type": code, "offset": offset, "length": len(data)})
+        pad = -len(data) % ALIGN
+        blocks.append(data + b"\0" * pad)
+        offset += len(data) + pad
+
+    header = json.dumps({"gameweek": gw, "hash": digest, "rows": rows,
+                         "columns": layout, "strings": strings}).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % ALIGN)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for block in blocks:
+                f.write(block)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return rows
+
+
+class GameweekSegment:
+    """One gameweek's columns, memory-mapped read-only from its segment file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a season segment: {path}")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mm[start:start + header_len])
+        base = start + header_len
+
+        self.path = path
+        self.gameweek: int = header["gameweek"]
+        self.hash: str = header["hash"]
+        self.rows: int = header["rows"]
+        # Interned so names shared across gameweeks are stored once
+        self.strings: List[str] = [sys.intern(s) for s in header["strings"]]
+
+        view = memoryview(self._mm)
+        self._columns: Dict[str, memoryview] = {}
+        for col in header["columns"]:
+            begin = base + col["offset"]
+            self._columns[col["name"]] = view[begin:begin + col["length"]].cast(col["type"])
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mm)
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    def string(self, name: str, row: int) -> str:
+        return self.strings[self._columns[name][row]]
+
+    def total_rows(self) -> Iterator[int]:
+        totals = self._columns["is_total"]
+        return (i for i in range(self.rows) if totals[i])
+
+
+class SeasonStore:
+    def __init__(self, directory: str = STORE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._segments: Dict[int, GameweekSegment] = {}
+        # One writer per gameweek: the check-and-write in ingest() runs under it
+        self._gw_locks: Dict[int, threading.Lock] = {}
+        # gw -> digest last ingested by an authoritative writer in this process
+        self._pinned: Dict[int, str] = {}
+        self.ingested = 0
+
+    def _path(self, gw: int) -> str:
+        return os.path.join(self.directory, f"gw{gw}.seg")
+
+    def open(self) -> int:
+        """Map every segment already on disk (e.g. after a restart). Returns how many."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        loaded = 0
+        for name in names:
+            m = re.match(r"gw(\d+)\.seg$", name)
+            if not m:
+                continue
+            try:
+                seg = GameweekSegment(os.path.join(self.directory, name))
+            except (OSError, ValueError) as e:
+                _log(f"Skipping {name}: {e}")
+                continue
+            with self._lock:
+                self._segments[seg.gameweek] = seg
+            loaded += 1
+        return loaded
+
+    def _gw_lock(self, gw: int) -> threading.Lock:
+        with self._lock:
+            return self._gw_locks.setdefault(gw, threading.Lock())
+
+    def ingest(self, gw: int, csv_bytes: bytes, digest: str, authoritative: bool = True) -> bool:
+        """
+        (Re)build a gameweek's segment unless it already holds this content. Returns True if rebuilt.
+
+        The scraper and admin uploads ingest authoritatively (new content, before
+        the manifest points at it). Readers catching up from a manifest copy pass
+        authoritative=False: they may hold an older hash, so they never replace a
+        segment an authoritative writer installed with different content.
+        """
+        with self._gw_lock(gw):
+            with self._lock:
+                current = self._segments.get(gw)
+                pinned = self._pinned.get(gw)
+            if current is not None and current.hash == digest:
+                if authoritative:
+                    with self._lock:
+                        self._pinned[gw] = digest
+                return False
+            if not authoritative and pinned is not None and pinned != digest:
+                return False
+            path = self._path(gw)
+            rows = write_segment(path, gw, digest, csv_bytes)
+            seg = GameweekSegment(path)
+            with self._lock:
+                # The old mapping stays valid for readers still holding it
+                self._segments[gw] = seg
+                if authoritative:
+                    self._pinned[gw] = digest
+                self.ingested += 1
+        _log(f"Ingested GW{gw} ({rows} rows, {seg.nbytes} bytes)")
+        return True
+
+    def ingest_directory(self, directory: str) -> int:
+        """
+        Ingest every fpl_rosters_points_gw*.csv in a directory for a gameweek that
+        has no segment yet (bootstrap from bundled files). A segment already
+        mapped from disk came from a manifest and is never replaced from here.
+        """
+        count = 0
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            return 0
+        for name in names:
+            m = _GW_FILE.search(name)
+            if not m or self.has(int(m.group(1)), None):
+                continue
+            with open(os.path.join(directory, name), "rb") as f:
+                data = f.read()
+            if self.ingest(int(m.group(1)), data, hashlib.md5(data).hexdigest(), authoritative=False):
+                count += 1
+        return count
+
+    def has(self, gw: int, digest: Optional[str]) -> bool:
+        with self._lock:
+            seg = self._segments.get(gw)
+        return seg is not None and (digest is None or seg.hash == digest)
+
+    def segment(self, gw: int) -> Optional[GameweekSegment]:
+        with self._lock:
+            return self._segments.get(gw)
+
+    def gameweeks(self) -> List[int]:
+        with self._lock:
+            return sorted(self._segments)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = dict(self._segments)
+        return {
+            "directory": self.directory,
+            "gameweeks": sorted(segments),
+            "rows": sum(s.rows for s in segments.values()),
+            "bytes": sum(s.nbytes for s in segments.values()),
+            "ingested": self.ingested,
+        }
+
+
+# Process-wide store, fed by the scraper loop and the historical loader
+season = SeasonStore()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+In-process SSE broadcast hub.
+
+One subscriber thread per process holds the only Redis pub/sub connection and
+fans messages out to every connected browser through a bounded queue per
+client. Before this, every EventSource opened its own Upstash subscription
+(up to fly.toml's hard_limit of 250) and heartbeats only went out when a Redis
+message happened to arrive, so idle proxies dropped quiet connections.
+
+- Heartbeats are timer driven: a client waiting longer than HEARTBEAT_INTERVAL
+  gets one regardless of Redis traffic.
+- A client whose queue fills up (a stalled tab or a dead socket the server has
+  not noticed yet) is disconnected instead of buffering without bound; the
+  browser's EventSource reconnects and catches up.
+- Messages arriving within COALESCE_WINDOW are handed to a coalesce function
+  first, so a burst becomes one push.
+
+Without Redis (redis_client=None) the hub still serves clients; publishers in
+this process call publish(), which coalesces over the same window as the
+subscriber before broadcasting. attach() adds a connection later, e.g. once a
+background connect succeeds.
+
+Client streams only block on their queue, so under gunicorn's gevent worker
+(see gunicorn.conf.py) each idle connection is a greenlet, not an OS thread.
+
+Usage:
+  hub = BroadcastHub(redis_client, "fpl_updates", coalesce=my_coalesce)
+  hub.start()
+  hub.publish(payload)                       # without Redis: local, coalesced
+  return Response(hub.stream(), mimetype="text/event-stream")
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+CLIENT_QUEUE_SIZE = int(os.getenv("SSE_CLIENT_QUEUE_SIZE", "32"))
+HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_SECONDS", "25"))
+COALESCE_WINDOW = float(os.getenv("SSE_COALESCE_SECONDS", "0.5"))
+PING_INTERVAL = 60  # seconds; a silently dead subscription raises on ping and is reopened
+
+_CLOSE = object()  # queue sentinel: the hub dropped this client
+
+
+def _log(msg: str):
+    print(f"[sse-hub] {msg}", flush=True)
+
+
+def sse_event(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+class _Client:
+    __slots__ = ("queue", "connected_at", "dropped")
+
+    def __init__(self, size: int):
+        self.queue: "queue.Queue" = queue.Queue(maxsize=size)
+        self.connected_at = time.time()
+        self.dropped = False
+
+
+class BroadcastHub:
+    def __init__(self, redis_client, channel: str,
+                 coalesce: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = None,
+                 queue_size: int = CLIENT_QUEUE_SIZE,
+                 heartbeat: float = HEARTBEAT_INTERVAL,
+                 coalesce_window: float = COALESCE_WINDOW):
+        self.redis = redis_client
+        self.channel = channel
+        self.coalesce = coalesce
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.coalesce_window = coalesce_window
+        self._clients: set = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Local publishes waiting out the coalesce window (publish() without Redis)
+        self._local: List[Dict[str, Any]] = []
+        self._local_timer: Optional[threading.Timer] = None
+        self.connected = False
+        self.received = 0
+        self.broadcasts = 0
+        self.coalesced = 0
+        self.dropped_clients = 0
+
+    # ---- client side ----
+    def register(self) -> _Client:
+        client = _Client(self.queue_size)
+        with self._lock:
+            self._clients.add(client)
+        return client
+
+    def unregister(self, client: _Client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def stream(self) -> Iterator[str]:
+        """SSE generator for one browser connection."""
+        self.start()
+        client = self.register()
+        try:
+            yield sse_event({'type': 'connected', 'timestamp': int(time.time())})
+            while not self._stop.is_set():
+                try:
+                    item = client.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield sse_event({'type': 'heartbeat', 'timestamp': int(time.time())})
+                    continue
+                if item is _CLOSE:
+                    return
+                yield item
+        finally:
+            self.unregister(client)
+
+    # ---- fan-out ----
+    def broadcast(self, payload: Dict[str, Any]):
+        """Queue one event for every client; clients that cannot keep up are dropped."""
+        frame = sse_event(payload)
+        with self._lock:
+            clients = list(self._clients)
+        slow = []
+        for client in clients:
+            try:
+                client.queue.put_nowait(frame)
+            except queue.Full:
+                slow.append(client)
+        for client in slow:
+            self._drop(client)
+        self.broadcasts += 1
+
+    def _drop(self, client: _Client):
+        self.unregister(client)
+        if client.dropped:
+            return
+        client.dropped = True
+        self.dropped_clients += 1
+        # Make room for the close sentinel so the stream generator exits promptly
+        try:
+            while True:
+                client.queue.get_nowait()
+        except queue.Empty:
+            pass
+        client.queue.put_nowait(_CLOSE)
+
+    def publish(self, payload: Dict[str, Any]):
+        """Broadcast a message published in this process, coalesced like subscriber messages."""
+        if not self.coalesce or self.coalesce_window <= 0:
+            self.broadcast(payload)
+            return
+        with self._lock:
+            self._local.append(payload)
+            if self._local_timer is not None:
+                return
+            self._local_timer = threading.Timer(self.coalesce_window, self._flush_local)
+            self._local_timer.daemon = True
+            self._local_timer.start()
+
+    def _flush_local(self):
+        with self._lock:
+            pending, self._local, self._local_timer = self._local, [], None
+        if pending:
+            self._flush(pending)
+
+    def _flush(self, pending: List[Dict[str, Any]]):
+        batch = self.coalesce(pending) if self.coalesce else pending
+        self.coalesced += len(pending) - len(batch)
+        for payload in batch:
+            self.broadcast(payload)
+
+    # ---- Redis subscriber ----
+    def start(self):
+        if self.redis is None or (self._thread and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sse-hub", daemon=True)
+            self._thread.start()
+
+    def attach(self, redis_client):
+        """Hand over a Redis connection made after construction and start subscribing."""
+        self.redis = redis_client
+        self.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.connected = True
+                backoff = 1
+                _log(f"Subscribed to {self.channel}")
+                self._listen(pubsub)
+            except Exception as e:
+                self.connected = False
+                _log(f"Subscriber error: {e}, reconnecting in {backoff}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                self.connected = False
+                if pubsub:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _listen(self, pubsub):
+        pending: List[Dict[str, Any]] = []
+        first_at = 0.0
+        last_ping = time.time()
+        while not self._stop.is_set():
+            if time.time() - last_ping > PING_INTERVAL:
+                pubsub.ping()
+                last_ping = time.time()
+            wait = self.coalesce_window if pending else 1.0
+            message = pubsub.get_message(timeout=wait)
+            if message and message.get('type') == 'message':
+                self.received += 1
+                try:
+                    payload = json.loads(message['data'])
+                except (TypeError, ValueError):
+                    continue
+                if not pending:
+                    first_at = time.time()
+                pending.append(payload)
+            if pending and time.time() - first_at >= self.coalesce_window:
+                self._flush(pending)
+                pending = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            clients = len(self._clients)
+        return {
+            'subscriber': 'connected' if self.connected else 'disconnected',
+            'clients': clients,
+            'received': self.received,
+            'broadcasts': self.broadcasts,
+            'coalesced': self.coalesced,
+            'dropped_clients': self.dropped_clients,
+        }
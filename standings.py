@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+League standings cube: manager x gameweek x metric, materialized from the
+season store's TOTAL rows so the dashboard does not rebuild cumulative
+standings, rank movement, bench and hit totals from every CSV on each load.
+
+Each metric is one flat array per gameweek (one slot per manager), and every
+derived metric is an element-wise operation over those vectors: cumulative =
+previous cumulative + this gameweek, rank = competition ranking of the
+cumulative points vector, rank_change = previous rank - rank. A refresh only
+recomputes from the first gameweek whose segment hash changed, so a live
+scrape touches the latest gameweek's vectors and nothing before it.
+
+Usage:
+  from standings import cube
+  cube.refresh({gw: season.segment(gw) for gw in gameweeks}, generation=manifest["timestamp"])
+  payload = cube.payload()      # {"version", "gameweeks", "managers", "metrics", "standings"}
+"""
+
+import hashlib
+import threading
+from array import array
+from typing import Any, Dict, List, Optional
+
+# Per-gameweek values read from each manager's TOTAL row
+BASE_METRICS = ["points", "gross_points", "transfer_cost", "bench_points", "event_transfers"]
+SOURCE_COLUMNS = {"points": "points_applied"}  # net of hits; others share the column name
+# Running totals over the season
+CUMULATIVE_METRICS = {"total_points": "points", "total_bench_points": "bench_points",
+                      "total_transfer_cost": "transfer_cost"}
+
+
+def _log(msg: str):
+    print(f"[standings] {msg}", flush=True)
+
+
+def add(a: array, b: array) -> array:
+    return array("i", map(int.__add__, a, b))
+
+
+def subtract(a: array, b: array) -> array:
+    return array("i", map(int.__sub__, a, b))
+
+
+def competition_rank(values: array) -> array:
+    """Rank descending with ties sharing the best rank ("1224")."""
+    order = sorted(range(len(values)), key=values.__getitem__, reverse=True)
+    ranks = array("i", bytes(4 * len(values)))
+    for pos, i in enumerate(order):
+        if pos and values[i] == values[order[pos - 1]]:
+            ranks[i] = ranks[order[pos - 1]]
+        else:
+            ranks[i] = pos + 1
+    return ranks
+
+
+class StandingsCube:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.gameweeks: List[int] = []
+        self.hashes: Dict[int, str] = {}
+        self.entries: List[int] = []
+        self.names: Dict[int, Dict[str, str]] = {}
+        self.vectors: Dict[str, Dict[int, array]] = {}
+        self.version: Optional[str] = None
+        self.generation: Optional[int] = None  # manifest timestamp the cube was built from
+        self._payload: Optional[Dict[str, Any]] = None
+        self.rebuilt_gameweeks = 0
+
+    @staticmethod
+    def _base_vectors(seg, slots: Dict[int, int]) -> Dict[str, array]:
+        """One gameweek's TOTAL-row metrics, laid out in manager-slot order."""
+        out = {m: array("i", bytes(4 * len(slots))) for m in BASE_METRICS}
+        entry_ids = seg.column("entry_id")
+        columns = {m: seg.column(SOURCE_COLUMNS.get(m, m)) for m in BASE_METRICS}
+        for i in seg.total_rows():
+            slot = slots[entry_ids[i]]
+            for m, col in columns.items():
+                out[m][slot] = col[i]
+        return out
+
+    def _superseded(self, generation: Optional[int]) -> bool:
+        return generation is not None and self.generation is not None and generation < self.generation
+
+    def refresh(self, segments: Dict[int, Any], generation: Optional[int] = None) -> bool:
+        """
+        Bring the cube up to date with these gameweek segments (every gameweek the
+        manifest lists; one missing from the dict is dropped). Returns True if
+        anything changed. Raises ValueError for a None segment rather than
+        treating a failed load as a removed gameweek. generation orders
+        concurrent refreshes: a result from an older manifest than the one the
+        cube already holds is discarded instead of overwriting it.
+        """
+        failed = sorted(gw for gw, seg in segments.items() if seg is None)
+        if failed:
+            raise ValueError(f"No segment for GW{', GW'.join(map(str, failed))}")
+        gameweeks = sorted(segments)
+        hashes = {gw: segments[gw].hash for gw in gameweeks}
+
+        with self._lock:
+            if self._superseded(generation) or (gameweeks == self.gameweeks and hashes == self.hashes):
+                return False
+            old_gws, old_hashes = self.gameweeks, self.hashes
+            entries = list(self.entries)
+            vectors = {name: dict(per_gw) for name, per_gw in self.vectors.items()}
+            names = dict(self.names)
+
+        # First gameweek that differs from what the cube holds; everything before it is reused
+        start = 0
+        while (start < len(gameweeks) and start < len(old_gws) and gameweeks[start] == old_gws[start]
+               and hashes[gameweeks[start]] == old_hashes[old_gws[start]]):
+            start += 1
+
+        # A manager seen for the first time changes the slot layout: rebuild from scratch
+        known = set(entries)
+        for gw in gameweeks[start:]:
+            seg = segments[gw]
+            entry_ids = seg.column("entry_id")
+            for i in seg.total_rows():
+                eid = entry_ids[i]
+                names[eid] = {"manager_name": seg.string("manager_name", i),
+                              "team_name": seg.string("entry_team_name", i)}
+                if eid not in known:
+                    known.add(eid)
+                    entries.append(eid)
+                    start = 0
+        if start == 0:
+            entries.sort()
+            vectors = {}
+        slots = {eid: n for n, eid in enumerate(entries)}
+
+        for idx in range(start, len(gameweeks)):
+            gw = gameweeks[idx]
+            for name, vec in self._base_vectors(segments[gw], slots).items():
+                vectors.setdefault(name, {})[gw] = vec
+            prev = gameweeks[idx - 1] if idx else None
+            for name, base in CUMULATIVE_METRICS.items():
+                current = vectors[base][gw]
+                vectors.setdefault(name, {})[gw] = add(vectors[name][prev], current) if prev else current
+            rank = competition_rank(vectors["total_points"][gw])
+            vectors.setdefault("rank", {})[gw] = rank
+            vectors.setdefault("rank_change", {})[gw] = (
+                subtract(vectors["rank"][prev], rank) if prev else array("i", bytes(4 * len(entries))))
+
+        # Drop gameweeks that are no longer present
+        for per_gw in vectors.values():
+            for gw in [g for g in per_gw if g not in hashes]:
+                del per_gw[gw]
+
+        version = hashlib.md5(",".join(f"{gw}:{hashes[gw]}" for gw in gameweeks).encode()).hexdigest()[:16]
+        with self._lock:
+            if self._superseded(generation):
+                _log(f"Discarded refresh from manifest {generation}: cube already at {self.generation}")
+                return False
+            if generation is not None:
+                self.generation = generation
+            self.gameweeks, self.hashes, self.entries = gameweeks, hashes, entries
+            self.names, self.vectors, self.version = names, vectors, version
+            self._payload = None
+            self.rebuilt_gameweeks += len(gameweeks) - start
+        _log(f"Refreshed GW{gameweeks[start] if start < len(gameweeks) else '-'}+ "
+             f"({len(gameweeks) - start} of {len(gameweeks)} gameweeks recomputed, {len(entries)} managers)")
+        return True
+
+    def payload(self) -> Dict[str, Any]:
+        """
+        The whole cube in one response: metrics[name][manager_index] is that
+        manager's value per gameweek (same order as gameweeks), plus the
+        current table sorted by rank.
+        """
+        with self._lock:
+            if self._payload is not None:
+                return self._payload
+            gameweeks, entries, vectors = self.gameweeks, self.entries, self.vectors
+            managers = [{"entry_id": eid, **self.names.get(eid, {})} for eid in entries]
+            metrics = {name: [[per_gw[gw][slot] for gw in gameweeks] for slot in range(len(entries))]
+                       for name, per_gw in vectors.items()}
+
+            standings = []
+            if gameweeks:
+                latest = gameweeks[-1]
+                for slot, manager in enumerate(managers):
+                    standings.append({
+                        **manager,
+                        "rank": vectors["rank"][latest][slot],
+                        "rank_change": vectors["rank_change"][latest][slot],
+                        "total_points": vectors["total_points"][latest][slot],
+                        "gameweek_points": vectors["points"][latest][slot],
+                        "total_bench_points": vectors["total_bench_points"][latest][slot],
+                        "total_transfer_cost": vectors["total_transfer_cost"][latest][slot],
+                    })
+                standings.sort(key=lambda s: (s["rank"], s.get("manager_name", "")))
+
+            self._payload = {
+                "version": self.version,
+                "gameweeks": gameweeks,
+                "managers": managers,
+                "metrics": metrics,
+                "standings": standings,
+            }
+            return self._payload
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self.version,
+                "gameweeks": len(self.gameweeks),
+                "managers": len(self.entries),
+                "rebuilt_gameweeks": self.rebuilt_gameweeks,
+            }
+
+
+# Process-wide cube, refreshed at warm-up and after each scrape or upload
+cube = StandingsCube()
@@ -0,0 +1,153 @@
+"""resolve_auto_subs: FPL's automatic substitution and vice-captain rules."""
+
+from fpl_scrape_rosters import resolve_auto_subs
+
+GK, DEF, MID, FWD = 1, 2, 3, 4
+
+# 4-4-2 with a GK / DEF / MID / FWD bench, in pick position order
+FOUR_FOUR_TWO = [GK, DEF, DEF, DEF, DEF, MID, MID, MID, MID, FWD, FWD, GK, DEF, MID, FWD]
+
+
+def squad(types=FOUR_FOUR_TWO, minutes=None, pending=(), captain=10, vice=11, multipliers=None):
+    """
+    resolve_auto_subs arguments for a squad whose element ids are their pick
+    positions, each on its own team. Everyone played 90 minutes and every
+    fixture is finished unless minutes / pending (unfinished elements) say otherwise.
+    """
+    minutes = minutes or {}
+    multipliers = multipliers or {}
+    picks, elements, live, fixtures = [], {}, {}, {}
+    for position, element_type in enumerate(types, start=1):
+        multiplier = 1 if position <= 11 else 0
+        if position == captain:
+            multiplier = 2
+        picks.append({
+            "element": position,
+            "position": position,
+            "multiplier": multipliers.get(position, multiplier),
+            "is_captain": position == captain,
+            "is_vice_captain": position == vice,
+        })
+        elements[position] = {"team": position, "element_type": element_type}
+        live[position] = {"minutes": minutes.get(position, 90)}
+        finished = position not in pending
+        fixtures[position] = [{"team_h": position, "team_a": 100 + position, "started": finished,
+                               "finished": finished, "kickoff_time": "2025-01-01T15:00:00Z"}]
+    return picks, elements, live, fixtures
+
+
+def changed(result, picks):
+    """Only the entries resolve_auto_subs changed from the picks' own multipliers."""
+    original = {p["element"]: (p["multiplier"], "") for p in picks}
+    return {el: value for el, value in result.items() if value != original[el]}
+
+
+def test_everyone_played_changes_nothing():
+    picks, elements, live, fixtures = squad()
+    assert changed(resolve_auto_subs(picks, elements, live, fixtures), picks) == {}
+
+
+def test_first_eligible_bench_player_comes_on():
+    picks, elements, live, fixtures = squad(minutes={6: 0})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert changed(result, picks) == {6: (0, "out"), 13: (1, "in")}
+
+
+def test_formation_minimum_skips_bench_player_who_would_break_it():
+    # 3-5-2: losing a defender may only be covered by a defender
+    types = [GK, DEF, DEF, DEF, MID, MID, MID, MID, MID, FWD, FWD, GK, MID, DEF, FWD]
+    picks, elements, live, fixtures = squad(types=types, minutes={2: 0})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert changed(result, picks) == {2: (0, "out"), 14: (1, "in")}
+
+
+def test_no_sub_when_no_bench_player_keeps_the_formation():
+    types = [GK, DEF, DEF, DEF, MID, MID, MID, MID, MID, FWD, FWD, GK, MID, MID, FWD]
+    picks, elements, live, fixtures = squad(types=types, minutes={2: 0})
+    assert changed(resolve_auto_subs(picks, elements, live, fixtures), picks) == {}
+
+
+def test_goalkeeper_only_replaced_by_bench_goalkeeper():
+    picks, elements, live, fixtures = squad(minutes={1: 0})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert changed(result, picks) == {1: (0, "out"), 12: (1, "in")}
+
+    picks, elements, live, fixtures = squad(minutes={1: 0, 12: 0})
+    assert changed(resolve_auto_subs(picks, elements, live, fixtures), picks) == {}
+
+
+def test_outfield_player_never_replaced_by_bench_goalkeeper():
+    picks, elements, live, fixtures = squad(minutes={2: 0})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert result[12] == (0, "")
+    assert changed(result, picks) == {2: (0, "out"), 13: (1, "in")}
+
+
+def test_starter_still_to_play_is_not_subbed():
+    picks, elements, live, fixtures = squad(minutes={6: 0}, pending={6})
+    assert changed(resolve_auto_subs(picks, elements, live, fixtures), picks) == {}
+
+
+def test_bench_player_yet_to_play_blocks_those_behind():
+    picks, elements, live, fixtures = squad(minutes={6: 0, 13: 0}, pending={13})
+    assert changed(resolve_auto_subs(picks, elements, live, fixtures), picks) == {}
+
+
+def test_bench_player_who_did_not_play_is_skipped():
+    picks, elements, live, fixtures = squad(minutes={6: 0, 13: 0})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert changed(result, picks) == {6: (0, "out"), 14: (1, "in")}
+
+
+def test_each_bench_player_used_once():
+    picks, elements, live, fixtures = squad(minutes={6: 0, 7: 0})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert changed(result, picks) == {6: (0, "out"), 13: (1, "in"), 7: (0, "out"), 14: (1, "in")}
+
+
+def test_vice_captain_takes_the_armband():
+    picks, elements, live, fixtures = squad(minutes={10: 0})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert result[11] == (2, "")
+    assert result[10] == (0, "out")
+    assert result[13] == (1, "in")
+
+
+def test_vice_captain_keeps_triple_captain_multiplier():
+    picks, elements, live, fixtures = squad(minutes={10: 0}, multipliers={10: 3})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert result[11] == (3, "")
+
+
+def test_no_promotion_while_captain_may_still_play():
+    picks, elements, live, fixtures = squad(minutes={10: 0}, pending={10})
+    assert changed(resolve_auto_subs(picks, elements, live, fixtures), picks) == {}
+
+
+def test_no_promotion_when_vice_captain_did_not_play_either():
+    picks, elements, live, fixtures = squad(minutes={10: 0, 11: 0})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert result[10] == (0, "out")
+    assert result[11] == (0, "out")
+    assert result[13] == (1, "in")
+    assert result[15] == (1, "in")  # the bench MID would leave no forward
+
+
+def test_bench_boost_makes_no_subs_but_moves_the_armband():
+    multipliers = {12: 1, 13: 1, 14: 1, 15: 1}
+    picks, elements, live, fixtures = squad(minutes={6: 0, 10: 0}, multipliers=multipliers)
+    result = resolve_auto_subs(picks, elements, live, fixtures, bench_boost=True)
+    assert changed(result, picks) == {10: (1, ""), 11: (2, "")}
+    assert all(result[el] == (1, "") for el in (6, 12, 13, 14, 15))
+
+
+def test_settled_picks_pass_through():
+    # FPL has already subbed 6 for 13 and 10 for 14, and moved the triple captaincy to the vice
+    picks, elements, live, fixtures = squad(minutes={6: 0, 10: 0},
+                                            multipliers={6: 0, 13: 1, 10: 0, 14: 1, 11: 3})
+    result = resolve_auto_subs(picks, elements, live, fixtures)
+    assert result[11] == (3, "")
+    assert result[10] == (0, "out")
+    assert result[6] == (0, "out")
+    assert result[13] == (1, "in")
+    assert result[14] == (1, "in")
@@ -0,0 +1,103 @@
+"""bonus_from_bps and provisional_bonus: live bonus points from BPS."""
+
+from fpl_scrape_rosters import bonus_from_bps, provisional_bonus
+
+
+def explain(fixture, bps, minutes=90, bonus=0):
+    """One element's explain block for a fixture, as in event/{gw}/live."""
+    stats = [
+        {"identifier": "minutes", "points": 0, "value": minutes},
+        {"identifier": "bps", "points": 0, "value": bps},
+    ]
+    if bonus:
+        stats.append({"identifier": "bonus", "points": bonus, "value": bonus})
+    return {"fixture": fixture, "stats": stats}
+
+
+def element(element_id, *blocks):
+    return {"id": element_id, "explain": list(blocks)}
+
+
+def fixture(fixture_id, started=True, bps=None, bonus=None):
+    """A fixtures?event= entry; bps / bonus are the home side's {element: value}."""
+    stats = []
+    if bps is not None:
+        stats.append({"identifier": "bps", "h": [{"element": el, "value": v} for el, v in bps.items()], "a": []})
+    if bonus is not None:
+        stats.append({"identifier": "bonus", "h": [{"element": el, "value": v} for el, v in bonus.items()], "a": []})
+    return {"id": fixture_id, "started": started, "stats": stats}
+
+
+# ---- bonus_from_bps ----
+def test_top_three_get_three_two_one():
+    assert bonus_from_bps({1: 50, 2: 40, 3: 30, 4: 20}) == {1: 3, 2: 2, 3: 1}
+
+
+def test_tie_for_first_is_three_three_one():
+    assert bonus_from_bps({1: 50, 2: 50, 3: 40, 4: 30}) == {1: 3, 2: 3, 3: 1}
+
+
+def test_tie_for_second_is_three_two_two():
+    assert bonus_from_bps({1: 50, 2: 40, 3: 40, 4: 30}) == {1: 3, 2: 2, 3: 2}
+
+
+def test_three_way_tie_for_first_is_three_three_three():
+    assert bonus_from_bps({1: 50, 2: 50, 3: 50, 4: 40}) == {1: 3, 2: 3, 3: 3}
+
+
+def test_tie_for_third_shares_one():
+    assert bonus_from_bps({1: 50, 2: 40, 3: 30, 4: 30, 5: 20}) == {1: 3, 2: 2, 3: 1, 4: 1}
+
+
+def test_fewer_than_three_players():
+    assert bonus_from_bps({1: 10}) == {1: 3}
+    assert bonus_from_bps({}) == {}
+
+
+# ---- provisional_bonus ----
+def test_ranks_each_started_fixture_from_explain():
+    live = {"elements": [element(1, explain(10, 40)), element(2, explain(10, 30)),
+                         element(3, explain(10, 20)), element(4, explain(10, 10))]}
+    assert provisional_bonus(live, [fixture(10)]) == {1: 3, 2: 2, 3: 1}
+
+
+def test_fixtures_not_started_are_ignored():
+    live = {"elements": [element(1, explain(10, 40)), element(2, explain(11, 30))]}
+    assert provisional_bonus(live, [fixture(10), fixture(11, started=False)]) == {1: 3}
+
+
+def test_players_without_minutes_are_not_ranked():
+    live = {"elements": [element(1, explain(10, 40)), element(2, explain(10, 99, minutes=0))]}
+    assert provisional_bonus(live, [fixture(10)]) == {1: 3}
+
+
+def test_double_gameweek_player_ranked_in_each_fixture():
+    live = {"elements": [
+        element(1, explain(10, 40), explain(11, 25)),  # first in 10, second in 11
+        element(2, explain(10, 30)),
+        element(3, explain(11, 50)),
+        element(4, explain(11, 10)),
+    ]}
+    assert provisional_bonus(live, [fixture(10), fixture(11)]) == {1: 5, 2: 2, 3: 3, 4: 1}
+
+
+def test_bonus_confirmed_in_explain_adds_nothing():
+    live = {"elements": [element(1, explain(10, 40, bonus=3)), element(2, explain(10, 30, bonus=2)),
+                         element(3, explain(11, 20))]}
+    assert provisional_bonus(live, [fixture(10), fixture(11)]) == {3: 3}
+
+
+def test_bonus_confirmed_in_fixture_stats_adds_nothing():
+    live = {"elements": [element(1, explain(10, 40)), element(2, explain(10, 30))]}
+    assert provisional_bonus(live, [fixture(10, bonus={1: 3, 2: 2})]) == {}
+
+
+def test_fixture_bps_used_when_explain_has_no_block():
+    live = {"elements": [element(1, explain(10, 40))]}
+    fixtures = [fixture(10), fixture(11, bps={5: 30, 6: 20, 7: 10, 8: 5})]
+    assert provisional_bonus(live, fixtures) == {1: 3, 5: 3, 6: 2, 7: 1}
+
+
+def test_fixture_bps_fallback_skipped_once_bonus_confirmed():
+    fixtures = [fixture(11, bps={5: 30, 6: 20}, bonus={5: 3, 6: 2})]
+    assert provisional_bonus({"elements": []}, fixtures) == {}
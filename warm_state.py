@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Warm-restart persistence: a local SQLite snapshot of the state a redeploy
+would otherwise throw away.
+
+- The in-memory manifest, so the data endpoints have gameweek pointers before
+  (or without) the Blob manifest download.
+- file_hashes, so the first scrape cycle after a deploy skips uploads whose
+  content Blob already has.
+- Cache entries from every fpl_cache namespace created with persist=True,
+  restored with their original timestamps so they expire when they would have.
+
+The app snapshots periodically and on shutdown, and restores on start. Only
+cache entries whose stored_at changed since the last snapshot are rewritten,
+so a periodic snapshot mostly touches the live gameweek's entries. Values are
+pickled: they are our own dicts/lists with int keys and tuples that JSON would
+not round-trip, and the database is written and read only by this process.
+
+Usage:
+  from warm_state import warm_state
+  warm_state.put("file_hashes", file_hashes)
+  warm_state.snapshot_caches(caches)
+  hashes = warm_state.get("file_hashes", {})
+  warm_state.restore_caches(caches)
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+STATE_PATH = os.getenv("WARM_STATE_PATH", "/tmp/fpl-warm-state.sqlite3")
+SNAPSHOT_INTERVAL = int(os.getenv("WARM_STATE_INTERVAL_SECONDS", "120"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    name       TEXT PRIMARY KEY,
+    value      BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace  TEXT NOT NULL,
+    key        BLOB NOT NULL,
+    value      BLOB NOT NULL,
+    size       INTEGER NOT NULL,
+    stored_at  REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+
+def _log(msg: str):
+    print(f"[warm-state] {msg}", flush=True)
+
+
+def _dumps(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class WarmState:
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # (namespace, pickled key) -> stored_at as of the last snapshot
+        self._written: Dict[Tuple[str, bytes], float] = {}
+        self.snapshots = 0
+        self.last_snapshot: Optional[float] = None
+        self.last_snapshot_seconds: Optional[float] = None
+        self.restored_entries = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # ---- named values (manifest, file_hashes, ...) ----
+    def put(self, name: str, value: Any):
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("INSERT OR REPLACE INTO state (name, value, updated_at) VALUES (?, ?, ?)",
+                           (name, _dumps(value), time.time()))
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            with self._lock:
+                row = self._db().execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+            return pickle.loads(row[0]) if row else default
+        except Exception as e:
+            _log(f"Could not read {name}: {e}")
+            return default
+
+    # ---- cache entries ----
+    def snapshot_caches(self, registry) -> Dict[str, int]:
+        """Write changed entries of every persisted namespace and drop ones that are gone."""
+        seen: Dict[Tuple[str, bytes], float] = {}
+        upserts = []
+        for name in registry.names():
+            ns = registry.get(name)
+            if ns is None or not ns.persist:
+                continue
+            for key, value, size, stored_at, expires_at in ns.export():
+                try:
+                    pkey = _dumps(key)
+                    ident = (name, pkey)
+                    if self._written.get(ident) != stored_at:
+                        upserts.append((name, pkey, _dumps(value), size, stored_at, expires_at))
+                    seen[ident] = stored_at
+                except Exception as e:
+                    _log(f"Skipping unpicklable {name}[{key!r}]: {e}")
+        removed = [ident for ident in self._written if ident not in seen]
+
+        with self._lock:
+            db = self._db()
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, stored_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", upserts)
+                db.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", removed)
+                db.execute("DELETE FROM cache_entries WHERE expires_at < ?", (time.time() - 86400,))
+        self._written = seen
+        return {"entries": len(seen), "written": len(upserts), "removed": len(removed)}
+
+    def restore_caches(self, registry) -> int:
+        """Re-insert snapshotted entries into namespaces that exist in this process. Returns how many."""
+        try:
+            with self._lock:
+                rows = self._db().execute(
+                    "SELECT namespace, key, value, size, stored_at, expires_at FROM cache_entries "
+                    "ORDER BY stored_at").fetchall()
+        except Exception as e:
+            _log(f"Could not read cache snapshot: {e}")
+            return 0
+
+        restored = 0
+        for name, pkey, pvalue, size, stored_at, expires_at in rows:
+            ns = registry.get(name)
+            if ns is None or not ns.persist:
+                continue
+            try:
+                if ns.restore(pickle.loads(pkey), pickle.loads(pvalue), size, stored_at, expires_at):
+                    restored += 1
+                    self._written[(name, pkey)] = stored_at
+            except Exception as e:
+                _log(f"Skipping unreadable {name} entry: {e}")
+        self.restored_entries += restored
+        return restored
+
+    def record_snapshot(self, started: float):
+        self.snapshots += 1
+        self.last_snapshot = time.time()
+        self.last_snapshot_seconds = round(self.last_snapshot - started, 3)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        return {
+            "path": self.path,
+            "bytes": size,
+            "cache_entries": len(self._written),
+            "snapshots": self.snapshots,
+            "last_snapshot": self.last_snapshot,
+            "last_snapshot_seconds": self.last_snapshot_seconds,
+            "restored_entries": self.restored_entries,
+        }
+
+
+# Process-wide snapshot store, written by the app's warm-state worker and on shutdown
+warm_state = WarmState()